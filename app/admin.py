@@ -1,4 +1,15 @@
+import hashlib
+import re
+
+from django.conf import settings
 from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import ForeignKey, Max, Q
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from .models import (
     User, Category, CategoryScroll,
@@ -6,26 +17,182 @@ from .models import (
     Order, OrderItem,
     LikeProduct, ProductRate
 )
+from .search import fts_enabled, match_sql
+
+
+# 🔹 KATTA JADVALLAR UCHUN TEZ CHANGELIST
+def estimated_row_count(model, using):
+    """Jadval qatorlari sonini COUNT(*) siz taxminlaydi."""
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+        return max(row[0], 0) if row else 0
+    # SQLite: AUTOINCREMENT id qayta ishlatilmaydi — MAX(id) indeksdan bir qadamda
+    return model._default_manager.using(using).aggregate(n=Max("pk"))["n"] or 0
+
+
+class FastPaginator(Paginator):
+    """Estimated count va seek (keyset) sahifalash.
+
+    Filtersiz changelist'da ``ADMIN_COUNT_THRESHOLD`` dan katta jadval uchun
+    ``COUNT(*)`` o‘rniga taxminiy son; filter bo‘lsa sanash shu chegarada to‘xtaydi.
+
+    Har bir sahifa oxirgi qatorining tartib kaliti (masalan ``(created_at, id)``)
+    keyingi sahifa uchun "bookmark" sifatida keshga yoziladi (admin sessiyasi va
+    so‘rov bo‘yicha). Keyingi sahifa ``WHERE kalit < bookmark LIMIT n`` bilan
+    indeks ustida olinadi — sahifa raqamidan qat'i nazar OFFSET yo‘q. Bookmark
+    bo‘lmasa (uzoq sahifaga to‘g‘ridan-to‘g‘ri o‘tish, tartib FK yoki ifoda
+    bo‘yicha) OFFSET fallback: avval faqat pk'lar, so‘ng ``pk IN (...)``.
+    """
+
+    bookmark_timeout = 600
+
+    def __init__(self, *args, bookmark_scope=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bookmark_scope = bookmark_scope
+
+    @cached_property
+    def threshold(self):
+        return getattr(settings, "ADMIN_COUNT_THRESHOLD", 10_000)
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate > self.threshold:
+                return estimate
+        return queryset.order_by()[:self.threshold + 1].count()
+
+    @cached_property
+    def seek_keys(self):
+        """``[(field, descending), ...]`` — tartib faqat oddiy maydonlar va pk bo‘lsa, aks holda None."""
+        if self.bookmark_scope is None:
+            return None
+        opts, keys = self.object_list.model._meta, []
+        for item in self.object_list.query.order_by:
+            if not isinstance(item, str):
+                return None
+            name = item.lstrip("-")
+            try:
+                field = opts.pk if name == "pk" else opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if field.is_relation or not field.concrete:
+                return None
+            keys.append((field, item.startswith("-")))
+        # to‘liq tartib kerak — ChangeList oxiriga pk qo‘shadi
+        return keys if any(field.unique for field, _ in keys) else None
+
+    def bookmark_key(self, number):
+        query = f"{self.object_list.query}|{self.per_page}"
+        return f"admin-seek:{self.bookmark_scope}:{hashlib.sha1(query.encode()).hexdigest()}:{number}"
+
+    def seek_condition(self, values):
+        condition = Q()
+        for i, (field, descending) in enumerate(self.seek_keys):
+            equal = {prev.attname: value for (prev, _), value in zip(self.seek_keys[:i], values)}
+            condition |= Q(**equal, **{f"{field.attname}__{'lt' if descending else 'gt'}": values[i]})
+        return condition
+
+    def page(self, number):
+        number = self.validate_number(number)
+        after = cache.get(self.bookmark_key(number)) if self.seek_keys and number > 1 else None
+        if after is not None:
+            rows = list(self.object_list.filter(self.seek_condition(after))[:self.per_page])
+        else:
+            bottom = (number - 1) * self.per_page
+            ids = list(self.object_list.values_list("pk", flat=True)[bottom:bottom + self.per_page])
+            rows = list(self.object_list.filter(pk__in=ids))
+
+        if self.seek_keys and rows:
+            values = [getattr(rows[-1], field.attname) for field, _ in self.seek_keys]
+            if None not in values:  # NULL bilan taqqoslab bo‘lmaydi
+                cache.set(self.bookmark_key(number + 1), values, self.bookmark_timeout)
+        return self._get_page(rows, number, self)
+
+
+class FastChangeListMixin:
+    """Katta jadvallar uchun changelist: kerakli JOIN'lar, taxminiy son, indeksli qidiruv.
+
+    * ``list_select_related`` berilmasa ``list_display`` dagi FK'lardan yig‘iladi
+      (nullable FK'lar ham); ``__str__`` chuqurroq bog‘lanishga murojaat qilsa —
+      ``list_select_related`` ni qo‘lda bering.
+    * ``prefix_search_fields`` — ``icontains`` o‘rniga indeksli diapazon
+      (``field >= q AND field < q + U+10FFFF``), raqamli so‘rov pk bilan ham solishtiriladi;
+      telefon raqamlari E.164 da saqlangani uchun "99890 111" ``+99890111`` deb ham qidiriladi.
+    * ``fts_search_lookup`` — nomlar FTS5 indeksi orqali (masalan, ``"product_id__in"``).
+    * sahifalar ``FastPaginator`` bilan: taxminiy son va sessiyadagi bookmark bo‘yicha seek.
+    """
+
+    paginator = FastPaginator
+    show_full_result_count = False
+    prefix_search_fields = ()
+    fts_search_lookup = None
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        # bookmark'lar admin sessiyasiga bog‘lanadi — boshqa foydalanuvchining sahifalariga aralashmaydi
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page, bookmark_scope=request.session.session_key,
+        )
+
+    def get_list_select_related(self, request):
+        if self.list_select_related:
+            return self.list_select_related
+        return tuple(
+            name for name in self.get_list_display(request)
+            if isinstance(name, str) and isinstance(self._model_field(name), ForeignKey)
+        ) or False
+
+    def _model_field(self, name):
+        try:
+            return self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term or not (self.prefix_search_fields or self.fts_search_lookup):
+            return super().get_search_results(request, queryset, search_term)
+
+        prefixes = {term}
+        digits = re.sub(r"[\s\-()]", "", term).lstrip("+")
+        if digits.isdigit():
+            prefixes.add("+" + digits)
+        condition = Q()
+        for field in self.prefix_search_fields:
+            for prefix in prefixes:
+                condition |= Q(**{f"{field}__gte": prefix, f"{field}__lt": prefix + "\U0010ffff"})
+        if term.isdigit():
+            condition |= Q(pk=int(term))
+        if self.fts_search_lookup and fts_enabled(queryset.db):
+            match = match_sql(term, prefix=True)
+            if match is not None:
+                condition |= Q(**{self.fts_search_lookup: RawSQL(*match)})
+        return queryset.filter(condition), False
 
 
 # 🔹 USER
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("id", "name", "number")
     search_fields = ("name", "number")
+    prefix_search_fields = ("number",)
     ordering = ("id",)
 
 
 # 🔹 CATEGORY
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("id", "sub_name")
     search_fields = ("sub_name",)
 
 
 # 🔹 CATEGORY SCROLL
 @admin.register(CategoryScroll)
-class CategoryScrollAdmin(admin.ModelAdmin):
+class CategoryScrollAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("id", "name", "image_tag")
     search_fields = ("name",)
 
@@ -48,45 +215,55 @@ class ProductImageInline(admin.TabularInline):
 
 # 🔹 PRODUCT
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = (
         "id", "name", "price", "quantity",
         "category", "category_scroll", "created_at"
     )
     list_filter = ("category", "category_scroll", "created_at")
     search_fields = ("name", "desc")
+    prefix_search_fields = ("sku",)
+    fts_search_lookup = "id__in"
     inlines = [ProductImageInline]
     ordering = ("-created_at",)
 
 
 # 🔹 PRODUCT RATE
 @admin.register(ProductRate)
-class ProductRateAdmin(admin.ModelAdmin):
-    list_display = ("id", "product", "user_number", "rate", "created_at")
+class ProductRateAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ("id", "product", "user", "rate", "created_at")
     list_filter = ("rate", "created_at")
-    search_fields = ("user_number", "product__name")
-    ordering = ("-created_at",)
+    search_fields = ("user__number", "product__name")
+    prefix_search_fields = ("user__number",)
+    fts_search_lookup = "product_id__in"
+    ordering = ("-id",)  # id created_at bilan bir tartibda, indeks shart emas
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
-    list_display = ("id", "user", "tracking_code", "final_price", "created_at")
+class OrderAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ("id", "user", "tracking_code", "final_price", "status", "created_at")
     search_fields = ("user__name", "user__number", "tracking_code")
-    list_filter = ("created_at",)
+    prefix_search_fields = ("tracking_code", "user__number")
+    list_filter = ("status", "created_at")
     ordering = ("-created_at",)
 
 
 # 🔹 ORDER ITEM
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
-    list_display = ("id", "order", "product", "quantity", "subtotal")
+class OrderItemAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ("id", "order", "product", "quantity", "price", "subtotal")
+    list_select_related = ("order__user", "product")  # Order.__str__ user nomini ko‘rsatadi
     search_fields = ("order__tracking_code", "product__name")
+    prefix_search_fields = ("order__tracking_code",)
+    fts_search_lookup = "product_id__in"
     ordering = ("id",)
 
 
 # 🔹 LIKE PRODUCT
 @admin.register(LikeProduct)
-class LikeProductAdmin(admin.ModelAdmin):
+class LikeProductAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("id", "user", "product")
     search_fields = ("user__name", "product__name")
+    prefix_search_fields = ("user__number",)
+    fts_search_lookup = "product_id__in"
     ordering = ("id",)
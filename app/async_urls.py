@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import async_views
+
+urlpatterns = [
+    path("products/", async_views.product_list, name="async-product-list"),
+    path("products/<int:pk>/", async_views.product_detail, name="async-product-detail"),
+    path("categories/", async_views.category_list, name="async-category-list"),
+    path("category-scrolls/", async_views.category_scroll_list, name="async-category-scroll-list"),
+    path("orders/<int:pk>/", async_views.order_detail, name="async-order-detail"),
+]
@@ -0,0 +1,111 @@
+"""Issiq o‘qish endpoint'larining async (ASGI) variantlari.
+
+Django async ORM (``aget``, ``aiterator``, async iteratsiya bilan prefetch)
+ishlatiladi, shuning uchun bitta ASGI worker thread pool'ni band qilmasdan
+ko‘p sekin mobil mijozlarga xizmat qila oladi. ``/api/async/`` prefiksi
+ostida ulanadi; sync view'lar ``/api/`` da o‘zgarishsiz qoladi.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from .filters import FTSSearchFilter, ProductFilter
+from .models import Category, CategoryScroll, Order, Product
+from .pagination import KeysetPagination
+from .serializers import (
+    CategoryScrollSerializer, CategorySerializer, OrderSerializer, ProductSerializer, SparseFields,
+)
+from .views import ProductListCreateView, order_item_prefetches
+
+
+def _json(data, status=200):
+    return JsonResponse(data, encoder=JSONEncoder, safe=False, status=status)
+
+
+def read_replica(view):
+    """app.db.ReplicaRoutingMiddleware uchun: bu view replica'dan o‘qishi mumkin."""
+    view.read_replica = True
+    return view
+
+
+@read_replica
+@require_GET
+async def product_list(request):
+    drf_request = Request(request)
+    params = drf_request.query_params
+    queryset = Product.objects.all()
+
+    if SparseFields.from_request(drf_request).wants("images"):
+        queryset = queryset.prefetch_related("images")
+    # sync ProductListCreateView bilan bir xil filter; forma tekshiruvi (category mavjudmi) sync ORM
+    filterset = ProductFilter(params, queryset=queryset)
+    if not await sync_to_async(filterset.is_valid)():
+        return _json(filterset.errors, status=400)
+    queryset = filterset.qs
+    if params.get("search"):
+        # FTS5 filter faqat queryset quradi — DB'ga murojaat async iteratsiyada
+        queryset = FTSSearchFilter().filter_queryset(drf_request, queryset, ProductListCreateView)
+
+    paginator = KeysetPagination()
+    try:
+        page = await paginator.apaginate_queryset(queryset, drf_request, ProductListCreateView)
+    except APIException as exc:  # noto‘g‘ri cursor — sync view kabi 404
+        return _json({"detail": exc.detail}, status=exc.status_code)
+    except ValidationError as exc:
+        return _json({"detail": exc.messages}, status=400)
+    data = ProductSerializer(page, many=True, context={"request": drf_request}).data
+    return _json({
+        "next": paginator.get_next_link(),
+        "previous": paginator.get_previous_link(),
+        "results": data,
+    })
+
+
+@read_replica
+@require_GET
+async def product_detail(request, pk):
+    drf_request = Request(request)
+    queryset = Product.objects.all()
+    if SparseFields.from_request(drf_request).wants("images"):
+        queryset = queryset.prefetch_related("images")
+    try:
+        product = await queryset.aget(pk=pk)
+    except Product.DoesNotExist:
+        raise Http404
+    return _json(ProductSerializer(product, context={"request": drf_request}).data)
+
+
+@read_replica
+@require_GET
+async def category_list(request):
+    drf_request = Request(request)
+    categories = [obj async for obj in Category.objects.order_by("id").aiterator(chunk_size=500)]
+    return _json(CategorySerializer(categories, many=True, context={"request": drf_request}).data)
+
+
+@read_replica
+@require_GET
+async def category_scroll_list(request):
+    drf_request = Request(request)
+    scrolls = [obj async for obj in CategoryScroll.objects.order_by("id").aiterator(chunk_size=500)]
+    return _json(CategoryScrollSerializer(scrolls, many=True, context={"request": drf_request}).data)
+
+
+@require_GET
+async def order_detail(request, pk):
+    drf_request = Request(request)
+    sparse = SparseFields.from_request(drf_request)
+    queryset = Order.objects.all()
+    if sparse.wants("user_number"):
+        queryset = queryset.select_related("user")
+    if sparse.wants("items"):
+        queryset = queryset.prefetch_related(*order_item_prefetches(sparse, "items."))
+    try:
+        order = await queryset.aget(pk=pk)
+    except Order.DoesNotExist:
+        raise Http404
+    return _json(OrderSerializer(order, context={"request": drf_request}).data)
@@ -0,0 +1,139 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max, Subquery
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Tombstone
+
+# javob keshi avlodlari (app.signals oshiradi)
+PRODUCTS_GENERATION = "products"
+CATEGORIES_GENERATION = "categories"
+CATEGORY_SCROLLS_GENERATION = "category_scrolls"
+
+
+def product_generation(product_id):
+    return f"product:{product_id}"
+
+
+def _initial_generation():
+    # LRU avlod kalitini chiqarib yuborsa ham qiymat takrorlanmasin (eski yozuvlar tirilmasin)
+    return time.time_ns()
+
+
+def generation_store():
+    """Avlod hisoblagichlari keshi — javob yozuvlari bilan bitta (umumiy) backend.
+
+    Redis/Memcached/fayl keshida bir worker'dagi ``bump_generation`` boshqa
+    worker'larning eski yozuvlarini ham darhol eskirtiradi.
+    """
+    return caches[getattr(settings, "CACHE_GENERATIONS_ALIAS", getattr(settings, "RESPONSE_CACHE_ALIAS", "default"))]
+
+
+def get_generation(name):
+    """Kesh "avlodi" — o‘zgarishda oshiriladi, eski kalitlar o‘z-o‘zidan eskiradi."""
+    return generation_store().get_or_set(f"gen:{name}", _initial_generation, timeout=None)
+
+
+def bump_generation(*names):
+    store = generation_store()
+    for name in names:
+        try:
+            store.incr(f"gen:{name}")
+        except ValueError:
+            store.set(f"gen:{name}", _initial_generation(), timeout=None)
+
+
+def bump_generation_on_commit(*names, using=None):
+    """Yozuvchi tranzaksiya commit bo‘lgach oshiradi.
+
+    Tranzaksiya ichida oshirilsa, oraliqdagi GET commit'dan oldingi
+    ma'lumotni yangi avlod ostida keshlab qo‘yardi; rollback'da umuman chaqirilmaydi.
+    """
+    transaction.on_commit(lambda: bump_generation(*names), using=using)
+
+
+def params_key(params):
+    """Query parametrlarini tartiblab, qisqa hash kalitga aylantiradi."""
+    items = sorted((key, value) for key in params for value in params.getlist(key))
+    return hashlib.sha1(urlencode(items).encode()).hexdigest()
+
+
+# 🔹 JAVOB KESHI (ETag / Last-Modified / 304)
+class ResponseCacheMixin:
+    """GET javoblarini tayyor baytlar ko‘rinishida keshlaydi.
+
+    Kalit: ``response_cache_generations`` avlodlari + path + tartiblangan query
+    params + ``Accept``. Avlodlar signal'larda oshiriladi, shuning uchun
+    tegishli model o‘zgarishi bilan yozuv darhol eskiradi; qolganini
+    ``RESPONSE_CACHE_ALIAS`` keshining TTL/LRU siyosati chiqarib yuboradi.
+    Kesh yoki ETag mos kelsa serializer umuman ishlamaydi.
+    """
+
+    # "{pk}" kabi joylar URL kwargs bilan to‘ldiriladi
+    response_cache_generations = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            request.method not in ("GET", "HEAD")
+            or not self.response_cache_generations
+            or not getattr(settings, "RESPONSE_CACHE_ENABLED", True)
+        ):
+            return super().dispatch(request, *args, **kwargs)
+
+        store = caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+        key = self.response_cache_key(request, kwargs)
+        entry = store.get(key)
+        if entry is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+            response.render()
+            entry = {
+                "content": response.content,
+                "content_type": response["Content-Type"],
+                "headers": {name: response[name] for name in ("Allow", "Vary") if response.has_header(name)},
+                "etag": f'"{hashlib.sha1(response.content).hexdigest()}"',
+                "last_modified": self.get_last_modified(kwargs),
+            }
+            store.set(key, entry, getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300))
+        else:
+            response = HttpResponse(entry["content"], content_type=entry["content_type"])
+            for name, value in entry["headers"].items():
+                response[name] = value
+
+        response["ETag"] = entry["etag"]
+        if entry["last_modified"] is not None:
+            response["Last-Modified"] = http_date(entry["last_modified"])
+        return get_conditional_response(
+            request, etag=entry["etag"], last_modified=entry["last_modified"], response=response,
+        )
+
+    def response_cache_key(self, request, kwargs):
+        generations = ":".join(
+            str(get_generation(name.format(**kwargs))) for name in self.response_cache_generations
+        )
+        accept = hashlib.sha1(request.headers.get("Accept", "").encode()).hexdigest()[:8]
+        # next/previous havolalari absolyut — host ham kalitda
+        return f"resp:{generations}:{request.get_host()}{request.path}:{params_key(request.GET)}:{accept}"
+
+    def get_last_modified(self, kwargs):
+        """``updated_at`` ning eng kattasi (detail bo‘lsa — shu obyektniki), unix vaqt.
+
+        Ro‘yxatlar uchun oxirgi o‘chirish vaqti (tombstone) ham hisobga olinadi.
+        """
+        queryset = self.queryset.model._default_manager.all()
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        if lookup in kwargs:
+            row = queryset.filter(**{self.lookup_field: kwargs[lookup]}).aggregate(last=Max("updated_at"))
+        else:
+            deleted = Tombstone.objects.order_by("-deleted_at").values("deleted_at")[:1]
+            row = queryset.aggregate(last=Max("updated_at"), deleted=Max(Subquery(deleted)))
+        values = [value for value in row.values() if value is not None]
+        return int(max(values).timestamp()) if values else None
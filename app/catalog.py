@@ -0,0 +1,191 @@
+"""Katalog import/eksporti — yetkazib beruvchi CSV/XLSX fayllari uchun.
+
+Qatorlar generator orqali o‘qiladi va ``batch_size`` bo‘yicha
+``bulk_create(update_conflicts=True)`` bilan ``sku`` kaliti ostida upsert
+qilinadi, shuning uchun xotira fayl hajmiga bog‘liq emas.
+"""
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .cache import (
+    CATEGORIES_GENERATION, CATEGORY_SCROLLS_GENERATION, PRODUCTS_GENERATION, bump_generation,
+    product_generation,
+)
+from .facets import FACETS_GENERATION
+from .models import Category, CategoryScroll, Product
+from .rankings import rebuild_rankings
+from .search import rebuild_index
+
+COLUMNS = ["sku", "name", "desc", "price", "quantity", "category", "category_scroll"]
+MAX_PRICE = Decimal(10) ** 8  # DecimalField(max_digits=10, decimal_places=2)
+MAX_QUANTITY = 2_147_483_647  # PositiveIntegerField barcha backend'larda
+UPDATE_FIELDS = ["name", "desc", "price", "quantity", "category", "category_scroll", "updated_at"]
+
+
+class RowError(ValueError):
+    pass
+
+
+# 🔹 O‘qish
+def read_csv(fh):
+    for row in csv.DictReader(fh):
+        yield {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+
+
+def read_xlsx(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("XLSX import uchun openpyxl o‘rnatilishi kerak (pip install openpyxl)")
+
+    # read_only rejimi qatorlarni diskdan oqim bilan o‘qiydi
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell or "").strip().lower() for cell in next(rows, ())]
+        for values in rows:
+            if not any(value is not None for value in values):
+                continue
+            yield {key: "" if value is None else str(value).strip() for key, value in zip(header, values) if key}
+    finally:
+        workbook.close()
+
+
+# 🔹 Nom → id xaritasi
+class NameMap:
+    """Category/CategoryScroll'ni nomi bo‘yicha topadi; yo‘q bo‘lsa yaratadi."""
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.ids = {}
+        # bir xil nomli bir nechta yozuv bo‘lsa — eng eskisi
+        for pk, name in model.objects.order_by("-id").values_list("id", field):
+            self.ids[name.casefold()] = pk
+        self.created = 0
+
+    def resolve(self, name):
+        key = name.casefold()
+        if key not in self.ids:
+            self.ids[key] = self.model.objects.create(**{self.field: name}).pk
+            self.created += 1
+        return self.ids[key]
+
+
+def build_product(row, categories, scrolls):
+    name = row.get("name")
+    if not name:
+        raise RowError("name bo‘sh")
+    try:
+        price = Decimal(row.get("price") or "")
+    except InvalidOperation:
+        price = None
+    # "NaN"/"inf" Decimal'ga o‘tadi, lekin keyingi taqqoslash/quantize'da butun importni to‘xtatadi
+    if price is None or not price.is_finite():
+        raise RowError(f"price noto‘g‘ri: {row.get('price')!r}")
+    try:
+        quantity = int(Decimal(row.get("quantity") or 0))
+    except (InvalidOperation, OverflowError, ValueError):
+        raise RowError(f"quantity noto‘g‘ri: {row.get('quantity')!r}")
+    if price < 0 or quantity < 0:
+        raise RowError("price/quantity manfiy bo‘lishi mumkin emas")
+    if price >= MAX_PRICE:
+        raise RowError(f"price juda katta: {price}")
+    if quantity > MAX_QUANTITY:
+        raise RowError(f"quantity juda katta: {quantity}")
+    if not row.get("category"):
+        raise RowError("category bo‘sh")
+
+    return Product(
+        sku=row.get("sku") or None,
+        name=name,
+        desc=row.get("desc") or None,
+        price=price.quantize(Decimal("0.01")),
+        quantity=quantity,
+        category_id=categories.resolve(row["category"]),
+        category_scroll_id=scrolls.resolve(row["category_scroll"]) if row.get("category_scroll") else None,
+    )
+
+
+def _flush(batch, unkeyed):
+    with transaction.atomic():
+        if batch:
+            Product.objects.bulk_create(
+                batch.values(), update_conflicts=True, unique_fields=["sku"], update_fields=UPDATE_FIELDS,
+            )
+            # yangilangan productlarning detail keshi (pk upsert'dan keyin qo‘yiladi)
+            bump_generation(*(product_generation(product.pk) for product in batch.values() if product.pk))
+        if unkeyed:
+            Product.objects.bulk_create(unkeyed)
+    return len(batch) + len(unkeyed)
+
+
+def import_rows(rows, batch_size=2000, on_error=None):
+    """Qatorlarni upsert qiladi va statistika qaytaradi.
+
+    ``on_error(line, exc)`` — noto‘g‘ri qator uchun; berilmasa xato ko‘tariladi.
+    """
+    categories = NameMap(Category, "sub_name")
+    scrolls = NameMap(CategoryScroll, "name")
+    stats = {"rows": 0, "saved": 0, "skipped": 0}
+    batch, unkeyed = {}, []
+
+    for line, row in enumerate(rows, start=2):  # 1-qator — sarlavha
+        stats["rows"] += 1
+        try:
+            product = build_product(row, categories, scrolls)
+        except RowError as exc:
+            if on_error is None:
+                raise RowError(f"{line}-qator: {exc}")
+            on_error(line, exc)
+            stats["skipped"] += 1
+            continue
+        if product.sku:
+            batch[product.sku] = product  # bir partiyada takrorlangan sku — oxirgisi
+        else:
+            unkeyed.append(product)
+        if len(batch) + len(unkeyed) >= batch_size:
+            stats["saved"] += _flush(batch, unkeyed)
+            batch, unkeyed = {}, []
+
+    stats["saved"] += _flush(batch, unkeyed)
+    stats["categories_created"] = categories.created + scrolls.created
+
+    # bulk_create signal yubormaydi — qidiruv indeksi, reytinglar, facet va javob keshlari bu yerda
+    if stats["saved"]:
+        rebuild_index()
+        rebuild_rankings()
+        bump_generation(FACETS_GENERATION, PRODUCTS_GENERATION, CATEGORIES_GENERATION, CATEGORY_SCROLLS_GENERATION)
+    return stats
+
+
+# 🔹 Eksport
+def export_rows(queryset=None, chunk_size=2000):
+    queryset = Product.objects.all() if queryset is None else queryset
+    rows = queryset.order_by("id").values_list(
+        "sku", "name", "desc", "price", "quantity", "category__sub_name", "category_scroll__name",
+    )
+    for values in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(COLUMNS, values))
+
+
+def write_csv(rows, fh):
+    writer = csv.DictWriter(fh, fieldnames=COLUMNS)
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow({key: "" if value is None else value for key, value in row.items()})
+        count += 1
+    return count
+
+
+def write_jsonl(rows, fh):
+    count = 0
+    for row in rows:
+        row["price"] = str(row["price"])
+        fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+        count += 1
+    return count
@@ -0,0 +1,50 @@
+"""API javoblarini siqish: brotli (o‘rnatilgan bo‘lsa) yoki gzip.
+
+Django'ning ``GZipMiddleware`` ustiga qurilgan: oqimli javoblar, ETag'ni
+zaiflashtirish va ``Vary: Accept-Encoding`` o‘sha yerda. Bu yerda faqat
+``COMPRESSION_MIN_SIZE`` chegarasi, allaqachon siqilgan turlar va ``br``.
+"""
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - ixtiyoriy bog‘liqlik
+    brotli = None
+
+re_accepts_br = _lazy_re_compile(r"\bbr\b")
+
+# qayta siqishdan foyda yo‘q
+INCOMPRESSIBLE_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip")
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < getattr(settings, "COMPRESSION_MIN_SIZE", 1024):
+            return response
+        if response.get("Content-Type", "").startswith(INCOMPRESSIBLE_TYPES):
+            return response
+
+        if (
+            brotli is not None
+            and not response.streaming
+            and not response.has_header("Content-Encoding")
+            and re_accepts_br.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        ):
+            return self.compress_brotli(response)
+        return super().process_response(request, response)
+
+    def compress_brotli(self, response):
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed = brotli.compress(response.content, quality=getattr(settings, "COMPRESSION_BROTLI_QUALITY", 5))
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
@@ -0,0 +1,126 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http.request import HttpRequest
+
+# so‘rov davomida: replica'dan o‘qish mumkinmi va yozuv bo‘ldimi
+_routing = ContextVar("db_routing", default=None)
+
+PIN_COOKIE = "db_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+# 🔹 SQLite PRAGMA profili
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """``connection_created`` da settings.SQLITE_PRAGMAS ni qo‘llaydi (WAL, mmap, ...)."""
+    if connection.vendor != "sqlite":
+        return
+    pragmas = dict(getattr(settings, "SQLITE_PRAGMAS", {}))
+    pragmas.update(connection.settings_dict.get("PRAGMAS", {}))
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def replica_aliases():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+# 🔹 ROUTER
+class ReadReplicaRouter:
+    """Katalog view'laridagi xavfsiz GET'larni replica'larga yuboradi.
+
+    Yozuvlar doim ``default`` ga. So‘rov ichida yozuv bo‘lsa, keyingi
+    o‘qishlar ham ``default`` dan (read-after-write); yozgan mijoz
+    ``REPLICA_PIN_SECONDS`` davomida cookie orqali primary'ga bog‘lanadi.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        replicas = replica_aliases()
+        if state and state["replica_ok"] and not state["wrote"] and replicas:
+            return random.choice(replicas)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state["wrote"] = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {"default", *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replica'lar primary'dan nusxa oladi, migratsiya faqat default'da
+        if db in replica_aliases():
+            return False
+        return None
+
+
+# 🔹 MIDDLEWARE
+class ReplicaRoutingMiddleware:
+    """View ``read_replica = True`` bo‘lsa va so‘rov xavfsiz bo‘lsa replica'ga ruxsat beradi.
+
+    Sync va async rejimda ishlaydi — ASGI ostida async view'lar thread'ga o‘tmaydi.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        state = {"replica_ok": False, "wrote": False}
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.pin(request, response, state)
+
+    async def __acall__(self, request: HttpRequest):
+        state = {"replica_ok": False, "wrote": False}
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.pin(request, response, state)
+
+    def pin(self, request, response, state):
+        if request.method not in SAFE_METHODS or state["wrote"]:
+            response.set_cookie(PIN_COOKIE, "1", max_age=getattr(settings, "REPLICA_PIN_SECONDS", 5), httponly=True)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.allow_replica(request, view_func)
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.allow_replica(request, view_func)
+        return None
+
+    def allow_replica(self, request, view_func):
+        state = _routing.get()
+        view_class = getattr(view_func, "cls", view_func)
+        if (
+            state is not None
+            and request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+            and getattr(view_class, "read_replica", False)
+        ):
+            state["replica_ok"] = True
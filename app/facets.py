@@ -0,0 +1,76 @@
+from decimal import ROUND_DOWN, Decimal
+
+from django.conf import settings
+from django.db.models import Count, Max, Min, Q
+
+from .cache import generation_store, get_generation, params_key
+
+FACETS_GENERATION = "product_facets"
+CENT = Decimal("0.01")
+
+
+def price_buckets(low, high, count):
+    """[low, high] oralig‘ini ``count`` ta teng bo‘lakka bo‘ladi."""
+    if low == high:
+        return [(low, high)]
+    step = ((high - low) / count).quantize(CENT, rounding=ROUND_DOWN) or CENT
+    edges = [low + step * i for i in range(count) if low + step * i < high] + [high]
+    return list(zip(edges, edges[1:]))
+
+
+def compute_facets(queryset, bucket_count=5):
+    """Kategoriya, scroll va narx bo‘yicha hisoblar — guruhlangan SQL agregatlar bilan."""
+    queryset = queryset.prefetch_related(None).order_by()
+
+    categories = (
+        queryset.values("category", "category__sub_name")
+        .annotate(count=Count("id"))
+        .order_by("-count", "category")
+    )
+    scrolls = (
+        queryset.values("category_scroll", "category_scroll__name")
+        .annotate(count=Count("id"))
+        .order_by("-count", "category_scroll")
+    )
+    stats = queryset.aggregate(count=Count("id"), low=Min("price"), high=Max("price"))
+
+    buckets = []
+    if stats["count"]:
+        ranges = price_buckets(stats["low"], stats["high"], bucket_count)
+        counts = queryset.aggregate(**{
+            # oxirgi bo‘lak yuqori chegarani ham o‘z ichiga oladi
+            f"b{i}": Count("id", filter=Q(price__gte=lo) & (Q(price__lte=hi) if i == len(ranges) - 1 else Q(price__lt=hi)))
+            for i, (lo, hi) in enumerate(ranges)
+        })
+        buckets = [
+            {"from": str(lo), "to": str(hi), "count": counts[f"b{i}"]}
+            for i, (lo, hi) in enumerate(ranges)
+        ]
+
+    return {
+        "count": stats["count"],
+        "categories": [
+            {"id": row["category"], "sub_name": row["category__sub_name"], "count": row["count"]}
+            for row in categories
+        ],
+        "category_scrolls": [
+            {"id": row["category_scroll"], "name": row["category_scroll__name"], "count": row["count"]}
+            for row in scrolls
+        ],
+        "price": {
+            "min": str(stats["low"]) if stats["low"] is not None else None,
+            "max": str(stats["high"]) if stats["high"] is not None else None,
+            "buckets": buckets,
+        },
+    }
+
+
+def cached_facets(queryset, params, bucket_count=5):
+    """Filter imzosi bo‘yicha keshlangan facets; Product o‘zgarsa avlod oshadi."""
+    key = f"facets:{get_generation(FACETS_GENERATION)}:{bucket_count}:{params_key(params)}"
+    store = generation_store()  # avlod bilan bir joyda — worker'lar natijani ham bo‘lishadi
+    data = store.get(key)
+    if data is None:
+        data = compute_facets(queryset, bucket_count)
+        store.set(key, data, getattr(settings, "FACETS_CACHE_TIMEOUT", 300))
+    return data
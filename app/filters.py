@@ -0,0 +1,77 @@
+import django_filters
+from django.db.models.expressions import RawSQL
+from django_filters.constants import EMPTY_VALUES
+from rest_framework import filters
+
+from .models import LikeProduct, Product, User
+from .search import fts_enabled, match_sql
+from .users import normalize_number, resolve_many
+
+
+class FTSSearchFilter(filters.SearchFilter):
+    """``?search=`` ni SQLite FTS5 indeksi orqali bajaradi (LIKE '%term%' o‘rniga).
+
+    FTS5 bo‘lmagan backendlarda oddiy SearchFilter ishlaydi.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not fts_enabled(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+
+        match = match_sql(request.query_params.get(self.search_param, ""), prefix=True)
+        if match is None:
+            return queryset
+        return queryset.filter(id__in=RawSQL(*match))
+
+
+# 🔹 TELEFON RAQAMI — "+998 90 ..." va "99890..." bitta foydalanuvchi (app.users)
+class PhoneNumberFilter(django_filters.CharFilter):
+    """Raqamni E.164 ga keltirib solishtiradi; noto‘g‘ri raqam — bo‘sh natija."""
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        try:
+            value = normalize_number(value)
+        except ValueError:
+            return qs.none()
+        return super().filter(qs, value)
+
+
+class PhoneNumbersFilter(django_filters.CharFilter):
+    """Vergul bilan ajratilgan raqamlar — id'lar ``resolve_many`` bilan (LRU + bitta ``IN``).
+
+    Noto‘g‘ri va topilmagan raqamlar natijaga kirmaydi.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        return qs.filter(pk__in=resolve_many(value.split(","), using=qs.db).values())
+
+
+class UserFilter(django_filters.FilterSet):
+    number = PhoneNumberFilter()
+    numbers = PhoneNumbersFilter()
+
+    class Meta:
+        model = User
+        fields = ["number"]
+
+
+class LikeProductFilter(django_filters.FilterSet):
+    user__number = PhoneNumberFilter(field_name="user__number")
+
+    class Meta:
+        model = LikeProduct
+        fields = ["user__number", "product"]
+
+
+# 🔹 PRODUCT — sync va async ro‘yxatlar uchun bitta filter (noto‘g‘ri qiymat — 400)
+class ProductFilter(django_filters.FilterSet):
+    min_price = django_filters.NumberFilter(field_name="price", lookup_expr="gte")
+    max_price = django_filters.NumberFilter(field_name="price", lookup_expr="lte")
+
+    class Meta:
+        model = Product
+        fields = ["category", "category_scroll", "price", "quantity"]
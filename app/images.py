@@ -0,0 +1,131 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connections, transaction
+from PIL import Image, ImageOps
+
+# variant nomi → maksimal (eni, bo‘yi); rasm kattalashtirilmaydi
+VARIANTS = getattr(settings, "IMAGE_VARIANTS", {
+    "thumb": (200, 200),
+    "card": (600, 600),
+    "full": (1600, 1600),
+})
+FORMATS = {"webp": ("WEBP", {"quality": 80, "method": 4}), "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True})}
+DERIVED_DIR = "derived"
+
+logger = logging.getLogger("app.images")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "IMAGE_WORKERS", 2),
+                thread_name_prefix="image-variants",
+            )
+        return _executor
+
+
+def derived_prefix(name):
+    stem, _ = os.path.splitext(name)
+    return f"{DERIVED_DIR}/{stem}"
+
+
+def generate_variants(name, storage=default_storage):
+    """Asl rasmdan barcha variantlarni yaratadi va metadata qaytaradi.
+
+    Natija: {"source": name, "thumb": {"webp": {"path", "width", "height"}, ...}, ...}
+    Faqat fayl bilan ishlaydi (DB'ga tegmaydi) — alohida jarayonda ham chaqirsa bo‘ladi.
+    """
+    with storage.open(name, "rb") as fh:
+        original = ImageOps.exif_transpose(Image.open(fh))
+        original.load()
+
+    prefix = derived_prefix(name)
+    meta = {"source": name}
+    for variant, size in VARIANTS.items():
+        resized = original.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        meta[variant] = {}
+        for ext, (fmt, options) in FORMATS.items():
+            image = resized
+            if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            buffer = BytesIO()
+            image.save(buffer, fmt, **options)
+
+            path = f"{prefix}/{variant}.{ext}"
+            if storage.exists(path):
+                storage.delete(path)
+            storage.save(path, ContentFile(buffer.getvalue()))
+            meta[variant][ext] = {"path": path, "width": image.width, "height": image.height}
+    return meta
+
+
+def delete_variants(meta, storage=default_storage):
+    for variant in VARIANTS:
+        for info in (meta or {}).get(variant, {}).values():
+            if storage.exists(info["path"]):
+                storage.delete(info["path"])
+
+
+def process_instance(model_label, pk, name):
+    """Variantlarni yaratib, ``variants`` ustuniga yozadi."""
+    meta = generate_variants(name)
+    model = apps.get_model(model_label)
+    # rasm shu orada almashtirilgan bo‘lsa eski natijani yozmaymiz
+    if model.objects.filter(pk=pk, image=name).update(variants=meta):
+        from .sync import touch  # sync -> serializers -> images
+
+        # yangi variant URL'lari delta-sync mijozlariga ham yetib borsin
+        touch(model, pk)
+    return meta
+
+
+def _run_in_worker(*args):
+    # worker thread o‘z DB ulanishini ochadi — ishdan keyin yopamiz
+    close_old_connections()
+    try:
+        return process_instance(*args)
+    except Exception:
+        # submit() future'i hech kim o‘qimaydi — xato jim yo‘qolmasin
+        logger.exception("Rasm variantlari yaratilmadi: %s #%s (%s)", *args)
+    finally:
+        connections.close_all()
+
+
+def schedule_variants(instance):
+    """Commit'dan keyin variantlarni fon worker'ida yaratishni navbatga qo‘yadi."""
+    if not instance.image or (instance.variants or {}).get("source") == instance.image.name:
+        return
+    args = (instance._meta.label, instance.pk, instance.image.name)
+
+    if getattr(settings, "IMAGE_VARIANTS_ASYNC", True):
+        transaction.on_commit(lambda: get_executor().submit(_run_in_worker, *args))
+    else:
+        transaction.on_commit(lambda: process_instance(*args))
+
+
+def variant_urls(meta, request=None):
+    """Serializer uchun: {variant: {format: {url, width, height}}} (srcset uchun)."""
+    result = {}
+    for variant in VARIANTS:
+        for ext, info in (meta or {}).get(variant, {}).items():
+            url = default_storage.url(info["path"])
+            result.setdefault(variant, {})[ext] = {
+                "url": request.build_absolute_uri(url) if request else url,
+                "width": info["width"],
+                "height": info["height"],
+            }
+    return result
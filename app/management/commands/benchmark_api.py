@@ -0,0 +1,314 @@
+import json
+import platform
+import random
+import re
+import sqlite3
+import time
+import zlib
+from datetime import datetime, timezone
+from importlib.util import find_spec
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from app.models import Category, LikeProduct, Order, Product, ProductRate, User
+from app.stock import release_orders
+
+# QueryProfilerMiddleware yozadigan sarlavha: db;dur=1.2;desc="3 queries", ser;dur=..., total;dur=...
+_TIMING_RE = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+# rating_create uchun vaqtinchalik foydalanuvchilar (seed raqamlari "+99890..." bilan kesishmaydi)
+BENCH_PREFIX = "+998999"
+
+ACCEPT = {"json": "application/json", "msgpack": "application/msgpack"}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentil (values saralangan bo‘lishi kerak)."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def decoded_size(response):
+    """Siqilmagan javob hajmi (br uchun brotli o‘rnatilgan bo‘lishi kerak, aks holda None)."""
+    encoding = response.get("Content-Encoding")
+    if not encoding:
+        return len(response.content)
+    if encoding == "gzip":
+        return len(zlib.decompress(response.content, zlib.MAX_WBITS | 16))
+    if encoding == "br":
+        try:
+            import brotli
+        except ImportError:
+            return None
+        return len(brotli.decompress(response.content))
+    return None
+
+
+def parse_server_timing(header):
+    timing = {"queries": 0, "db": 0.0, "ser": 0.0, "render": 0.0}
+    for name, duration, queries in _TIMING_RE.findall(header or ""):
+        timing[name] = float(duration)
+        if queries:
+            timing["queries"] = int(queries)
+    return timing
+
+
+class Command(BaseCommand):
+    help = (
+        "API route'larini test Client orqali o‘lchaydi: p50/p95/p99, throughput, SQL soni, "
+        "javob hajmi. Natija JSON baseline sifatida saqlanadi va oldingisi bilan solishtiriladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--only", nargs="*", help="Faqat shu ssenariylar")
+        parser.add_argument("--output", default="benchmark.json")
+        parser.add_argument("--compare", help="Oldingi baseline JSON fayli")
+        parser.add_argument("--threshold", type=float, default=10.0, help="p95 regressiya chegarasi, %%")
+        parser.add_argument("--fail-on-regression", action="store_true")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--format", choices=sorted(ACCEPT), default="json", help="Accept sarlavhasi")
+        parser.add_argument(
+            "--encoding", default="gzip, br",
+            help="Accept-Encoding sarlavhasi; siqishsiz o‘lchash uchun 'identity'",
+        )
+        parser.add_argument(
+            "--no-response-cache", dest="response_cache", action="store_false",
+            help="Javob keshini o‘chirib, har so‘rovni to‘liq o‘lchash",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.fixtures = self.load_fixtures()
+        scenarios = self.scenarios()
+        if options["only"]:
+            unknown = set(options["only"]) - set(scenarios)
+            if unknown:
+                raise CommandError(f"Noma'lum ssenariy: {', '.join(sorted(unknown))}")
+            scenarios = {name: scenarios[name] for name in options["only"]}
+
+        if options["format"] == "msgpack" and find_spec("msgpack") is None:
+            raise CommandError("--format msgpack uchun msgpack o‘rnatilishi kerak (pip install msgpack)")
+        self.headers = {"HTTP_ACCEPT": ACCEPT[options["format"]], "HTTP_ACCEPT_ENCODING": options["encoding"]}
+        results = {}
+        self.created_orders = []
+        try:
+            with override_settings(
+                QUERY_PROFILER_ENABLED=True, QUERY_PROFILER_SAMPLE_RATE=0,
+                RESPONSE_CACHE_ENABLED=options["response_cache"] and settings.RESPONSE_CACHE_ENABLED,
+            ):
+                for name, build in scenarios.items():
+                    results[name] = self.run(build, options["iterations"], options["warmup"])
+                    self.print_row(name, results[name])
+        finally:
+            self.cleanup()
+
+        report = {"meta": self.meta(options), "results": results}
+        with open(options["output"], "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        self.stdout.write(f"\nBaseline: {options['output']}")
+
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as fh:
+                previous = json.load(fh)
+            regressions = self.compare(previous["results"], results, options["threshold"])
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"Regressiya: {', '.join(regressions)}")
+
+    # 🔹 Ma'lumotlar
+    def load_fixtures(self):
+        product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+        users = list(User.objects.order_by("id").values_list("id", "number")[:1000])
+        if not product_ids or not users:
+            raise CommandError("Ma'lumot yo‘q — avval `manage.py seed_benchmark_data` ni ishga tushiring")
+        order = Order.objects.order_by("-id").values_list("id", "user__number").first()
+        return {
+            "products": self.rng.sample(product_ids, min(500, len(product_ids))),
+            "users": users,
+            "categories": list(Category.objects.values_list("id", flat=True)[:50]),
+            "order": order,
+        }
+
+    def scenarios(self):
+        f = self.fixtures
+        rng = self.rng
+        products = f["products"]
+        user_id, user_number = f["users"][0]
+
+        def pick():
+            return rng.choice(products)
+
+        def get(path):
+            return lambda i: ("get", path, None)
+
+        def bench_user(i):
+            # har iteratsiyaga yangi foydalanuvchi — (user, product) takrorlanmasin; o‘lchovdan tashqarida
+            number = f"{BENCH_PREFIX}{i:06d}"
+            User.objects.get_or_create(number=number, defaults={"name": "Benchmark"})
+            return number
+
+        scenarios = {
+            "product_list": get("/api/products/"),
+            "product_list_filtered": lambda i: (
+                "get", f"/api/products/?category={rng.choice(f['categories'])}&min_price=10&max_price=2000", None,
+            ),
+            "product_list_search": get("/api/products/?search=choynak"),
+            "product_list_ordering": get("/api/products/?ordering=-average_rating"),
+            "product_list_deep_page": get(self.deep_page_url("/api/products/?ordering=price", 5)),
+            "product_list_sparse": get("/api/products/?fields=id,name,price"),
+            "product_detail": lambda i: ("get", f"/api/products/{pick()}/", None),
+            "product_facets": get("/api/products/facets/"),
+            "product_search": get("/api/products/search/?q=rishton kosa"),
+            "product_autocomplete": get("/api/products/autocomplete/?q=cho"),
+            "product_rankings": get("/api/products/rankings/?metric=rating&limit=20"),
+            "product_rankings_category": lambda i: (
+                "get", f"/api/products/rankings/?metric=sales&category={rng.choice(f['categories'])}", None,
+            ),
+            "category_list": get("/api/categories/"),
+            "order_list": get("/api/orders/"),
+            "likes_liked": get(f"/api/likes/liked/?user_number={user_number}&products=all"),
+            # juft iteratsiyalar: like + unlike — ma'lumot o‘zgarmay qoladi
+            "toggle_like": lambda i: (
+                "post", "/api/likes/toggle_like/",
+                {"user_number": user_number, "product": products[(i // 2) % len(products)]},
+            ),
+            "rating_create": lambda i: (
+                "post", "/api/ratings/",
+                {"user_number": bench_user(i), "product": pick(), "rate": rng.randint(1, 5)},
+            ),
+            "checkout": lambda i: (
+                "post", "/api/checkout/",
+                {"user_id": user_id, "items": [{"product_id": pid, "quantity": 2} for pid in rng.sample(products, 3)]},
+            ),
+        }
+        if f["order"]:
+            scenarios["order_detail"] = get(f"/api/orders/{f['order'][0]}/")
+            scenarios["order_history"] = get(f"/api/orders/history/?user_number={f['order'][1]}")
+        return scenarios
+
+    def deep_page_url(self, url, pages):
+        client = Client()
+        for _ in range(pages):
+            next_url = client.get(url).json().get("next")
+            if not next_url:
+                break
+            url = next_url.split("testserver", 1)[-1]
+        return url
+
+    # 🔹 O‘lchash
+    def run(self, build, iterations, warmup):
+        client = Client()
+        # toggle_like like/unlike juftligi buzilmasligi uchun
+        iterations += iterations % 2
+        warmup += warmup % 2
+        latencies, queries, db_ms, ser_ms, render_ms, sizes, raw_sizes, statuses = [], [], [], [], [], [], [], {}
+
+        for i in range(warmup + iterations):
+            method, path, data = build(i)
+            started = time.perf_counter()
+            if method == "get":
+                response = client.get(path, **self.headers)
+            else:
+                response = client.post(path, data, content_type="application/json", **self.headers)
+            elapsed = time.perf_counter() - started
+            if path == "/api/checkout/" and response.status_code == 201:
+                self.created_orders.append(response.data["id"])
+            if i < warmup:
+                continue
+
+            timing = parse_server_timing(response.get("Server-Timing"))
+            latencies.append(elapsed * 1000)
+            queries.append(timing["queries"])
+            db_ms.append(timing["db"])
+            ser_ms.append(timing["ser"])
+            render_ms.append(timing["render"])
+            sizes.append(len(response.content))
+            raw = decoded_size(response)
+            if raw is not None:
+                raw_sizes.append(raw)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        total = sum(latencies)
+        latencies.sort()
+        return {
+            "iterations": iterations,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "mean_ms": round(total / iterations, 3),
+            "throughput_rps": round(iterations / (total / 1000), 1) if total else 0.0,
+            "queries": round(sum(queries) / iterations, 2),
+            "db_ms": round(sum(db_ms) / iterations, 3),
+            "serializer_ms": round(sum(ser_ms) / iterations, 3),
+            "render_ms": round(sum(render_ms) / iterations, 3),
+            # bytes — simdagi (siqilgan) hajm, raw_bytes — siqilmagan
+            "bytes": round(sum(sizes) / iterations),
+            "raw_bytes": round(sum(raw_sizes) / len(raw_sizes)) if raw_sizes else None,
+            "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        }
+
+    def cleanup(self):
+        # benchmark yozuvlari — signal'lar orqali agregatlar ham qaytadi
+        User.objects.filter(number__startswith=BENCH_PREFIX).delete()  # baholari CASCADE bilan
+        if self.created_orders:
+            release_orders(self.created_orders)  # zaxiralangan ombor qaytadi
+            Order.objects.filter(id__in=self.created_orders).delete()
+
+    # 🔹 Hisobot
+    def print_row(self, name, row):
+        if not hasattr(self, "_header"):
+            self._header = True
+            self.stdout.write(
+                f"{'scenario':26} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'q':>6} {'db':>7} {'ser':>7} {'render':>7} "
+                f"{'bytes':>8} {'raw':>8}"
+            )
+        self.stdout.write(
+            f"{name:26} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+            f"{row['throughput_rps']:>8.1f} {row['queries']:>6.1f} {row['db_ms']:>7.2f} "
+            f"{row['serializer_ms']:>7.2f} {row['render_ms']:>7.2f} {row['bytes']:>8} {row['raw_bytes'] or '-':>8}"
+        )
+
+    def compare(self, previous, current, threshold):
+        regressions = []
+        self.stdout.write(f"\n{'scenario':26} {'p50 Δ%':>8} {'p95 Δ%':>8} {'q Δ':>6} {'bytes Δ':>8}")
+        for name, row in current.items():
+            old = previous.get(name)
+            if not old:
+                continue
+            p50 = (row["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0.0
+            p95 = (row["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+            q_delta = row["queries"] - old["queries"]
+            regressed = p95 > threshold or q_delta > 0
+            if regressed:
+                regressions.append(name)
+            self.stdout.write(
+                f"{name:26} {p50:>+8.1f} {p95:>+8.1f} {q_delta:>+6.1f} {row['bytes'] - old['bytes']:>+8}"
+                + ("  ⚠" if regressed else "")
+            )
+        return regressions
+
+    def meta(self, options):
+        return {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "iterations": options["iterations"],
+            "warmup": options["warmup"],
+            "response_cache": options["response_cache"] and settings.RESPONSE_CACHE_ENABLED,
+            "format": options["format"],
+            "encoding": options["encoding"],
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "rows": {
+                "products": Product.objects.count(),
+                "users": User.objects.count(),
+                "ratings": ProductRate.objects.count(),
+                "likes": LikeProduct.objects.count(),
+                "orders": Order.objects.count(),
+            },
+        }
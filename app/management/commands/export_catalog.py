@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.catalog import export_rows, write_csv, write_jsonl
+
+
+class Command(BaseCommand):
+    help = "Katalogni CSV yoki JSONL ko‘rinishida oqim bilan eksport qiladi (import_catalog bilan mos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default="-", help="Fayl yo‘li yoki stdout uchun '-'")
+        parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        writer = write_jsonl if options["format"] == "jsonl" else write_csv
+        rows = export_rows(chunk_size=options["chunk_size"])
+
+        started = time.monotonic()
+        if options["output"] == "-":
+            count = writer(rows, self.stdout)
+        else:
+            with open(options["output"], "w", newline="", encoding="utf-8") as fh:
+                count = writer(rows, fh)
+        elapsed = time.monotonic() - started
+
+        self.stderr.write(f"{count} ta product eksport qilindi ({elapsed:.2f}s, {count / elapsed if elapsed else 0:,.0f} qator/s)")
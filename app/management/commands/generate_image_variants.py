@@ -0,0 +1,51 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+
+from app.images import generate_variants
+from app.models import CategoryScroll, ProductImage
+from app.sync import touch
+
+
+def _init_worker():
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "ProductImage va CategoryScroll rasmlari uchun thumb/card/full variantlarini parallel yaratadi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--force", action="store_true", help="Mavjud variantlarni ham qayta yaratish")
+
+    def handle(self, *args, **options):
+        jobs = []
+        for model in (ProductImage, CategoryScroll):
+            for pk, name, variants in model.objects.exclude(image="").exclude(image=None).values_list("pk", "image", "variants"):
+                if options["force"] or (variants or {}).get("source") != name:
+                    jobs.append((model, pk, name))
+
+        started = time.monotonic()
+        done = failed = 0
+        # Pillow ishi CPU'ga bog‘liq — alohida jarayonlarda; DB'ga faqat shu jarayon yozadi
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker) as pool:
+            futures = {pool.submit(generate_variants, name): (model, pk, name) for model, pk, name in jobs}
+            for future in as_completed(futures):
+                model, pk, name = futures[future]
+                try:
+                    meta = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} #{pk} ({name}): {exc}")
+                    continue
+                if model.objects.filter(pk=pk, image=name).update(variants=meta):
+                    # signal'siz UPDATE — delta-sync va javob keshi uchun (images.process_instance kabi)
+                    touch(model, pk)
+                done += 1
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{done} ta rasm tayyor, {failed} ta xato ({elapsed:.2f}s, {done / elapsed if elapsed else 0:.1f} rasm/s)"
+        ))
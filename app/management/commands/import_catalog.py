@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.catalog import RowError, import_rows, read_csv, read_xlsx
+
+
+class Command(BaseCommand):
+    help = "Katalogni CSV/XLSX fayldan sku bo‘yicha upsert qiladi (oqimli, partiyalab)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "xlsx"], help="Standart: fayl kengaytmasidan")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--strict", action="store_true", help="Birinchi noto‘g‘ri qatorda to‘xtash")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("xlsx" if path.lower().endswith(".xlsx") else "csv")
+
+        def on_error(line, exc):
+            self.stderr.write(f"{line}-qator o‘tkazib yuborildi: {exc}")
+
+        started = time.monotonic()
+        try:
+            if fmt == "xlsx":
+                stats = self.run(read_xlsx(path), options, on_error)
+            else:
+                with open(path, newline="", encoding="utf-8-sig") as fh:
+                    stats = self.run(read_csv(fh), options, on_error)
+        except (RowError, RuntimeError, OSError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['saved']} ta product saqlandi, {stats['skipped']} ta qator o‘tkazildi, "
+            f"{stats['categories_created']} ta yangi kategoriya "
+            f"({elapsed:.2f}s, {stats['rows'] / elapsed if elapsed else 0:,.0f} qator/s)"
+        ))
+
+    def run(self, rows, options, on_error):
+        return import_rows(rows, batch_size=options["batch_size"], on_error=None if options["strict"] else on_error)
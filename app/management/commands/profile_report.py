@@ -0,0 +1,39 @@
+import json
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "app.profiling JSON log'idan endpoint'larni DB narxi bo‘yicha saralaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("logfile")
+        parser.add_argument("--sort", choices=["db_ms", "queries", "total_ms", "serializer_ms"], default="db_ms")
+        parser.add_argument("--limit", type=int, default=20)
+
+    def handle(self, *args, **options):
+        stats = defaultdict(lambda: {"hits": 0, "db_ms": 0.0, "queries": 0, "total_ms": 0.0, "serializer_ms": 0.0, "n_plus_one": 0})
+        with open(options["logfile"], encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # N+1 ogohlantirishlari va boshqa qatorlar
+                if not isinstance(row, dict) or "db_ms" not in row:
+                    continue
+                entry = stats[f'{row["method"]} {row["view"] or row["path"]}']
+                entry["hits"] += 1
+                entry["n_plus_one"] += bool(row["n_plus_one"])
+                for key in ("db_ms", "queries", "total_ms", "serializer_ms"):
+                    entry[key] += row[key]
+
+        key = options["sort"]
+        ranked = sorted(stats.items(), key=lambda item: item[1][key] / item[1]["hits"], reverse=True)
+        self.stdout.write(f"{'endpoint':50} {'hits':>6} {'avg q':>7} {'avg db':>9} {'avg ser':>9} {'avg tot':>9} {'N+1':>5}")
+        for name, entry in ranked[:options["limit"]]:
+            hits = entry["hits"]
+            self.stdout.write(
+                f"{name[:50]:50} {hits:>6} {entry['queries'] / hits:>7.1f} {entry['db_ms'] / hits:>8.1f}ms "
+                f"{entry['serializer_ms'] / hits:>8.1f}ms {entry['total_ms'] / hits:>8.1f}ms {entry['n_plus_one']:>5}"
+            )
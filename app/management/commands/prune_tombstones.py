@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "SYNC_TOMBSTONE_DAYS dan eski delta-sync tombstone'larini o‘chiradi (cron uchun)."
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} ta tombstone o‘chirildi"))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.rankings import rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = "Top ro‘yxatlar jadvalini (reyting, like, sotuv ballari) noldan qayta hisoblaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = rebuild_rankings(batch_size=options["batch_size"], using=options["database"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{updated} ta product yangilandi ({time.monotonic() - started:.2f}s)"
+        ))
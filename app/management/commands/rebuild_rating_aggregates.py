@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = "Product reyting agregatlarini (sum, count, average, histogram) noldan qayta hisoblaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = rebuild_rating_aggregates(batch_size=options["batch_size"], using=options["database"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{updated} ta product yangilandi ({time.monotonic() - started:.2f}s)"
+        ))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Product FTS5 qidiruv indeksini noldan qayta quradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        indexed = rebuild_index(using=options["database"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{indexed} ta product indekslandi ({time.monotonic() - started:.2f}s)"
+        ))
@@ -0,0 +1,188 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from app.cache import CATEGORIES_GENERATION, CATEGORY_SCROLLS_GENERATION, PRODUCTS_GENERATION, bump_generation
+from app.facets import FACETS_GENERATION
+from app.models import (
+    Category, CategoryScroll, LikeProduct, Order, OrderItem, Product, ProductRate, User,
+)
+from app.rankings import rebuild_rankings
+from app.ratings import rebuild_rating_aggregates
+from app.search import rebuild_index
+
+WORDS = [
+    "tovoq", "piyola", "ko‘za", "kosa", "lagan", "choynak", "xum", "guldon", "sopol", "kulol",
+    "katta", "kichik", "ko‘k", "oq", "naqshli", "rishton", "g‘ijduvon", "qo‘lda", "sirlangan", "an'anaviy",
+]
+
+
+class Command(BaseCommand):
+    help = "Benchmark uchun katta sintetik ma'lumotlar (product, rating, like, order) yaratadi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--users", type=int, default=50_000)
+        parser.add_argument("--ratings", type=int, default=1_000_000)
+        parser.add_argument("--likes", type=int, default=500_000)
+        parser.add_argument("--orders", type=int, default=200_000)
+        parser.add_argument("--categories", type=int, default=40)
+        parser.add_argument("--scrolls", type=int, default=12)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--flush", action="store_true", help="Avval barcha ma'lumotlarni o‘chirish")
+
+    def handle(self, *args, **options):
+        if options["ratings"] > options["users"] * options["products"] or options["likes"] > options["users"] * options["products"]:
+            raise CommandError("ratings/likes soni users * products dan oshmasligi kerak")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+
+        if options["flush"]:
+            self.step("flush", self.flush)
+
+        self.step("categories", self.seed_categories, options["categories"], options["scrolls"])
+        self.step("users", self.seed_users, options["users"])
+        self.step("products", self.seed_products, options["products"])
+        self.step("ratings", self.seed_pairs, ProductRate, options["ratings"])
+        self.step("likes", self.seed_pairs, LikeProduct, options["likes"])
+        self.step("orders", self.seed_orders, options["orders"])
+        self.step("aggregates", self.rebuild_aggregates)
+
+    def step(self, name, func, *args):
+        started = time.monotonic()
+        count = func(*args)
+        elapsed = time.monotonic() - started
+        rate = f", {count / elapsed:,.0f} qator/s" if count and elapsed else ""
+        self.stdout.write(f"{name:12} {count or 0:>10,} ({elapsed:.1f}s{rate})")
+
+    def bulk(self, model, rows):
+        created = 0
+        batch = []
+        with transaction.atomic():
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    model.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            if batch:
+                model.objects.bulk_create(batch)
+                created += len(batch)
+        return created
+
+    def flush(self):
+        deleted = 0
+        with transaction.atomic():
+            for model in (OrderItem, Order, LikeProduct, ProductRate, Product, User, CategoryScroll, Category):
+                deleted += model.objects.all()._raw_delete(model.objects.db)
+        return deleted
+
+    def seed_categories(self, categories, scrolls):
+        self.bulk(Category, (Category(sub_name=f"Kategoriya {i}") for i in range(categories)))
+        self.bulk(CategoryScroll, (CategoryScroll(name=f"Scroll {i}") for i in range(scrolls)))
+        self.category_ids = list(Category.objects.values_list("id", flat=True))
+        self.scroll_ids = list(CategoryScroll.objects.values_list("id", flat=True))
+        return categories + scrolls
+
+    def seed_users(self, count):
+        start = User.objects.count()
+        created = self.bulk(User, (
+            User(number=f"+99890{start + i:07d}", name=f"Mijoz {start + i}") for i in range(count)
+        ))
+        self.users = list(User.objects.values_list("id", "number"))
+        return created
+
+    def seed_products(self, count):
+        rng = self.rng
+
+        def rows():
+            for i in range(count):
+                name = " ".join(rng.sample(WORDS, 3)).capitalize()
+                yield Product(
+                    name=f"{name} #{i}",
+                    desc=" ".join(rng.choices(WORDS, k=rng.randint(8, 30))),
+                    price=Decimal(rng.randint(500, 500_000)) / 100,
+                    quantity=rng.randint(0, 500),
+                    category_id=rng.choice(self.category_ids),
+                    category_scroll_id=rng.choice(self.scroll_ids) if rng.random() < 0.6 else None,
+                )
+
+        created = self.bulk(Product, rows())
+
+        # created_at'ni bir yilga yoyamiz — keyset/ordering benchmark'lari realroq bo‘lsin
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE app_product SET created_at = datetime(created_at, '-' || (abs(random()) % 31536000) || ' seconds')"
+                )
+        self.products = list(Product.objects.values_list("id", "price"))
+        return created
+
+    def seed_pairs(self, model, count):
+        """Har bir (user, product) jufti bir martadan — unique cheklovlarga mos."""
+        rng = self.rng
+        product_ids = [pk for pk, _ in self.products]
+        per_user, extra = divmod(count, len(self.users))
+
+        def rows():
+            for index, (user_id, _) in enumerate(self.users):
+                k = per_user + (1 if index < extra else 0)
+                for product_id in rng.sample(product_ids, min(k, len(product_ids))):
+                    if model is ProductRate:
+                        yield ProductRate(user_id=user_id, product_id=product_id, rate=rng.choices(range(1, 6), weights=(1, 1, 3, 6, 9))[0])
+                    else:
+                        yield LikeProduct(user_id=user_id, product_id=product_id)
+
+        return self.bulk(model, rows())
+
+    def seed_orders(self, count):
+        rng = self.rng
+        now = timezone.now()
+        start = Order.objects.count()
+        created = 0
+
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            with transaction.atomic():
+                orders, lines = [], []
+                for i in range(size):
+                    items = [(pk, price, rng.randint(1, 10)) for pk, price in rng.sample(self.products, rng.randint(1, 5))]
+                    orders.append(Order(
+                        user_id=rng.choice(self.users)[0],
+                        tracking_code=f"SEED-{start + offset + i:08d}",
+                        final_price=sum(price * qty for _, price, qty in items),
+                    ))
+                    lines.append(items)
+                orders = Order.objects.bulk_create(orders)
+                OrderItem.objects.bulk_create(
+                    OrderItem(order_id=order.id, product_id=pk, price=price, quantity=qty)
+                    for order, items in zip(orders, lines)
+                    for pk, price, qty in items
+                )
+            created += size
+
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE app_order SET created_at = datetime(%s, '-' || (abs(random()) %% 31536000) || ' seconds') "
+                    "WHERE tracking_code LIKE 'SEED-%%'",
+                    [now.strftime("%Y-%m-%d %H:%M:%S")],
+                )
+        return created
+
+    def rebuild_aggregates(self):
+        # bulk_create signal yubormaydi — agregatlar va indeksni bir marta qayta quramiz
+        rebuild_rating_aggregates(batch_size=self.batch_size)
+        likes = LikeProduct.objects.filter(product_id=OuterRef("pk")).values("product_id").annotate(n=Count("id")).values("n")
+        Product.objects.update(likes_count=Coalesce(Subquery(likes), Value(0)))
+        rebuild_rankings(batch_size=self.batch_size)
+        bump_generation(FACETS_GENERATION, PRODUCTS_GENERATION, CATEGORIES_GENERATION, CATEGORY_SCROLLS_GENERATION)
+        return rebuild_index()
@@ -0,0 +1,92 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Sum
+from django.test import Client
+
+from app.management.commands.benchmark_api import percentile
+from app.models import Category, Order, OrderItem, Product, User
+
+STRESS_NUMBER = "+998990000000"
+
+
+class Command(BaseCommand):
+    help = (
+        "Bitta \"issiq\" productga parallel checkout'lar yuboradi va oversell yo‘qligini, "
+        "SQLite qulf xatolari (database is locked) bo‘lmasligini tekshiradi. "
+        "Fayldagi bazada ishlating (DB_PATH) — test in-memory bazasining shared-cache qulflari boshqacha."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--workers", type=int, default=32)
+        parser.add_argument("--stock", type=int, default=100)
+        parser.add_argument("--quantity", type=int, default=1, help="Har checkout'da dona")
+        parser.add_argument("--keep", action="store_true", help="Yaratilgan order/productni o‘chirmaslik")
+
+    def handle(self, *args, **options):
+        stock, quantity = options["stock"], options["quantity"]
+        user, _ = User.objects.get_or_create(number=STRESS_NUMBER, defaults={"name": "Stress"})
+        category, _ = Category.objects.get_or_create(sub_name="Stress")
+        product = Product.objects.create(name="Stress hot product", price=1, quantity=stock, category=category)
+        payload = {"user_id": user.id, "items": [{"product_id": product.id, "quantity": quantity}]}
+
+        def checkout(i):
+            client = Client()
+            started = time.perf_counter()
+            try:
+                response = client.post("/api/checkout/", payload, content_type="application/json")
+                order_id = response.json()["id"] if response.status_code == 201 else None
+                return response.status_code, time.perf_counter() - started, order_id
+            except Exception as exc:  # masalan, OperationalError: database is locked
+                return type(exc).__name__, time.perf_counter() - started, None
+            finally:
+                connections.close_all()  # thread'ning o‘z ulanishi
+
+        # har bir 409 uchun "Conflict: /api/checkout/" ogohlantirishi chiqmasin
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+                results = list(pool.map(checkout, range(options["requests"])))
+        finally:
+            request_logger.setLevel(level)
+        elapsed = time.perf_counter() - started
+
+        product.refresh_from_db()
+        sold = OrderItem.objects.filter(product=product).aggregate(total=Sum("quantity"))["total"] or 0
+        statuses = {}
+        for outcome, _, _ in results:
+            statuses[str(outcome)] = statuses.get(str(outcome), 0) + 1
+        latencies = sorted(latency * 1000 for _, latency, _ in results)
+        accepted = statuses.get("201", 0)
+
+        self.stdout.write(
+            f"{options['requests']} checkout / {options['workers']} worker: {elapsed:.2f}s, "
+            f"p50 {percentile(latencies, 50):.1f}ms, p99 {percentile(latencies, 99):.1f}ms"
+        )
+        self.stdout.write(f"statuslar: {statuses}")
+        self.stdout.write(f"ombor: {stock} → {product.quantity}, sotildi: {sold}")
+
+        problems = []
+        if sold > stock or product.quantity != stock - sold or sold != accepted * quantity:
+            problems.append(f"oversell/nomuvofiqlik: ombor {stock}, sotildi {sold}, qoldi {product.quantity}")
+        errors = {outcome: count for outcome, count in statuses.items() if outcome not in ("201", "409")}
+        if errors:
+            problems.append(f"xatolar: {errors}")
+        if accepted < min(stock // quantity, options["requests"]):
+            # ombor yetarli bo‘lsa ham rad etilgan — qulf kutishda "qulagan"
+            problems.append(f"ombor yetarli bo‘lsa ham faqat {accepted} ta checkout o‘tdi")
+
+        if not options["keep"]:
+            Order.objects.filter(id__in=[order_id for _, _, order_id in results if order_id]).delete()
+            product.delete()
+
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Oversell yo‘q, qulf xatolari yo‘q"))
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_remove_category_name_category_parent_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryScroll',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('image', models.ImageField(blank=True, null=True, upload_to='category_scrolls/')),
+            ],
+        ),
+        migrations.RenameField(
+            model_name='order',
+            old_name='number',
+            new_name='tracking_code',
+        ),
+        migrations.RemoveField(
+            model_name='category',
+            name='image',
+        ),
+        migrations.RemoveField(
+            model_name='category',
+            name='parent',
+        ),
+        migrations.RemoveField(
+            model_name='category',
+            name='parent_name',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='discount',
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='sub_name',
+            field=models.CharField(default='No name', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='final_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='quantity',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='productrate',
+            name='user_number',
+            field=models.CharField(max_length=20),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='category_scroll',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='products', to='app.categoryscroll'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:46
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Product = apps.get_model('app', 'Product')
+    ProductRate = apps.get_model('app', 'ProductRate')
+    db = schema_editor.connection.alias
+
+    rows = (
+        ProductRate.objects.using(db)
+        .values('product_id')
+        .annotate(total=Sum('rate'), cnt=Count('id'), **{f'r{i}': Count('id', filter=Q(rate=i)) for i in range(1, 6)})
+        .order_by()
+    )
+    for row in rows:
+        Product.objects.using(db).filter(pk=row['product_id']).update(
+            rating_sum=row['total'],
+            rating_count=row['cnt'],
+            average_rating=row['total'] / row['cnt'],
+            **{f'rating_{i}': row[f'r{i}'] for i in range(1, 6)},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_catchup_models'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='average_rating',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
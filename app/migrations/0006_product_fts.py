@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# app.search'dagi indeks ta'rifining shu paytdagi nusxasi — keyingi o‘zgarishlar tarixni o‘zgartirmasin
+FTS_TABLE = 'app_product_fts'
+CREATE_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "name, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+FILL_SQL = f'INSERT INTO {FTS_TABLE}(rowid, name, description) SELECT id, name, "desc" FROM app_product'
+DROP_SQL = f'DROP TABLE IF EXISTS {FTS_TABLE}'
+
+
+def create_product_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SQL)
+    schema_editor.execute(FILL_SQL)
+
+
+def drop_product_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_product_fts, drop_product_fts),
+    ]
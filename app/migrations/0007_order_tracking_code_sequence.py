@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:50
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_tracking_codes(apps, schema_editor):
+    # count()+1 sxemasi parallel so‘rovlarda takroriy kod bergan bo‘lishi mumkin
+    Order = apps.get_model('app', 'Order')
+    db = schema_editor.connection.alias
+    duplicates = (
+        Order.objects.using(db).values('tracking_code')
+        .annotate(n=Count('id')).filter(n__gt=1).values_list('tracking_code', flat=True)
+    )
+    for code in list(duplicates):
+        for order in Order.objects.using(db).filter(tracking_code=code).order_by('id')[1:]:
+            order.tracking_code = f"{code}-{order.id}"[:20]
+            order.save(update_fields=['tracking_code'])
+
+
+def seed_tracking_sequence(apps, schema_editor):
+    Sequence = apps.get_model('app', 'Sequence')
+    Order = apps.get_model('app', 'Order')
+    db = schema_editor.connection.alias
+    Sequence.objects.using(db).get_or_create(
+        name='order_tracking_code', defaults={'value': Order.objects.using(db).count()}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_product_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_tracking_codes, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='tracking_code',
+            field=models.CharField(max_length=20, unique=True),
+        ),
+        migrations.RunPython(seed_tracking_sequence, migrations.RunPython.noop),
+    ]
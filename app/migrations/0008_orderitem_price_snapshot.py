@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:52
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_prices_and_totals(apps, schema_editor):
+    Product = apps.get_model('app', 'Product')
+    Order = apps.get_model('app', 'Order')
+    OrderItem = apps.get_model('app', 'OrderItem')
+    db = schema_editor.connection.alias
+
+    # eski itemlar uchun hozirgi narx — boshqa manba yo‘q
+    OrderItem.objects.using(db).update(
+        price=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('price')[:1])
+    )
+    totals = (
+        OrderItem.objects.filter(order_id=OuterRef('pk'))
+        .values('order_id').annotate(total=Sum(F('price') * F('quantity'))).values('total')
+    )
+    Order.objects.using(db).update(final_price=Coalesce(
+        Subquery(totals, output_field=DecimalField(max_digits=10, decimal_places=2)),
+        Value(0),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_order_tracking_code_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_prices_and_totals, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=10),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:54
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_likes_count(apps, schema_editor):
+    Product = apps.get_model('app', 'Product')
+    LikeProduct = apps.get_model('app', 'LikeProduct')
+    db = schema_editor.connection.alias
+    counts = (
+        LikeProduct.objects.filter(product_id=OuterRef('pk'))
+        .values('product_id').annotate(n=Count('id')).values('n')
+    )
+    Product.objects.using(db).update(likes_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_likes_count, migrations.RunPython.noop),
+    ]
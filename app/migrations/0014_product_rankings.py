@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+
+
+def backfill_rankings(apps, schema_editor):
+    Product = apps.get_model('app', 'Product')
+    OrderItem = apps.get_model('app', 'OrderItem')
+    ProductRanking = apps.get_model('app', 'ProductRanking')
+    db = schema_editor.connection.alias
+    weight = float(getattr(settings, 'RANKINGS_BAYES_WEIGHT', 5))
+    prior = float(getattr(settings, 'RANKINGS_BAYES_PRIOR', 3.0))
+    bayesian = getattr(settings, 'RANKINGS_BAYESIAN', True)
+    sold = (
+        OrderItem.objects.filter(product_id=OuterRef('pk'))
+        .values('product_id').annotate(total=Sum('quantity')).values('total')
+    )
+    rows = Product.objects.using(db).annotate(sold=Subquery(sold, output_field=IntegerField())).values_list(
+        'id', 'category_id', 'category_scroll_id', 'rating_sum', 'rating_count', 'likes_count', 'sold',
+    )
+    batch = []
+    for pk, category_id, scroll_id, rating_sum, rating_count, likes, sold_count in rows.iterator(chunk_size=1000):
+        if bayesian:
+            score = (weight * prior + rating_sum) / (weight + rating_count)
+        else:
+            score = rating_sum / rating_count if rating_count else 0.0
+        batch.append(ProductRanking(
+            product_id=pk, category_id=category_id, category_scroll_id=scroll_id,
+            rating_sum=rating_sum, rating_count=rating_count, rating_score=score,
+            likes=likes, sales=sold_count or 0,
+        ))
+        if len(batch) >= 1000:
+            ProductRanking.objects.using(db).bulk_create(batch)
+            batch = []
+    ProductRanking.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRanking',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='app.product')),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_score', models.FloatField(default=0)),
+                ('likes', models.PositiveIntegerField(default=0)),
+                ('sales', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app.category')),
+                ('category_scroll', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app.categoryscroll')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-rating_score', 'product'], name='ranking_rating_idx'), models.Index(fields=['-likes', 'product'], name='ranking_likes_idx'), models.Index(fields=['-sales', 'product'], name='ranking_sales_idx'), models.Index(fields=['category', '-rating_score', 'product'], name='ranking_cat_rating_idx'), models.Index(fields=['category', '-likes', 'product'], name='ranking_cat_likes_idx'), models.Index(fields=['category', '-sales', 'product'], name='ranking_cat_sales_idx'), models.Index(fields=['category_scroll', '-rating_score', 'product'], name='ranking_scroll_rating_idx'), models.Index(fields=['category_scroll', '-likes', 'product'], name='ranking_scroll_likes_idx'), models.Index(fields=['category_scroll', '-sales', 'product'], name='ranking_scroll_sales_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,201 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:22
+
+import logging
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+# app.users.normalize_number'ning shu paytdagi nusxasi — keyingi o‘zgarishlar tarixni o‘zgartirmasin
+COUNTRY_CODE = '998'
+LOCAL_LENGTH = 9
+SEPARATORS_RE = re.compile(r'[\s\-().]')
+CHUNK_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_number(value):
+    raw = SEPARATORS_RE.sub('', str(value or ''))
+    if raw.startswith('+'):
+        digits = raw[1:]
+    elif raw.startswith('00'):
+        digits = raw[2:]
+    else:
+        digits = raw
+        if len(digits) == LOCAL_LENGTH + 1 and digits.startswith('8'):
+            digits = digits[1:]
+        if len(digits) == LOCAL_LENGTH:
+            digits = COUNTRY_CODE + digits
+    if not digits.isdigit() or not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        raise ValueError(value)
+    return '+' + digits
+
+
+def chunks(values):
+    """SQLite o‘zgaruvchilar chegarasidan oshmaslik uchun ``IN (...)`` ro‘yxatlari bo‘laklab."""
+    values = list(values)
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def normalize_user_numbers(apps, schema_editor):
+    """User.number → E.164. Bir raqamga tushgan foydalanuvchilar eng eskisiga birlashtiriladi."""
+    User = apps.get_model('app', 'User')
+    Order = apps.get_model('app', 'Order')
+    LikeProduct = apps.get_model('app', 'LikeProduct')
+    Product = apps.get_model('app', 'Product')
+    ProductRanking = apps.get_model('app', 'ProductRanking')
+    db = schema_editor.connection.alias
+
+    groups = {}
+    legacy = []
+    for pk, number in User.objects.using(db).order_by('id').values_list('id', 'number').iterator():
+        try:
+            normalized = normalize_number(number)
+        except ValueError:
+            normalized = number  # tuzatib bo‘lmaydi — o‘z holicha qoladi (User.save uni tegmasa saqlaydi)
+            legacy.append((pk, number))
+        groups.setdefault(normalized, []).append((pk, number))
+    if legacy:
+        logger.warning(
+            '%d ta foydalanuvchi raqamini E.164 ga keltirib bo‘lmadi, o‘z holicha qoldi: %s%s',
+            len(legacy), ', '.join(f'#{pk} {number!r}' for pk, number in legacy[:20]), ' ...' if len(legacy) > 20 else '',
+        )
+
+    touched_products = set()
+    for normalized, members in groups.items():
+        keeper, keeper_number = members[0]
+        duplicates = [pk for pk, _ in members[1:]]
+        if duplicates:
+            Order.objects.using(db).filter(user_id__in=duplicates).update(user_id=keeper)
+            liked = LikeProduct.objects.using(db).filter(user_id=keeper).values('product_id')
+            dropped = LikeProduct.objects.using(db).filter(user_id__in=duplicates, product_id__in=liked)
+            touched_products.update(dropped.values_list('product_id', flat=True))
+            dropped.delete()
+            LikeProduct.objects.using(db).filter(user_id__in=duplicates).update(user_id=keeper)
+            User.objects.using(db).filter(pk__in=duplicates).delete()
+        if keeper_number != normalized:
+            User.objects.using(db).filter(pk=keeper).update(number=normalized)
+
+    likes = LikeProduct.objects.filter(product_id=OuterRef('pk')).values('product_id').annotate(n=Count('id')).values('n')
+    for chunk in chunks(touched_products):
+        Product.objects.using(db).filter(pk__in=chunk).update(likes_count=Coalesce(Subquery(likes), Value(0)))
+        for pk, likes_count in Product.objects.using(db).filter(pk__in=chunk).values_list('id', 'likes_count'):
+            ProductRanking.objects.using(db).filter(product_id=pk).update(likes=likes_count)
+
+
+def link_ratings_to_users(apps, schema_editor):
+    """ProductRate.user_number → user FK; foydalanuvchisi yo‘q raqamlar uchun User yaratiladi.
+
+    E.164 ga keltirib bo‘lmaydigan raqamli baholar o‘chirilmaydi — xuddi shu
+    xom raqamli (normalize_user_numbers o‘z holicha qoldirgan) foydalanuvchiga
+    bog‘lanadi, u bo‘lmasa shunday foydalanuvchi yaratiladi.
+    """
+    User = apps.get_model('app', 'User')
+    ProductRate = apps.get_model('app', 'ProductRate')
+    db = schema_editor.connection.alias
+
+    ids = dict(User.objects.using(db).values_list('number', 'id'))
+    by_user = {}
+    legacy = {}
+    for pk, number in ProductRate.objects.using(db).values_list('id', 'user_number').iterator():
+        try:
+            key = normalize_number(number)
+        except ValueError:
+            key = number or ''
+            legacy.setdefault(key, []).append(pk)
+        if key not in ids:
+            ids[key] = User.objects.using(db).create(number=key, name='').pk
+        by_user.setdefault(ids[key], []).append(pk)
+    if legacy:
+        logger.warning(
+            '%d ta bahoning raqamini E.164 ga keltirib bo‘lmadi, xom raqamli foydalanuvchiga bog‘landi: %s%s',
+            sum(map(len, legacy.values())),
+            ', '.join(f'{number!r} → #{ids[number]}' for number in list(legacy)[:20]), ' ...' if len(legacy) > 20 else '',
+        )
+
+    for user_id, rate_ids in by_user.items():
+        for chunk in chunks(rate_ids):
+            ProductRate.objects.using(db).filter(pk__in=chunk).update(user_id=user_id)
+
+    # bir raqamning turli yozilishlari bir productga bir necha baho qo‘ygan bo‘lsa — eng yangisi qoladi
+    stale, affected, seen = [], set(), set()
+    rows = ProductRate.objects.using(db).order_by('user_id', 'product_id', '-id').values_list('id', 'user_id', 'product_id')
+    for pk, user_id, product_id in rows.iterator():
+        if (user_id, product_id) in seen:
+            stale.append(pk)
+            affected.add(product_id)
+        else:
+            seen.add((user_id, product_id))
+    for chunk in chunks(stale):
+        ProductRate.objects.using(db).filter(pk__in=chunk).delete()
+    for chunk in chunks(affected):
+        refresh_rating_aggregates(apps, db, chunk)
+
+
+def refresh_rating_aggregates(apps, db, product_ids):
+    Product = apps.get_model('app', 'Product')
+    ProductRate = apps.get_model('app', 'ProductRate')
+    ProductRanking = apps.get_model('app', 'ProductRanking')
+    weight = float(getattr(settings, 'RANKINGS_BAYES_WEIGHT', 5))
+    prior = float(getattr(settings, 'RANKINGS_BAYES_PRIOR', 3.0))
+    bayesian = getattr(settings, 'RANKINGS_BAYESIAN', True)
+
+    rows = {
+        row['product_id']: row
+        for row in ProductRate.objects.using(db).filter(product_id__in=product_ids).values('product_id').annotate(
+            total=Sum('rate'), cnt=Count('id'), **{f'r{i}': Count('id', filter=Q(rate=i)) for i in range(1, 6)},
+        ).order_by()
+    }
+    for pk in product_ids:
+        row = rows.get(pk, {})
+        total, cnt = row.get('total') or 0, row.get('cnt') or 0
+        Product.objects.using(db).filter(pk=pk).update(
+            rating_sum=total, rating_count=cnt, average_rating=total / cnt if cnt else None,
+            **{f'rating_{i}': row.get(f'r{i}', 0) for i in range(1, 6)},
+        )
+        if bayesian:
+            score = (weight * prior + total) / (weight + cnt)
+        else:
+            score = total / cnt if cnt else 0.0
+        ProductRanking.objects.using(db).filter(product_id=pk).update(
+            rating_sum=total, rating_count=cnt, rating_score=score,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_order_stock_reservation'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_user_numbers, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='productrate',
+            name='user',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='app.user'),
+        ),
+        migrations.RunPython(link_ratings_to_users, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='productrate',
+            unique_together=set(),
+        ),
+        migrations.RemoveField(
+            model_name='productrate',
+            name='user_number',
+        ),
+        migrations.AlterField(
+            model_name='productrate',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='app.user'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='productrate',
+            unique_together={('user', 'product')},
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_normalize_numbers_productrate_user'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='productranking',
+            name='ranking_rating_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='productranking',
+            name='ranking_cat_rating_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='productranking',
+            name='ranking_scroll_rating_idx',
+        ),
+        migrations.AddIndex(
+            model_name='productranking',
+            index=models.Index(condition=models.Q(('rating_count__gt', 0)), fields=['-rating_score', 'product'], name='ranking_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productranking',
+            index=models.Index(condition=models.Q(('rating_count__gt', 0)), fields=['category', '-rating_score', 'product'], name='ranking_cat_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productranking',
+            index=models.Index(condition=models.Q(('rating_count__gt', 0)), fields=['category_scroll', '-rating_score', 'product'], name='ranking_scroll_rating_idx'),
+        ),
+    ]
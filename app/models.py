@@ -1,11 +1,38 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 
 
 class User(models.Model):
-    number = models.CharField(max_length=20, unique=True)  # Telefon raqami
+    number = models.CharField(max_length=20, unique=True)  # Telefon raqami, E.164 (app.users)
     name = models.CharField(max_length=100)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # raqam o‘zgarsa eski raqam ham resolve keshidan tashlanadi
+        instance._loaded_number = instance.__dict__.get("number")
+        return instance
+
+    def _number_changed(self):
+        # migratsiyada E.164 ga keltirib bo‘lmagan eski raqam tegilmasa — saqlash buzilmaydi
+        return self._state.adding or self.number != getattr(self, "_loaded_number", None)
+
+    def clean(self):
+        from .users import normalize_number  # app.users → models
+
+        if self._number_changed():
+            try:
+                self.number = normalize_number(self.number)
+            except ValueError:
+                raise ValidationError({"number": "Telefon raqami noto‘g‘ri."})
+
+    def save(self, *args, **kwargs):
+        from .users import normalize_number
+
+        if self._number_changed():
+            self.number = normalize_number(self.number)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name or 'NoName'} ({self.number})"
 
@@ -17,6 +44,7 @@ class Category(models.Model):
         blank=False,
         default="No name"  # null=False bo‘lgani uchun default qo‘ydik
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # delta-sync (app.sync)
 
     def __str__(self):
         return self.sub_name or "Unnamed Category"
@@ -25,12 +53,15 @@ class Category(models.Model):
 class CategoryScroll(models.Model):
     name = models.CharField(max_length=255)  # unique=False qildim
     image = models.ImageField(upload_to="category_scrolls/", blank=True, null=True)
+    variants = models.JSONField(default=dict, blank=True, editable=False)  # thumb/card/full (app.images)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # delta-sync (app.sync)
 
     def __str__(self):
         return self.name or "Unnamed Scroll"
 
 
 class Product(models.Model):
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)  # yetkazib beruvchi artikuli (import kaliti)
     name = models.CharField(max_length=255)
     desc = models.TextField(blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -55,29 +86,120 @@ class Product(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # reyting agregatlari — ProductRate o‘zgarganda signal orqali yangilanadi
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(null=True, blank=True)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    likes_count = models.PositiveIntegerField(default=0)  # LikeProduct signal orqali yangilanadi
+
+    class Meta:
+        indexes = [
+            # ro‘yxat: ORDER BY created_at/price (keyset — id bilan), ?quantity= filter
+            models.Index(fields=["created_at", "id"], name="product_created_idx"),
+            models.Index(fields=["price", "id"], name="product_price_idx"),
+            models.Index(fields=["quantity"], name="product_quantity_idx"),
+            # ?category= + standart tartib (-created_at) bitta indeks bo‘ylab
+            models.Index(fields=["category", "created_at", "id"], name="product_cat_created_idx"),
+            # delta-sync: updated_at > watermark ORDER BY updated_at, id
+            models.Index(fields=["updated_at", "id"], name="product_updated_idx"),
+        ]
+
     def __str__(self):
         return self.name or "Unnamed Product"
 
+    @property
+    def rating_histogram(self):
+        return {str(i): getattr(self, f"rating_{i}") for i in range(1, 6)}
+
+
+class ProductRanking(models.Model):
+    """Bosh sahifa "top" ro‘yxatlari uchun materiallashtirilgan ballar (app.rankings).
+
+    Reyting, like va sotuvlar yozilganda signal'lar orqali oshiriladi; har bir
+    ball uchun umumiy, Category va CategoryScroll kesimidagi indeks bor —
+    top-N jadvalni aylanmasdan, indeks boshidan o‘qiladi.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="ranking")
+    # Product'dan nusxa — bo‘lim (partition) indekslari uchun
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="+", db_index=False)
+    category_scroll = models.ForeignKey(
+        CategoryScroll, on_delete=models.CASCADE, related_name="+", null=True, blank=True, db_index=False
+    )
+
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_score = models.FloatField(default=0)  # RANKINGS_BAYESIAN bo‘lsa bayes o‘rtacha
+    likes = models.PositiveIntegerField(default=0)
+    sales = models.PositiveIntegerField(default=0)  # sotilgan dona
+
+    class Meta:
+        # bahosiz productlar bali prior'ga teng — top-N indeks boshidan ularni aylanmasligi uchun
+        # reyting indekslari faqat baholanganlarni saqlaydi (WHERE rating_count > 0)
+        indexes = [
+            # top-N: WHERE [bo‘lim] ORDER BY ball DESC, product_id LIMIT N
+            models.Index(fields=["-rating_score", "product"], name="ranking_rating_idx", condition=models.Q(rating_count__gt=0)),
+            models.Index(fields=["-likes", "product"], name="ranking_likes_idx"),
+            models.Index(fields=["-sales", "product"], name="ranking_sales_idx"),
+            models.Index(fields=["category", "-rating_score", "product"], name="ranking_cat_rating_idx", condition=models.Q(rating_count__gt=0)),
+            models.Index(fields=["category", "-likes", "product"], name="ranking_cat_likes_idx"),
+            models.Index(fields=["category", "-sales", "product"], name="ranking_cat_sales_idx"),
+            models.Index(fields=["category_scroll", "-rating_score", "product"], name="ranking_scroll_rating_idx", condition=models.Q(rating_count__gt=0)),
+            models.Index(fields=["category_scroll", "-likes", "product"], name="ranking_scroll_likes_idx"),
+            models.Index(fields=["category_scroll", "-sales", "product"], name="ranking_scroll_sales_idx"),
+        ]
+
+    def __str__(self):
+        return f"Ranking for product #{self.product_id}"
+
 
 class ProductRate(models.Model):
     RATE_CHOICES = [(i, str(i)) for i in range(1, 6)]  # ⭐ 1–5 rating
 
-    user_number = models.CharField(max_length=20)  # telefon raqam sifatida saqlaymiz
+    # alohida indeks shart emas — unique (user, product) user_id bilan boshlanadi
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="ratings", db_index=False)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="ratings")
     rate = models.IntegerField(choices=RATE_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ("user_number", "product")
+        unique_together = ("user", "product")
+        indexes = [
+            # product bahalari — eng yangilari birinchi
+            models.Index(fields=["product", "created_at"], name="rate_product_created_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # eski qiymatlar — agregatni to‘g‘ri yangilash uchun kerak
+        instance._loaded_rating = (instance.__dict__.get("product_id"), instance.__dict__.get("rate"))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # post_save signal agregat bilan bitta tranzaksiyada ishlaydi
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+        self._loaded_rating = (self.product_id, self.rate)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
-        return f"User {self.user_number} rated {self.product.name if self.product else 'Unknown'} → {self.rate}"
+        return f"User {self.user.number if self.user_id else 'Unknown'} rated {self.product.name if self.product else 'Unknown'} → {self.rate}"
 
 
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="products/")
     is_main = models.BooleanField(default=False)  # cover image
+    variants = models.JSONField(default=dict, blank=True, editable=False)  # thumb/card/full (app.images)
 
     def clean(self):
         """Har bir product uchun faqat bitta is_main=True bo‘lsin"""
@@ -91,10 +213,27 @@ class ProductImage(models.Model):
 
 
 class Order(models.Model):
+    # checkout zaxirasi (app.stock): PENDING muddati o‘tsa sweeper EXPIRED qiladi va omborni qaytaradi
+    PENDING = "pending"
+    CONFIRMED = "confirmed"
+    EXPIRED = "expired"
+    STATUS_CHOICES = [(PENDING, "Kutilmoqda"), (CONFIRMED, "Tasdiqlangan"), (EXPIRED, "Muddati o‘tgan")]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="orders")
-    tracking_code = models.CharField(max_length=20)  # buyurtma tracking code
+    tracking_code = models.CharField(max_length=20, unique=True)  # buyurtma tracking code
     created_at = models.DateTimeField(auto_now_add=True)
     final_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=CONFIRMED)
+    reserved_until = models.DateTimeField(null=True, blank=True)  # faqat PENDING uchun
+
+    class Meta:
+        indexes = [
+            # /api/orders/ keyset (created_at, id) va foydalanuvchi tarixi
+            models.Index(fields=["created_at", "id"], name="order_created_idx"),
+            models.Index(fields=["user", "created_at", "id"], name="order_user_created_idx"),
+            # sweeper: status = pending AND reserved_until < now
+            models.Index(fields=["status", "reserved_until"], name="order_reserved_idx"),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} - {self.user.name if self.user else 'NoUser'}"
@@ -104,15 +243,58 @@ class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    price = models.DecimalField(max_digits=10, decimal_places=2)  # sotib olingan paytdagi narx
 
     @property
     def subtotal(self):
-        return self.product.price * self.quantity
+        return self.price * self.quantity
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # item boshqa orderga ko‘chirilsa, eski order summasini ham yangilash uchun
+        instance._loaded_order_id = instance.__dict__.get("order_id")
+        # product/miqdor o‘zgarsa sotuv reytingidan eski qiymatni ayirish uchun (app.rankings)
+        instance._loaded_sale = (instance.__dict__.get("product_id"), instance.__dict__.get("quantity"))
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.price is None:
+            self.price = self.product.price
+        # post_save signal Order.final_price bilan bitta tranzaksiyada ishlaydi
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"{self.quantity} x {self.product.name if self.product else 'Unknown'}"
 
 
+class Sequence(models.Model):
+    """Nomlangan hisoblagich (masalan, order tracking code uchun)."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class Tombstone(models.Model):
+    """O‘chirilgan katalog yozuvi — delta-sync mijozlari uni o‘zidan ham o‘chiradi."""
+    model = models.CharField(max_length=30)  # "product", "category", "category_scroll"
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["deleted_at", "id"], name="tombstone_deleted_idx")]
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id} deleted at {self.deleted_at}"
+
+
 class LikeProduct(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="liked_products")
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
@@ -0,0 +1,75 @@
+from django.db.models import Count, DecimalField, F, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Order, OrderItem
+
+MONEY = DecimalField(max_digits=10, decimal_places=2)
+
+
+def _items_subquery(aggregate, output_field, order_ref):
+    rows = (
+        OrderItem.objects.filter(order_id=OuterRef(order_ref))
+        .values("order_id")
+        .annotate(value=aggregate)
+        .values("value")
+    )
+    return Coalesce(Subquery(rows, output_field=output_field), Value(0), output_field=output_field)
+
+
+def order_total_subquery(order_ref="pk"):
+    """Order itemlari summasi (price snapshot * quantity) — bitta SQL subquery."""
+    return _items_subquery(Sum(F("price") * F("quantity")), MONEY, order_ref)
+
+
+def order_item_count_subquery(order_ref="pk"):
+    return _items_subquery(Count("id"), IntegerField(), order_ref)
+
+
+def order_quantity_subquery(order_ref="pk"):
+    return _items_subquery(Sum("quantity"), IntegerField(), order_ref)
+
+
+def refresh_final_price(order_id, using=None):
+    """Order.final_price ni itemlardan bitta UPDATE bilan qayta hisoblaydi."""
+    if order_id:
+        Order.objects.using(using).filter(pk=order_id).update(final_price=order_total_subquery())
+
+
+# 🔹 Foydalanuvchi buyurtmalar tarixi
+def user_orders(user_id, using=None):
+    """Tarix va summary uchun bitta manba: muddati o‘tgan (bekor bo‘lgan) zaxiralarsiz.
+
+    Ikkalasi bir xil filtrdan o‘tadi — ro‘yxatdagi summalar yig‘indisi
+    ``summary.total_spent`` ga teng bo‘ladi.
+    """
+    return Order.objects.using(using).filter(user_id=user_id).exclude(status=Order.EXPIRED)
+
+
+def order_history(user_id, using=None):
+    """Foydalanuvchi order'lari jami summa va item sonlari bilan.
+
+    Tashqi so‘rov ``order_user_created_idx`` bo‘yicha yuradi, summalar har
+    bir order uchun ``order_id`` indeksi orqali correlated subquery —
+    GROUP BY yo‘q, shuning uchun keyset ``LIMIT`` sahifadan nariga o‘tmaydi.
+    """
+    return (
+        user_orders(user_id, using)
+        .only("id", "tracking_code", "status", "reserved_until", "created_at")
+        .annotate(
+            total=order_total_subquery(),
+            item_count=order_item_count_subquery(),
+            quantity=order_quantity_subquery(),
+        )
+    )
+
+
+def order_summary(user_id, using=None):
+    """Butun tarix bo‘yicha: order'lar soni, sarflangan summa, oxirgi order — bitta aggregate query."""
+    return (
+        user_orders(user_id, using)
+        .aggregate(
+            orders=Count("id", distinct=True),
+            total_spent=Coalesce(Sum(F("items__price") * F("items__quantity")), Value(0), output_field=MONEY),
+            last_order_at=Max("created_at"),
+        )
+    )
@@ -0,0 +1,166 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _max_page_size():
+    return getattr(settings, "API_MAX_PAGE_SIZE", 100)
+
+
+class OffsetPagination(LimitOffsetPagination):
+    """Admin uchun OFFSET fallback (``?limit=&offset=``)."""
+
+    @property
+    def max_limit(self):
+        return _max_page_size()
+
+
+class KeysetPagination(BasePagination):
+    """``(field, id)`` bo‘yicha keyset (cursor) pagination.
+
+    Sahifa WHERE (field, id) > (oxirgi qiymat) bilan olinadi, shuning uchun
+    N-sahifa ham 1-sahifa kabi arzon. View ``keyset_ordering_fields`` va
+    ``keyset_default_ordering`` bilan sozlanadi; boshqa ``?ordering=`` yoki
+    ``?offset=`` kelsa OFFSET pagination ishlatiladi.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_param = api_settings.ORDERING_PARAM
+    invalid_cursor_message = "Noto‘g‘ri cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.prepare(queryset, request, view)
+        if self.fallback is not None:
+            return self.fallback.paginate_queryset(queryset, request, view)
+        return self.finish(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async view'lar uchun — faqat keyset rejimi (OFFSET fallback yo‘q)."""
+        queryset = self.prepare(queryset, request, view, allow_fallback=False)
+        return self.finish([obj async for obj in queryset])
+
+    def prepare(self, queryset, request, view, allow_fallback=True):
+        """Sahifa uchun queryset'ni quradi (DB'ga murojaat qilmaydi)."""
+        self.request = request
+        self.fallback = None
+
+        ordering = self.get_ordering(request, view)
+        if allow_fallback and (ordering is None or OffsetPagination.offset_query_param in request.query_params):
+            self.fallback = OffsetPagination()
+            return queryset
+        if ordering is None:
+            ordering = self.get_ordering(None, view)
+
+        self.page_size = self.get_page_size(request)
+        self.field = ordering.lstrip("-")
+        self.descending = ordering.startswith("-")
+
+        self.cursor = self.decode_cursor(request, queryset.model)
+        self.reverse = bool(self.cursor and self.cursor.get("r"))
+        # oldingi sahifa uchun yo‘nalishni teskari qilib olamiz
+        descending = self.descending != self.reverse
+
+        queryset = queryset.order_by(*self.order_by(descending))
+        if self.cursor:
+            queryset = queryset.filter(self.after(self.cursor, descending))
+        return queryset[:self.page_size + 1]
+
+    def finish(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_ordering(self, request, view):
+        fields = getattr(view, "keyset_ordering_fields", ("id",))
+        ordering = request.query_params.get(self.ordering_param) if request is not None else None
+        if not ordering:
+            return getattr(view, "keyset_default_ordering", "-" + fields[0])
+        if ordering.lstrip("-") in fields:
+            return ordering
+        return None
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, api_settings.PAGE_SIZE or 20))
+        except ValueError:
+            size = api_settings.PAGE_SIZE or 20
+        return max(1, min(size, _max_page_size()))
+
+    def order_by(self, descending):
+        prefix = "-" if descending else ""
+        if self.field == "id":
+            return [prefix + "id"]
+        return [prefix + self.field, prefix + "id"]
+
+    def after(self, cursor, descending):
+        op = "lt" if descending else "gt"
+        if self.field == "id":
+            return Q(**{f"id__{op}": cursor["id"]})
+        return Q(**{f"{self.field}__{op}": cursor["v"]}) | Q(**{self.field: cursor["v"], f"id__{op}": cursor["id"]})
+
+    # cursor — base64 ichidagi JSON, mijoz uchun shaffof emas
+    def encode_cursor(self, obj, reverse):
+        value = getattr(obj, self.field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        payload = json.dumps({"v": value, "id": obj.pk, "r": int(reverse)}, separators=(",", ":"))
+        token = urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            cursor["id"] = int(cursor["id"])
+            if self.field != "id":
+                # qiymat WHERE'ga tushadi — ordering maydoni turiga keltiramiz
+                cursor["v"] = model._meta.get_field(self.field).to_python(cursor["v"])
+                if cursor["v"] is None:
+                    raise ValueError
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
@@ -0,0 +1,168 @@
+import json
+import logging
+import random
+import re
+import sys
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from rest_framework.fields import Field
+
+logger = logging.getLogger("app.profiling")
+
+# joriy so‘rov profili (profiler yoqilgan bo‘lsa)
+_profile = ContextVar("query_profile", default=None)
+
+_IN_LIST_RE = re.compile(r"\((?:%s, )+%s\)")
+_WS_RE = re.compile(r"\s+")
+
+
+def query_shape(sql):
+    """IN (%s, %s, ...) ro‘yxatlarini bitta shaklga keltiradi."""
+    return _WS_RE.sub(" ", _IN_LIST_RE.sub("(%s...)", sql)).strip()
+
+
+def query_origin():
+    """Query'ni chaqirgan serializer maydoni: ``ProductSerializer.average_rating``."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        owner = frame.f_locals.get("self")
+        if isinstance(owner, Field) and owner.field_name and frame.f_code.co_name in ("to_representation", "get_attribute"):
+            parent = owner.parent
+            if parent is not None and not owner.field_name.isdigit():
+                return f"{type(parent).__name__}.{owner.field_name}"
+        frame = frame.f_back
+    return None
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            shape = self.shapes.setdefault(query_shape(sql), {"count": 0, "origin": None})
+            shape["count"] += 1
+            if shape["count"] == 2:
+                # takrorlangan shakl — manbasini faqat shunda qidiramiz (stack qimmat)
+                shape["origin"] = query_origin()
+
+    def n_plus_one(self, threshold):
+        return [
+            {"sql": shape[:200], "count": info["count"], "origin": info["origin"]}
+            for shape, info in self.shapes.items()
+            if info["count"] >= threshold
+        ]
+
+
+def serializer_started():
+    """Serializer ``to_representation`` vaqtini o‘lchash uchun (profiler o‘chiq bo‘lsa None)."""
+    profile = _profile.get()
+    if profile is None:
+        return None
+    return profile, time.perf_counter()
+
+
+def serializer_finished(token):
+    if token is not None:
+        profile, started = token
+        profile.serializer_time += time.perf_counter() - started
+
+
+def render_started():
+    """Renderer (JSON/MessagePack) vaqti uchun — ``serializer_started`` ning juftligi."""
+    profile = _profile.get()
+    if profile is None:
+        return None
+    return profile, time.perf_counter()
+
+
+def render_finished(token):
+    if token is not None:
+        profile, started = token
+        profile.render_time += time.perf_counter() - started
+
+
+class QueryProfilerMiddleware:
+    """So‘rov bo‘yicha SQL soni, DB, serializer va render vaqtini ``Server-Timing`` ga yozadi.
+
+    ``QUERY_PROFILER_ENABLED`` bilan yoqiladi. Bir so‘rovda bir xil shakldagi
+    query ``QUERY_PROFILER_N_PLUS_ONE`` martadan ko‘p bajarilsa ehtimoliy N+1
+    sifatida belgilanadi. ``QUERY_PROFILER_SAMPLE_RATE`` ulushidagi so‘rovlar
+    ``app.profiling`` logger'iga JSON qatori bo‘lib yoziladi
+    (``manage.py profile_report`` bilan saralanadi).
+    Async rejimda ORM boshqa thread'da ishlaydi, shuning uchun profil faqat sync so‘rovlar uchun.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.get_response(request)
+        if not getattr(settings, "QUERY_PROFILER_ENABLED", False):
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+
+        self.report(request, response, profile)
+        return response
+
+    def report(self, request, response, profile):
+        total = time.perf_counter() - profile.started
+        suspects = profile.n_plus_one(getattr(settings, "QUERY_PROFILER_N_PLUS_ONE", 3))
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={profile.db_time * 1000:.1f};desc="{profile.queries} queries"',
+            f"ser;dur={profile.serializer_time * 1000:.1f}",
+            f"render;dur={profile.render_time * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ])
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name or match._func_path if match else None
+
+        if suspects:
+            response["X-N-Plus-One"] = str(len(suspects))
+            logger.warning("N+1 %s %s: %s", request.method, view, json.dumps(suspects, ensure_ascii=False))
+
+        if random.random() < getattr(settings, "QUERY_PROFILER_SAMPLE_RATE", 0.1):
+            logger.info(json.dumps({
+                "method": request.method,
+                "path": request.path,
+                "view": view,
+                "status": response.status_code,
+                "queries": profile.queries,
+                "db_ms": round(profile.db_time * 1000, 2),
+                "serializer_ms": round(profile.serializer_time * 1000, 2),
+                "render_ms": round(profile.render_time * 1000, 2),
+                "total_ms": round(total * 1000, 2),
+                "n_plus_one": suspects,
+            }, ensure_ascii=False))
@@ -0,0 +1,161 @@
+"""Materiallashtirilgan "top" ro‘yxatlar: eng yaxshi baholangan, eng ko‘p like, eng ko‘p sotilgan.
+
+``ProductRanking`` qatori har bir product uchun bitta; ballar reyting, like va
+order item yozuvlarida bitta ``UPDATE ... SET x = x + delta`` bilan o‘zgaradi
+(app.signals, app.ratings). Top-N so‘rovi ball indeksining boshidan ``LIMIT``
+bilan o‘qiladi, shuning uchun jadval hajmiga bog‘liq emas.
+
+``RANKINGS_BAYESIAN`` yoqilgan bo‘lsa reyting bali bayes o‘rtacha:
+``(C * m + sum) / (C + count)`` — ``m`` = ``RANKINGS_BAYES_PRIOR``,
+``C`` = ``RANKINGS_BAYES_WEIGHT``; bitta 5 baholi product ko‘p baholi
+4.8 dan oldinga chiqmaydi. Sozlama o‘zgarsa ``manage.py rebuild_rankings``.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Greatest
+from django.db.models.lookups import GreaterThan
+
+from .cache import bump_generation, bump_generation_on_commit
+from .models import Order, OrderItem, Product, ProductRanking
+
+RANKINGS_GENERATION = "rankings"
+
+# API nomi → ProductRanking maydoni
+METRICS = {"rating": "rating_score", "likes": "likes", "sales": "sales"}
+UPDATE_FIELDS = ["category", "category_scroll", "rating_sum", "rating_count", "rating_score", "likes", "sales"]
+
+
+def _bayes():
+    if not getattr(settings, "RANKINGS_BAYESIAN", True):
+        return None
+    return float(getattr(settings, "RANKINGS_BAYES_WEIGHT", 5)), float(getattr(settings, "RANKINGS_BAYES_PRIOR", 3.0))
+
+
+def score(rating_sum, rating_count):
+    bayes = _bayes()
+    if bayes is not None:
+        weight, prior = bayes
+        return (weight * prior + rating_sum) / (weight + rating_count)
+    return rating_sum / rating_count if rating_count else 0.0
+
+
+def score_expression(rating_sum, rating_count):
+    """``score`` ning SQL ko‘rinishi (UPDATE ichida F() ifodalar ustida)."""
+    rating_sum = Cast(rating_sum, FloatField())
+    bayes = _bayes()
+    if bayes is not None:
+        weight, prior = bayes
+        return (Value(weight * prior) + rating_sum) / (Value(weight) + rating_count)
+    return Case(
+        When(GreaterThan(rating_count, 0), then=rating_sum / rating_count),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+# 🔹 Inkremental yangilash
+def apply_rating(product_id, sum_delta, count_delta, using=None):
+    if not product_id or not (sum_delta or count_delta):
+        return
+    new_sum = F("rating_sum") + sum_delta
+    new_count = F("rating_count") + count_delta
+    # UPDATE ichida F() eski qiymatni ko‘radi — ball ham yangi qiymatlardan
+    ProductRanking.objects.using(using).filter(product_id=product_id).update(
+        rating_sum=new_sum, rating_count=new_count, rating_score=score_expression(new_sum, new_count),
+    )
+    bump_generation_on_commit(RANKINGS_GENERATION, using=using)
+
+
+def apply_likes(product_id, delta, using=None):
+    if not product_id or not delta:
+        return
+    ProductRanking.objects.using(using).filter(product_id=product_id).update(
+        likes=Greatest(F("likes") + delta, Value(0))
+    )
+    bump_generation_on_commit(RANKINGS_GENERATION, using=using)
+
+
+def apply_sales(deltas, using=None):
+    """``{product_id: sotilgan dona}`` (manfiy — bekor qilingan) — hammasi bitta UPDATE'da."""
+    deltas = {pk: delta for pk, delta in deltas.items() if pk and delta}
+    if not deltas:
+        return
+    change = Case(
+        *(When(product_id=pk, then=Value(delta)) for pk, delta in deltas.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    ProductRanking.objects.using(using).filter(product_id__in=list(deltas)).update(
+        sales=Greatest(F("sales") + change, Value(0))
+    )
+    bump_generation_on_commit(RANKINGS_GENERATION, using=using)
+
+
+def sync_product(product, created=False, using=None):
+    """Yangi product uchun qator ochadi, kategoriyasi o‘zgarsa bo‘limni ko‘chiradi."""
+    partition = {"category_id": product.category_id, "category_scroll_id": product.category_scroll_id}
+    if not created and ProductRanking.objects.using(using).filter(product_id=product.pk).update(**partition):
+        return
+    ProductRanking.objects.using(using).bulk_create(
+        [ProductRanking(product_id=product.pk, rating_score=score(0, 0), **partition)], ignore_conflicts=True,
+    )
+    bump_generation_on_commit(RANKINGS_GENERATION, using=using)
+
+
+# 🔹 O‘qish
+def top(metric, limit=10, category=None, category_scroll=None, using=None):
+    """``[(product_id, ball), ...]`` — ball bo‘yicha kamayish tartibida."""
+    field = METRICS[metric]
+    queryset = ProductRanking.objects.using(using)
+    if category is not None:
+        queryset = queryset.filter(category_id=category)
+    if category_scroll is not None:
+        queryset = queryset.filter(category_scroll_id=category_scroll)
+    # hali bahosi/like'i/sotuvi yo‘qlar "top"da ko‘rinmasin
+    queryset = queryset.filter(**{"rating_count__gt" if metric == "rating" else f"{field}__gt": 0})
+    return list(queryset.order_by(f"-{field}", "product_id").values_list("product_id", field)[:limit])
+
+
+# 🔹 Noldan qayta qurish
+def rebuild_rankings(batch_size=1000, using=None):
+    """Barcha qatorlarni Product agregatlari va OrderItem'lardan qayta hisoblaydi.
+
+    Reyting va like'lar Product'dagi tayyor hisoblagichlardan olinadi,
+    sotuvlar — product bo‘yicha ``SUM(quantity)`` subquery (muddati o‘tgan order'larsiz).
+    """
+    sold = (
+        OrderItem.objects.filter(product_id=OuterRef("pk")).exclude(order__status=Order.EXPIRED)
+        .values("product_id").annotate(total=Sum("quantity")).values("total")
+    )
+    rows = (
+        Product.objects.using(using)
+        .annotate(sold=Subquery(sold, output_field=IntegerField()))
+        .values_list("id", "category_id", "category_scroll_id", "rating_sum", "rating_count", "likes_count", "sold")
+        .order_by("id")
+    )
+
+    updated = 0
+    with transaction.atomic(using=using):
+        batch = []
+        for pk, category_id, scroll_id, rating_sum, rating_count, likes, sold_count in rows.iterator(chunk_size=batch_size):
+            batch.append(ProductRanking(
+                product_id=pk, category_id=category_id, category_scroll_id=scroll_id,
+                rating_sum=rating_sum, rating_count=rating_count, rating_score=score(rating_sum, rating_count),
+                likes=likes, sales=sold_count or 0,
+            ))
+            if len(batch) >= batch_size:
+                updated += _upsert(batch, using)
+                batch = []
+        updated += _upsert(batch, using)
+
+    bump_generation(RANKINGS_GENERATION)
+    return updated
+
+
+def _upsert(batch, using):
+    if batch:
+        ProductRanking.objects.using(using).bulk_create(
+            batch, update_conflicts=True, unique_fields=["product"], update_fields=UPDATE_FIELDS,
+        )
+    return len(batch)
@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Now
+from django.db.models.lookups import GreaterThan
+
+from .models import Product, ProductRate
+from .rankings import apply_rating
+
+RATE_VALUES = range(1, 6)
+
+
+def apply_rating_delta(product_id, added=None, removed=None, using=None):
+    """Product reyting agregatlarini bitta UPDATE bilan yangilaydi.
+
+    ``added`` — qo‘shilgan baho (1–5), ``removed`` — olib tashlangan baho.
+    Baho o‘zgarsa ikkalasi ham beriladi.
+    """
+    if not product_id or added == removed:
+        return
+
+    sum_delta = (added or 0) - (removed or 0)
+    count_delta = (1 if added else 0) - (1 if removed else 0)
+
+    new_sum = F("rating_sum") + sum_delta
+    new_count = F("rating_count") + count_delta
+
+    updates = {
+        "rating_sum": new_sum,
+        "rating_count": new_count,
+        # UPDATE ichida F() eski qiymatni ko‘radi, shuning uchun o‘rtacha ham shu yerda
+        "average_rating": Case(
+            When(GreaterThan(new_count, 0), then=Cast(new_sum, FloatField()) / new_count),
+            default=Value(None),
+            output_field=FloatField(),
+        ),
+        # delta-sync va javob keshining Last-Modified'i yangi o‘rtachani ko‘rsin
+        "updated_at": Now(),
+    }
+    if added:
+        updates[f"rating_{added}"] = F(f"rating_{added}") + 1
+    if removed:
+        updates[f"rating_{removed}"] = F(f"rating_{removed}") - 1
+
+    Product.objects.using(using).filter(pk=product_id).update(**updates)
+    apply_rating(product_id, sum_delta, count_delta, using=using)
+
+
+def rebuild_rating_aggregates(batch_size=1000, using=None):
+    """Barcha productlar uchun agregatlarni ProductRate jadvalidan qayta hisoblaydi."""
+    rows = (
+        ProductRate.objects.using(using)
+        .values("product_id")
+        .annotate(
+            total=Sum("rate"),
+            cnt=Count("id"),
+            **{f"r{i}": Count("id", filter=Q(rate=i)) for i in RATE_VALUES},
+        )
+        .order_by()
+    )
+    stats = {row["product_id"]: row for row in rows}
+
+    fields = ["rating_sum", "rating_count", "average_rating"] + [f"rating_{i}" for i in RATE_VALUES]
+    updated = 0
+
+    with transaction.atomic(using=using):
+        batch = []
+        for product in Product.objects.using(using).only("id").iterator(chunk_size=batch_size):
+            row = stats.get(product.id)
+            product.rating_sum = row["total"] if row else 0
+            product.rating_count = row["cnt"] if row else 0
+            product.average_rating = product.rating_sum / product.rating_count if row else None
+            for i in RATE_VALUES:
+                setattr(product, f"rating_{i}", row[f"r{i}"] if row else 0)
+            batch.append(product)
+
+            if len(batch) >= batch_size:
+                Product.objects.using(using).bulk_update(batch, fields)
+                updated += len(batch)
+                batch = []
+        if batch:
+            Product.objects.using(using).bulk_update(batch, fields)
+            updated += len(batch)
+
+    return updated
@@ -0,0 +1,62 @@
+"""Tez JSON (orjson) va MessagePack renderer'lari.
+
+Ikkala kutubxona ham ixtiyoriy: orjson bo‘lmasa ``FastJSONRenderer`` oddiy
+``JSONRenderer`` ga qaytadi, msgpack bo‘lmasa ``MessagePackRenderer``
+settings'da ro‘yxatga qo‘shilmaydi (myproject/settings.py).
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .profiling import render_finished, render_started
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - ixtiyoriy bog‘liqlik
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - ixtiyoriy bog‘liqlik
+    msgpack = None
+
+# Decimal, Promise, UUID, QuerySet ... — DRF bilan bir xil natija
+_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` bilan bir xil chiqish, lekin orjson orqali (C'da)."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        token = render_started()
+        try:
+            if orjson is None or data is None:
+                return super().render(data, accepted_media_type, renderer_context)
+            if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+                # chiroyli chiqish (browsable API) — kamdan-kam, stdlib yetadi
+                return super().render(data, accepted_media_type, renderer_context)
+
+            ret = orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+            # JSONRenderer kabi: natija JavaScript'ning qat'iy qism to‘plami bo‘lsin
+            if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+                ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+            return ret
+        finally:
+            render_finished(token)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """``Accept: application/msgpack`` — JSON'dan ixchamroq va tezroq parse qilinadi."""
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        token = render_started()
+        try:
+            return msgpack.packb(data, default=_default, use_bin_type=True)
+        finally:
+            render_finished(token)
@@ -0,0 +1,120 @@
+import re
+
+from django.db import connections
+from django.db.models import Case, IntegerField, When
+
+FTS_TABLE = "app_product_fts"
+
+# name ustuni desc'dan muhimroq (bm25 og‘irliklari)
+NAME_WEIGHT = 10.0
+DESC_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_enabled(using="default"):
+    return connections[using].vendor == "sqlite"
+
+
+def build_match_query(text, prefix=False, column=None):
+    """Foydalanuvchi matnini xavfsiz FTS5 MATCH ifodasiga aylantiradi.
+
+    Har bir so‘z qo‘shtirnoqqa olinadi (FTS5 operatorlari ishlamaydi),
+    ``prefix=True`` bo‘lsa oxirgi so‘z prefiks sifatida qidiriladi.
+    """
+    tokens = _TOKEN_RE.findall(text or "")
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    if prefix:
+        terms[-1] += "*"
+    query = " ".join(terms)
+    if column:
+        query = f"{column} : ({query})"
+    return query
+
+
+def create_index(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+
+
+def drop_index(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def rebuild_index(using="default"):
+    """Indeksni app_product jadvalidan to‘liq qayta quradi (bulk import'dan keyin)."""
+    if not fts_enabled(using):
+        return 0
+    connection = connections[using]
+    create_index(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, name, description) SELECT id, name, "desc" FROM app_product'
+        )
+        return cursor.rowcount
+
+
+def index_product(product, using="default"):
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (%s, %s, %s)",
+            [product.pk, product.name, product.desc or ""],
+        )
+
+
+def unindex_product(product_id, using="default"):
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+
+def match_sql(text, prefix=False):
+    """``id__in`` uchun subquery: (sql, params) yoki None."""
+    query = build_match_query(text, prefix=prefix)
+    if query is None:
+        return None
+    return f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [query]
+
+
+def ranked_ids(text, limit=20, offset=0, prefix=True, using="default"):
+    """BM25 bo‘yicha saralangan product id'lari."""
+    query = build_match_query(text, prefix=prefix)
+    if query is None:
+        return []
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, %s, %s) LIMIT %s OFFSET %s",
+            [query, NAME_WEIGHT, DESC_WEIGHT, limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def autocomplete(text, limit=10, using="default"):
+    """Faqat name ustunidan prefiks bo‘yicha takliflar: [{"id", "name"}]."""
+    query = build_match_query(text, prefix=True, column="name")
+    if query is None:
+        return []
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, name FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, %s, %s) LIMIT %s",
+            [query, NAME_WEIGHT, DESC_WEIGHT, limit],
+        )
+        return [{"id": pk, "name": name} for pk, name in cursor.fetchall()]
+
+
+def preserve_order(ids):
+    """``order_by`` uchun: id'larni berilgan tartibda saqlaydi."""
+    return Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(ids)], output_field=IntegerField())
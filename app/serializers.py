@@ -1,97 +1,277 @@
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from .models import (
     User, Category, CategoryScroll, Product, ProductImage,
     Order, OrderItem, LikeProduct, ProductRate
 )
+from .images import variant_urls
+from .profiling import serializer_finished, serializer_started
+from .rankings import apply_sales
+from .stock import OutOfStock, reservation_deadline, reserve_stock
+from .tracking import allocate_tracking_code
+from .users import normalize_number, resolve
+
+
+# 🔹 SPARSE FIELDSETS (?fields=id,items.quantity&expand=items.product)
+class SparseFields:
+    """So‘rovdagi ``fields`` va ``expand`` parametrlari (nuqtali yo‘llar)."""
+
+    def __init__(self, fields=(), expand=()):
+        self.fields = {f for f in fields if f}
+        self.expand = {e for e in expand if e}
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None:
+            return cls()
+        params = request.query_params
+        return cls(params.get("fields", "").split(","), params.get("expand", "").split(","))
+
+    def wants(self, path):
+        """``path`` (masalan ``items.product``) javobga kiradimi."""
+        parts = path.split(".")
+        for depth, name in enumerate(parts):
+            prefix = ".".join(parts[:depth])
+            below = {
+                f[len(prefix) + 1:] if prefix else f
+                for f in self.fields
+                if not prefix or f.startswith(prefix + ".")
+            }
+            # shu darajada hech narsa so‘ralmagan bo‘lsa — hammasi kiradi
+            allowed = {f.split(".")[0] for f in below}
+            if allowed and name not in allowed:
+                return False
+        return True
+
+    def expands(self, path):
+        return path in self.expand and self.wants(path)
+
+
+class SparseFieldsMixin:
+    """Serializer'ga ``?fields=`` / ``?expand=`` qo‘llab-quvvatlashini qo‘shadi.
+
+    ``Meta.expandable_fields = {"product": ProductSerializer}`` — ``?expand=``
+    da so‘ralsa, standart (ixcham) nested serializer to‘liq variantiga almashadi.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if request is not None and request.method not in ("GET", "HEAD", "OPTIONS"):
+            return fields  # yozishda barcha maydonlar kerak
+        sparse = SparseFields.from_request(request)
+        path = self.field_path
+
+        for name, serializer_class in getattr(self.Meta, "expandable_fields", {}).items():
+            if name in fields and sparse.expands(self.join(path, name)):
+                declared = fields[name]
+                fields[name] = serializer_class(
+                    many=isinstance(declared, serializers.ListSerializer),
+                    read_only=True,
+                    **({"source": declared.source} if declared.source else {}),
+                )
+
+        return {name: field for name, field in fields.items() if sparse.wants(self.join(path, name))}
+
+    def to_representation(self, instance):
+        # profiler uchun faqat eng yuqori darajadagi serializer vaqti
+        is_top = self.parent is None or (self.parent.parent is None and isinstance(self.parent, serializers.ListSerializer))
+        token = serializer_started() if is_top else None
+        try:
+            return super().to_representation(instance)
+        finally:
+            serializer_finished(token)
+
+    @property
+    def field_path(self):
+        parts, node = [], self
+        while node.parent is not None:
+            if node.field_name:
+                parts.append(node.field_name)
+            node = node.parent
+        return ".".join(reversed(parts))
+
+    @staticmethod
+    def join(path, name):
+        return f"{path}.{name}" if path else name
+
+
+def main_image_prefetch(prefix=""):
+    """Faqat asosiy rasm — ixcham product uchun (``main_images`` atributiga)."""
+    return Prefetch(
+        f"{prefix}images",
+        queryset=ProductImage.objects.filter(is_main=True),
+        to_attr="main_images",
+    )
+
 
 # 🔹 USER
-class UserSerializer(serializers.ModelSerializer):
+class PhoneNumberField(serializers.CharField):
+    """Telefon raqamini E.164 ga keltiradi (app.users) — validator'lar normallashgan qiymatni ko‘radi."""
+
+    default_error_messages = {"invalid_number": "Telefon raqami noto‘g‘ri."}
+
+    def to_internal_value(self, data):
+        try:
+            return normalize_number(super().to_internal_value(data))
+        except ValueError:
+            self.fail("invalid_number")
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    number = PhoneNumberField(max_length=20, validators=[UniqueValidator(queryset=User.objects.all())])
+
     class Meta:
         model = User
         fields = ['id', 'number', 'name']
 
 
 # 🔹 CATEGORY
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'sub_name']  # agar image bo‘lsa qo‘shish mumkin
 
 
 # 🔹 CATEGORY SCROLL
-class CategoryScrollSerializer(serializers.ModelSerializer):
+class CategoryScrollSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = CategoryScroll
-        fields = ['id', 'name', 'image']
+        fields = ['id', 'name', 'image', 'variants']
+
+    def get_variants(self, obj):
+        return variant_urls(obj.variants, self.context.get("request"))
 
 
 # 🔹 PRODUCT IMAGE
-class ProductImageSerializer(serializers.ModelSerializer):
+class ProductImageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'is_main']
+        fields = ['id', 'image', 'is_main', 'variants']
+
+    def get_variants(self, obj):
+        return variant_urls(obj.variants, self.context.get("request"))
 
 
 # 🔹 PRODUCT RATE
-class ProductRateSerializer(serializers.ModelSerializer):
+class ProductRateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    user_number = PhoneNumberField(source="user.number")
+
     class Meta:
         model = ProductRate
         fields = ["id", "user_number", "product", "rate", "created_at"]
         read_only_fields = ["id", "created_at"]
 
+    def validate(self, attrs):
+        number = attrs.pop("user")["number"]
+        user_id = resolve(number)
+        if user_id is None:
+            raise serializers.ValidationError({"user_number": "Bunday foydalanuvchi topilmadi!"})
+        if ProductRate.objects.filter(user_id=user_id, product=attrs["product"]).exists():
+            raise serializers.ValidationError("Bu foydalanuvchi productni allaqachon baholagan.")
+        # javobda user.number uchun qo‘shimcha query bo‘lmasin
+        attrs["user"] = User(pk=user_id, number=number)
+        return attrs
+
 
 # 🔹 PRODUCT
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
     average_rating = serializers.SerializerMethodField()
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
     final_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = Product
         fields = [
-            'id', 'name', 'desc', 'price', 'quantity',
+            'id', 'sku', 'name', 'desc', 'price', 'quantity',
             'category', 'category_scroll',
             'created_at', 'updated_at',
-            'average_rating', 'final_price', 'images'
+            'average_rating', 'rating_count', 'rating_histogram', 'likes_count',
+            'final_price', 'images'
         ]
+        read_only_fields = ['rating_count', 'likes_count']
 
     def get_average_rating(self, obj):
-        ratings = obj.ratings.all()
-        if ratings.exists():
-            return round(sum(r.rate for r in ratings) / ratings.count(), 2)
-        return None
+        # Product jadvalidagi agregatdan o‘qiladi — qo‘shimcha query yo‘q
+        if obj.average_rating is None:
+            return None
+        return round(obj.average_rating, 2)
+
+
+# 🔹 PRODUCT (ixcham — order itemlar ichida)
+class ProductCompactSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    main_image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = ['id', 'name', 'price', 'main_image']
+
+    def get_main_image(self, obj):
+        # main_image_prefetch() bo‘lsa qo‘shimcha query yo‘q
+        images = getattr(obj, "main_images", None)
+        if images is None:
+            images = [img for img in obj.images.all() if img.is_main]
+        if not images:
+            return None
+        url = images[0].image.url
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
 
 
 # 🔹 ORDER ITEM
-class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+class OrderItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    product = ProductCompactSerializer(read_only=True)
 
     class Meta:
         model = OrderItem
-        fields = ['id', 'product', 'quantity', 'subtotal']
+        fields = ['id', 'product', 'quantity', 'price', 'subtotal']
+        read_only_fields = ['price']
+        expandable_fields = {'product': ProductSerializer}
 
 
 # 🔹 ORDER
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
-    final_price = serializers.SerializerMethodField()
     user_number = serializers.CharField(source="user.number", read_only=True)
 
     class Meta:
         model = Order
-        fields = ['id', 'tracking_code', 'user_number', 'final_price', 'created_at', 'items']
+        fields = ['id', 'tracking_code', 'user_number', 'final_price', 'status', 'reserved_until', 'created_at', 'items']
+        read_only_fields = ['final_price', 'status', 'reserved_until']  # OrderItem / app.stock yangilaydi
+
+
+class OrderHistorySerializer(serializers.ModelSerializer):
+    """``app.orders.order_history`` annotatsiyalari — summalar SQL'da hisoblangan."""
+
+    total = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    item_count = serializers.IntegerField(read_only=True)
+    quantity = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'tracking_code', 'status', 'reserved_until', 'created_at', 'total', 'item_count', 'quantity']
+
 
-    def get_final_price(self, obj):
-        return sum(item.subtotal for item in obj.items.all())
+class OrderSummarySerializer(serializers.Serializer):
+    orders = serializers.IntegerField()
+    total_spent = serializers.DecimalField(max_digits=12, decimal_places=2)
+    last_order_at = serializers.DateTimeField(allow_null=True)
 
 
 # 🔹 LIKE PRODUCT
-class LikeProductSerializer(serializers.ModelSerializer):
-    user_number = serializers.CharField(write_only=True, required=True)
+class LikeProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    user_number = PhoneNumberField(write_only=True, required=True)
     product_id = serializers.IntegerField(write_only=True, required=True)
 
     user_display = serializers.CharField(source="user.number", read_only=True)
-    product_display = serializers.IntegerField(source="product.id", read_only=True)
+    product_display = serializers.IntegerField(source="product_id", read_only=True)
 
     class Meta:
         model = LikeProduct
@@ -101,10 +281,10 @@ class LikeProductSerializer(serializers.ModelSerializer):
         user_number = validated_data.pop("user_number")
         product_id = validated_data.pop("product_id")
 
-        try:
-            user = User.objects.get(number=user_number)
-        except User.DoesNotExist:
+        user_id = resolve(user_number)
+        if user_id is None:
             raise serializers.ValidationError({"user_number": "Bunday foydalanuvchi topilmadi!"})
+        user = User(pk=user_id, number=user_number)
 
         try:
             product = Product.objects.get(id=product_id)
@@ -131,11 +311,18 @@ class OrderItemCreateSerializer(serializers.ModelSerializer):
         order = Order.objects.get(id=order_id)
         product = Product.objects.get(id=product_id)
 
-        item = OrderItem.objects.create(
-            order=order,
-            product=product,
-            quantity=validated_data['quantity']
-        )
+        with transaction.atomic():
+            # read-check-write emas — shartli UPDATE (app.stock)
+            try:
+                reserve_stock({product.pk: validated_data['quantity']})
+            except OutOfStock as exc:
+                raise serializers.ValidationError({"quantity": f"Omborda {exc.lines[0]['available']} ta qoldi"})
+            item = OrderItem.objects.create(
+                order=order,
+                product=product,
+                quantity=validated_data['quantity'],
+                price=product.price,
+            )
         return item
 
 
@@ -146,13 +333,64 @@ class OrderCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ['id', 'user_id', 'tracking_code', 'created_at']
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'tracking_code']
 
     def create(self, validated_data):
         user_id = validated_data.pop('user_id')
         user = User.objects.get(id=user_id)
         order = Order.objects.create(
             user=user,
-            tracking_code=f"TRK{user.id}{Order.objects.count() + 1:04d}"  # tracking code avtomatik
+            tracking_code=allocate_tracking_code()  # tracking code avtomatik
         )
         return order
+
+
+# 🔹 CHECKOUT (order + barcha itemlar bitta tranzaksiyada)
+class CheckoutItemSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    user_id = serializers.IntegerField()
+    items = CheckoutItemSerializer(many=True, allow_empty=False)
+
+    def validate_user_id(self, value):
+        try:
+            return User.objects.get(id=value)
+        except User.DoesNotExist:
+            raise serializers.ValidationError("Bunday foydalanuvchi topilmadi!")
+
+    def validate_items(self, items):
+        # bir xil product bir necha marta kelsa — miqdorlarni qo‘shamiz
+        quantities = {}
+        for item in items:
+            quantities[item['product_id']] = quantities.get(item['product_id'], 0) + item['quantity']
+
+        products = Product.objects.only('id', 'price').in_bulk(list(quantities))
+        missing = [pk for pk in quantities if pk not in products]
+        if missing:
+            raise serializers.ValidationError({"product_id": f"Bunday productlar topilmadi: {missing}"})
+
+        return [(products[pk], qty) for pk, qty in quantities.items()]
+
+    def create(self, validated_data):
+        user = validated_data['user_id']
+        lines = validated_data['items']
+
+        with transaction.atomic():
+            # avval ombor — yetmasa order ham, tracking code ham yaratilmaydi (OutOfStock)
+            reserve_stock({product.pk: qty for product, qty in lines})
+            order = Order.objects.create(
+                user=user, tracking_code=allocate_tracking_code(),
+                status=Order.PENDING, reserved_until=reservation_deadline(),
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, quantity=qty, price=product.price)
+                for product, qty in lines
+            ])
+            # bulk_create signal yubormaydi — sotuv reytingi bitta UPDATE bilan
+            apply_sales({product.pk: qty for product, qty in lines})
+            order.final_price = sum(product.price * qty for product, qty in lines)
+            order.save(update_fields=['final_price'])
+        return order
@@ -0,0 +1,151 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import (
+    CATEGORIES_GENERATION, CATEGORY_SCROLLS_GENERATION, PRODUCTS_GENERATION, bump_generation_on_commit,
+    product_generation,
+)
+from .facets import FACETS_GENERATION
+from .images import delete_variants, schedule_variants
+from .models import Category, CategoryScroll, LikeProduct, Order, OrderItem, Product, ProductImage, ProductRate, User
+from .orders import refresh_final_price
+from .rankings import apply_likes, apply_sales, sync_product
+from .ratings import apply_rating_delta
+from .search import index_product, unindex_product
+from .sync import record_tombstone, touch
+from .users import forget
+
+
+# 🔹 USER → raqam → id keshi (app.users)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    forget(instance)
+    instance._loaded_number = instance.number
+
+
+# 🔹 PRODUCT RATE → Product reyting agregatlari
+@receiver(post_save, sender=ProductRate)
+def product_rate_saved(sender, instance, created, using, **kwargs):
+    old_product_id, old_rate = (None, None) if created else getattr(instance, "_loaded_rating", (None, None))
+
+    if old_product_id == instance.product_id:
+        apply_rating_delta(instance.product_id, added=instance.rate, removed=old_rate, using=using)
+    else:
+        # baho boshqa productga ko‘chirilgan
+        apply_rating_delta(old_product_id, removed=old_rate, using=using)
+        apply_rating_delta(instance.product_id, added=instance.rate, using=using)
+        bump_generation_on_commit(product_generation(old_product_id), using=using)
+    bump_generation_on_commit(PRODUCTS_GENERATION, product_generation(instance.product_id), using=using)
+
+
+@receiver(post_delete, sender=ProductRate)
+def product_rate_deleted(sender, instance, using, **kwargs):
+    old_product_id, old_rate = getattr(instance, "_loaded_rating", (instance.product_id, instance.rate))
+    apply_rating_delta(old_product_id, removed=old_rate, using=using)
+    bump_generation_on_commit(PRODUCTS_GENERATION, product_generation(old_product_id), using=using)
+
+
+# 🔹 LIKE PRODUCT → Product.likes_count
+# likes_count javobda bor — updated_at (Last-Modified, delta-sync) va ro‘yxat keshi ham yangilanadi
+@receiver(post_save, sender=LikeProduct)
+def like_saved(sender, instance, created, using, **kwargs):
+    if created:
+        Product.objects.using(using).filter(pk=instance.product_id).update(
+            likes_count=F("likes_count") + 1, updated_at=Now()
+        )
+        apply_likes(instance.product_id, 1, using=using)
+        bump_generation_on_commit(PRODUCTS_GENERATION, product_generation(instance.product_id), using=using)
+
+
+@receiver(post_delete, sender=LikeProduct)
+def like_deleted(sender, instance, using, **kwargs):
+    Product.objects.using(using).filter(pk=instance.product_id, likes_count__gt=0).update(
+        likes_count=F("likes_count") - 1, updated_at=Now()
+    )
+    apply_likes(instance.product_id, -1, using=using)
+    bump_generation_on_commit(PRODUCTS_GENERATION, product_generation(instance.product_id), using=using)
+
+
+# 🔹 ORDER ITEM → Order.final_price va sotuv reytingi
+@receiver(post_save, sender=OrderItem)
+def order_item_saved(sender, instance, created, using, **kwargs):
+    refresh_final_price(instance.order_id, using=using)
+    loaded_order_id = getattr(instance, "_loaded_order_id", instance.order_id)
+    if loaded_order_id != instance.order_id:
+        refresh_final_price(loaded_order_id, using=using)
+    instance._loaded_order_id = instance.order_id
+
+    old_product_id, old_quantity = (None, 0) if created else getattr(instance, "_loaded_sale", (None, 0))
+    deltas = {instance.product_id: instance.quantity}
+    deltas[old_product_id] = deltas.get(old_product_id, 0) - (old_quantity or 0)
+    apply_sales(deltas, using=using)
+    instance._loaded_sale = (instance.product_id, instance.quantity)
+
+
+@receiver(post_delete, sender=OrderItem)
+def order_item_deleted(sender, instance, using, **kwargs):
+    refresh_final_price(getattr(instance, "_loaded_order_id", instance.order_id), using=using)
+    product_id, quantity = getattr(instance, "_loaded_sale", (instance.product_id, instance.quantity))
+    # muddati o‘tgan order sotuvlari sweeper'da allaqachon ayirilgan (app.stock)
+    if not Order.objects.using(using).filter(pk=instance.order_id, status=Order.EXPIRED).exists():
+        apply_sales({product_id: -quantity}, using=using)
+
+
+# 🔹 PRODUCT → FTS5 qidiruv indeksi, facets va javob keshlari
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, using, update_fields=None, **kwargs):
+    bump_generation_on_commit(FACETS_GENERATION, PRODUCTS_GENERATION, product_generation(instance.pk), using=using)
+    if created or update_fields is None or {"category", "category_scroll"} & set(update_fields):
+        sync_product(instance, created=created, using=using)
+    if update_fields is not None and not {"name", "desc"} & set(update_fields):
+        return
+    index_product(instance, using=using)
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, using, **kwargs):
+    bump_generation_on_commit(FACETS_GENERATION, PRODUCTS_GENERATION, product_generation(instance.pk), using=using)
+    unindex_product(instance.pk, using=using)
+
+
+# 🔹 PRODUCT IMAGE / CATEGORY SCROLL → resize variantlari (fon worker'ida)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=CategoryScroll)
+def image_saved(sender, instance, **kwargs):
+    schedule_variants(instance)
+
+
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_delete, sender=CategoryScroll)
+def image_deleted(sender, instance, **kwargs):
+    if instance.variants:
+        transaction.on_commit(lambda: delete_variants(instance.variants))
+
+
+# 🔹 CATEGORY / CATEGORY SCROLL → facets'dagi nomlar va javob keshi
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=CategoryScroll)
+@receiver(post_delete, sender=CategoryScroll)
+def category_changed(sender, using, **kwargs):
+    bump_generation_on_commit(
+        FACETS_GENERATION, CATEGORIES_GENERATION if sender is Category else CATEGORY_SCROLLS_GENERATION, using=using
+    )
+
+
+# 🔹 DELTA-SYNC → tombstone'lar va rasm o‘zgarganda product.updated_at
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=CategoryScroll)
+def catalog_deleted(sender, instance, using, **kwargs):
+    record_tombstone(instance, using=using)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def product_image_changed(sender, instance, using, **kwargs):
+    touch(Product, instance.product_id, using=using)
@@ -0,0 +1,136 @@
+"""Ombor zaxirasi — oversell'siz checkout.
+
+Butun order uchun bitta shartli UPDATE::
+
+    UPDATE app_product SET quantity = quantity - CASE id WHEN .. THEN n .. END
+    WHERE id IN (..) AND quantity >= CASE id WHEN .. THEN n .. END
+
+Tekshiruv va ayirish bitta statement — ikki parallel checkout bir xil
+qoldiqni "ko‘rib" ikkalasi ham ayira olmaydi. Yangilangan qatorlar soni
+liniyalar sonidan kam bo‘lsa savepoint orqaga qaytariladi va
+``OutOfStock`` har bir yetmagan liniya bilan ko‘tariladi.
+
+Checkout order'i ``PENDING`` bo‘lib ``ORDER_RESERVATION_MINUTES`` ga
+zaxiralanadi; tasdiqlanmasa ``release_expired_reservations`` (cron:
+``manage.py release_expired_reservations``) omborni qaytaradi.
+
+UPDATE'lar signal'siz, shuning uchun ``updated_at`` (delta-sync) shu
+statement'ning o‘zida yoziladi, javob/facets kesh avlodlari esa commit'dan
+keyin oshiriladi.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .cache import PRODUCTS_GENERATION, bump_generation_on_commit, product_generation
+from .facets import FACETS_GENERATION
+from .models import Order, OrderItem, Product
+from .rankings import apply_sales
+
+
+class OutOfStock(Exception):
+    def __init__(self, lines):
+        super().__init__("Omborda yetarli emas")
+        # [{"product_id": .., "requested": .., "available": ..}, ...]
+        self.lines = lines
+
+
+def _by_product(quantities):
+    return Case(
+        *(When(pk=pk, then=Value(quantity)) for pk, quantity in quantities.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _stock_changed(product_ids, using):
+    names = [PRODUCTS_GENERATION, FACETS_GENERATION, *map(product_generation, product_ids)]
+    bump_generation_on_commit(*names, using=using)
+
+
+def reserve_stock(quantities, using=None):
+    """``{product_id: dona}`` ni ombordan ayiradi — hammasi yoki hech biri."""
+    quantities = {pk: quantity for pk, quantity in quantities.items() if quantity > 0}
+    if not quantities:
+        return
+    change = _by_product(quantities)
+    with transaction.atomic(using=using):
+        updated = Product.objects.using(using).filter(pk__in=list(quantities), quantity__gte=change).update(
+            quantity=F("quantity") - change, updated_at=Now()
+        )
+        if updated == len(quantities):
+            _stock_changed(quantities, using)
+            return
+        transaction.set_rollback(True, using=using)
+
+    # savepoint qaytarildi — qoldiqlar asl holida
+    available = dict(Product.objects.using(using).filter(pk__in=list(quantities)).values_list("id", "quantity"))
+    raise OutOfStock([
+        {"product_id": pk, "requested": quantity, "available": available.get(pk, 0)}
+        for pk, quantity in quantities.items()
+        if available.get(pk, 0) < quantity
+    ])
+
+
+def release_stock(quantities, using=None):
+    quantities = {pk: quantity for pk, quantity in quantities.items() if quantity > 0}
+    if quantities:
+        change = _by_product(quantities)
+        Product.objects.using(using).filter(pk__in=list(quantities)).update(
+            quantity=F("quantity") + change, updated_at=Now()
+        )
+        _stock_changed(quantities, using)
+
+
+def reservation_deadline():
+    return timezone.now() + timedelta(minutes=getattr(settings, "ORDER_RESERVATION_MINUTES", 15))
+
+
+def confirm_order(order_id, using=None):
+    """To‘lov/tasdiqdan keyin: zaxira doimiy bo‘ladi. Muddati o‘tgan bo‘lsa False."""
+    return bool(
+        Order.objects.using(using)
+        .filter(pk=order_id, status=Order.PENDING, reserved_until__gte=timezone.now())
+        .update(status=Order.CONFIRMED, reserved_until=None)
+    )
+
+
+def release_orders(order_ids, using=None):
+    """PENDING order'larni EXPIRED qiladi va itemlari miqdorini omborga qaytaradi."""
+    with transaction.atomic(using=using):
+        # PostgreSQL'da parallel confirm/sweeper bilan to‘qnashmaslik uchun (SQLite e'tiborsiz qoldiradi)
+        ids = list(
+            Order.objects.using(using).select_for_update(skip_locked=True)
+            .filter(pk__in=order_ids, status=Order.PENDING).values_list("id", flat=True)
+        )
+        if not ids:
+            return 0
+        quantities = dict(
+            OrderItem.objects.using(using).filter(order_id__in=ids)
+            .values("product_id").annotate(total=Sum("quantity")).order_by()
+            .values_list("product_id", "total")
+        )
+        release_stock(quantities, using=using)
+        # muddati o‘tgan order'lar sotuv reytingida hisoblanmaydi
+        apply_sales({pk: -total for pk, total in quantities.items()}, using=using)
+        Order.objects.using(using).filter(pk__in=ids).update(status=Order.EXPIRED, reserved_until=None)
+    return len(ids)
+
+
+def release_expired_reservations(batch_size=500, using=None):
+    """Muddati o‘tgan zaxiralarni partiyalab bo‘shatadi; bo‘shatilgan order'lar soni."""
+    released = 0
+    while True:
+        ids = list(
+            Order.objects.using(using)
+            .filter(status=Order.PENDING, reserved_until__lt=timezone.now())
+            .values_list("id", flat=True)[:batch_size]
+        )
+        count = release_orders(ids, using=using) if ids else 0
+        if not count:  # boshqa sweeper qulflagan bo‘lsa ham to‘xtaymiz
+            return released
+        released += count
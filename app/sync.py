@@ -0,0 +1,114 @@
+"""Offline mijozlar uchun delta-sync.
+
+Mijoz oxirgi javobdagi ``watermark`` ni ``?since=`` bilan qaytaradi va faqat
+shundan keyin o‘zgargan kategoriya, scroll va productlarni (rasmlari bilan)
+hamda o‘chirilganlar uchun tombstone'larni oladi. Javob NDJSON oqimi:
+har bir qator ``{"type": ..., ...}``, oxirgisi ``{"type": "watermark"}``.
+
+Like hisoblagichi ham ``updated_at`` ni yangilaydi — ``likes_count``
+o‘zgargan productlar keyingi sync'da keladi.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.encoders import JSONEncoder
+
+from .cache import (
+    CATEGORIES_GENERATION, CATEGORY_SCROLLS_GENERATION, PRODUCTS_GENERATION, bump_generation_on_commit, product_generation,
+)
+from .models import Category, CategoryScroll, Product, ProductImage, Tombstone
+from .serializers import CategoryScrollSerializer, CategorySerializer, ProductSerializer
+
+TOMBSTONE_MODELS = {Product: "product", Category: "category", CategoryScroll: "category_scroll"}
+
+
+def record_tombstone(instance, using=None):
+    Tombstone.objects.using(using).create(model=TOMBSTONE_MODELS[type(instance)], object_id=instance.pk)
+
+
+def touch(model, pk, using=None):
+    """``.update()`` bilan o‘zgargan yozuvni sync va javob keshi uchun "o‘zgardi" deb belgilaydi."""
+    if model is ProductImage:
+        model, pk = Product, ProductImage.objects.using(using).filter(pk=pk).values_list("product_id", flat=True).first()
+    if pk is None or model not in TOMBSTONE_MODELS:
+        return
+    model.objects.using(using).filter(pk=pk).update(updated_at=timezone.now())
+    if model is Product:
+        bump_generation_on_commit(PRODUCTS_GENERATION, product_generation(pk), using=using)
+    else:
+        bump_generation_on_commit(CATEGORIES_GENERATION if model is Category else CATEGORY_SCROLLS_GENERATION, using=using)
+
+
+def prune_tombstones(using=None):
+    horizon = timezone.now() - timedelta(days=getattr(settings, "SYNC_TOMBSTONE_DAYS", 30))
+    return Tombstone.objects.using(using).filter(deleted_at__lt=horizon).delete()[0]
+
+
+def parse_watermark(value):
+    """``since`` ni datetime'ga aylantiradi; bo‘sh bo‘lsa None (to‘liq sync)."""
+    if not value:
+        return None
+    # URL'da kodlanmagan "+00:00" bo‘shliqqa aylanadi
+    since = parse_datetime(value.replace(" ", "+"))
+    if since is None:
+        raise ValueError("since ISO 8601 formatida bo‘lishi kerak")
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, timezone.get_current_timezone())
+    return since
+
+
+def changes(since, request=None, chunk_size=500, using=None):
+    """Sync qatorlarini (dict) generator sifatida qaytaradi."""
+    now = timezone.now()
+    # hali commit bo‘lmagan tranzaksiyalar eski updated_at bilan keyinroq ko‘rinishi mumkin —
+    # watermark'ni biroz orqaga suramiz; takror kelgan yozuvlar mijozda shunchaki ustidan yoziladi
+    watermark = now - timedelta(seconds=getattr(settings, "SYNC_WATERMARK_LAG_SECONDS", 5))
+
+    horizon = now - timedelta(days=getattr(settings, "SYNC_TOMBSTONE_DAYS", 30))
+    if since is not None and since < horizon:
+        since = None  # tombstone'lar allaqachon tozalangan — to‘liq sync
+    if since is None:
+        yield {"type": "reset"}
+
+    context = {"request": request}
+    streams = [
+        ("category", Category.objects.all(), CategorySerializer),
+        ("category_scroll", CategoryScroll.objects.all(), CategoryScrollSerializer),
+        ("product", Product.objects.prefetch_related("images"), ProductSerializer),
+    ]
+    for kind, queryset, serializer_class in streams:
+        queryset = queryset.using(using).order_by("updated_at", "id")
+        if since is not None:
+            queryset = queryset.filter(updated_at__gte=since)
+        for chunk in _chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+            for data in serializer_class(chunk, many=True, context=context).data:
+                yield {"type": kind, "data": data}
+
+    if since is not None:
+        tombstones = (
+            Tombstone.objects.using(using).filter(deleted_at__gte=since)
+            .order_by("deleted_at", "id").values_list("model", "object_id")
+        )
+        for model, object_id in tombstones.iterator(chunk_size=chunk_size):
+            yield {"type": "tombstone", "model": model, "id": object_id}
+
+    yield {"type": "watermark", "value": watermark.isoformat().replace("+00:00", "Z")}
+
+
+def _chunks(iterator, size):
+    chunk = []
+    for obj in iterator:
+        chunk.append(obj)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ndjson(rows):
+    encoder = JSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + "\n"
@@ -1,3 +1,1330 @@
-from django.test import TestCase
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from PIL import Image
+
+from . import rankings
+from .cache import get_generation, product_generation
+from .models import (
+    Category, CategoryScroll, LikeProduct, Order, OrderItem, Product, ProductImage, ProductRanking, ProductRate, Sequence,
+    User,
+)
+from .tracking import BlockAllocator
+from .users import UserIdCache, normalize_number, resolve, resolve_many, user_ids
+
+
+class ProductRatingAggregateTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(sub_name="Kulol")
+        self.product = Product.objects.create(name="Tovoq", price="10.00", category=self.category)
+        self.users = [User.objects.create(number=f"99890123456{i}", name=f"U{i}") for i in range(3)]
+
+    def test_create_update_delete_keep_aggregates_in_sync(self):
+        r1 = ProductRate.objects.create(user=self.users[0], product=self.product, rate=5)
+        ProductRate.objects.create(user=self.users[1], product=self.product, rate=2)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_sum, self.product.rating_count), (7, 2))
+        self.assertAlmostEqual(self.product.average_rating, 3.5)
+
+        r1 = ProductRate.objects.get(pk=r1.pk)
+        r1.rate = 3
+        r1.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating_histogram, {"1": 0, "2": 1, "3": 1, "4": 0, "5": 0})
+
+        ProductRate.objects.all().delete()
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_sum, self.product.rating_count), (0, 0))
+        self.assertIsNone(self.product.average_rating)
+
+    def test_rebuild_command_recomputes_from_scratch(self):
+        ProductRate.objects.create(user=self.users[0], product=self.product, rate=4)
+        Product.objects.update(rating_sum=0, rating_count=0, average_rating=None, rating_4=0)
+
+        call_command("rebuild_rating_aggregates", stdout=StringIO())
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_sum, self.product.rating_count, self.product.rating_4), (4, 1, 1))
+        self.assertAlmostEqual(self.product.average_rating, 4.0)
+
+    def test_product_list_has_no_rating_queries(self):
+        for i in range(3):
+            ProductRate.objects.create(user=self.users[i], product=self.product, rate=i + 1)
+        Product.objects.create(name="Ko‘za", price="5.00", category=self.category)
+
+        # count (offset fallback) + products + images prefetch + Last-Modified (javob keshi)
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/products/?ordering=-average_rating")
+        self.assertEqual(response.json()["results"][0]["average_rating"], 2.0)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(sub_name="Kulol")
+        Product.objects.bulk_create(
+            Product(name=f"P{i}", price=i % 3, category=category) for i in range(7)
+        )
+
+    def walk(self, url):
+        ids, pages = [], []
+        while url:
+            body = self.client.get(url).json()
+            pages.append(body)
+            ids += [p["id"] for p in body["results"]]
+            url = body["next"]
+        return ids, pages
+
+    def test_price_keyset_walks_every_row_once_in_order(self):
+        ids, pages = self.walk("/api/products/?ordering=price&page_size=3")
+        expected = list(Product.objects.order_by("price", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(pages), 3)
+
+        previous = self.client.get(pages[2]["previous"]).json()
+        self.assertEqual(previous["results"], pages[1]["results"])
+
+    def test_unsupported_ordering_falls_back_to_offset(self):
+        body = self.client.get("/api/products/?ordering=quantity&limit=2").json()
+        self.assertEqual(body["count"], 7)
+        self.assertEqual(len(body["results"]), 2)
+
+    def test_well_formed_cursor_with_bad_value_is_404(self):
+        for ordering, payload in (("price", b'{"v":"abc","id":1}'), ("-created_at", b'{"v":"kecha","id":1}'),
+                                  ("price", b'{"v":null,"id":1}'), ("price", b'{"v":"1.5","id":"x"}')):
+            cursor = urlsafe_b64encode(payload).decode()
+            response = self.client.get(f"/api/products/?ordering={ordering}&cursor={cursor}")
+            self.assertEqual(response.status_code, 404, payload)
+
+    def test_page_size_is_capped(self):
+        with self.settings(API_MAX_PAGE_SIZE=4):
+            body = self.client.get("/api/products/?page_size=1000").json()
+        self.assertEqual(len(body["results"]), 4)
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(sub_name="Kulol")
+        self.plate = Product.objects.create(name="Tovoq katta", desc="Loydan", price=10, category=category)
+        self.jug = Product.objects.create(name="Ko‘za", desc="Tovoq bilan mos", price=5, category=category)
+
+    def test_search_ranks_name_matches_first(self):
+        body = self.client.get("/api/products/search/?q=tovoq").json()
+        self.assertEqual([p["id"] for p in body], [self.plate.id, self.jug.id])
+
+    def test_limit_is_bounded_and_validated(self):
+        for limit, expected in (("-1", [self.plate.id]), ("0", [self.plate.id]), ("1", [self.plate.id])):
+            body = self.client.get(f"/api/products/search/?q=tovoq&limit={limit}").json()
+            self.assertEqual([p["id"] for p in body], expected, limit)
+        self.assertEqual(self.client.get("/api/products/search/?q=tovoq&limit=ko‘p").status_code, 400)
+        self.assertEqual(len(self.client.get("/api/products/autocomplete/?q=tov&limit=-1").json()), 1)
+
+    def test_index_follows_save_and_delete(self):
+        self.plate.name = "Piyola"
+        self.plate.save()
+        self.assertEqual(self.client.get("/api/products/autocomplete/?q=piy").json(),
+                         [{"id": self.plate.id, "name": "Piyola"}])
+
+        self.plate.delete()
+        self.assertEqual(self.client.get("/api/products/autocomplete/?q=piy").json(), [])
+
+    def test_list_search_uses_index(self):
+        body = self.client.get("/api/products/?search=loyd").json()
+        self.assertEqual([p["id"] for p in body["results"]], [self.plate.id])
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(sub_name="Kulol")
+        self.user = User.objects.create(number="998901234567", name="Ali")
+        self.a = Product.objects.create(name="Tovoq", price="10.50", quantity=5, category=category)
+        self.b = Product.objects.create(name="Ko‘za", price="4.00", quantity=1, category=category)
+
+    def test_checkout_creates_order_items_and_total(self):
+        payload = {"user_id": self.user.id, "items": [
+            {"product_id": self.a.id, "quantity": 2},
+            {"product_id": self.b.id, "quantity": 1},
+            {"product_id": self.a.id, "quantity": 1},
+        ]}
+        response = self.client.post("/api/checkout/", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+
+        order = Order.objects.get()
+        self.assertEqual(str(order.final_price), "35.50")
+        self.assertEqual(dict(order.items.values_list("product_id", "quantity")), {self.a.id: 3, self.b.id: 1})
+        self.assertEqual((order.status, response.json()["status"]), (Order.PENDING, Order.PENDING))
+        self.assertEqual(dict(Product.objects.values_list("id", "quantity")), {self.a.id: 2, self.b.id: 0})
+
+    def test_out_of_stock_returns_per_line_errors_and_reserves_nothing(self):
+        payload = {"user_id": self.user.id, "items": [
+            {"product_id": self.a.id, "quantity": 4},
+            {"product_id": self.b.id, "quantity": 2},
+        ]}
+        response = self.client.post("/api/checkout/", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["items"], [{"product_id": self.b.id, "requested": 2, "available": 1}])
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(dict(Product.objects.values_list("id", "quantity")), {self.a.id: 5, self.b.id: 1})
+
+        response = self.client.post("/api/create-order_item/", {
+            "order_id": Order.objects.create(user=self.user, tracking_code="T1").id, "product_id": self.b.id, "quantity": 2,
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("quantity", response.json())
+
+    def test_expired_reservation_is_released_and_confirm_keeps_stock(self):
+        def checkout(quantity):
+            return self.client.post("/api/checkout/", {
+                "user_id": self.user.id, "items": [{"product_id": self.a.id, "quantity": quantity}],
+            }, content_type="application/json").json()["id"]
+
+        kept, expired = checkout(2), checkout(3)
+        self.assertEqual(self.client.post(f"/api/orders/{kept}/confirm/").status_code, 200)
+        Order.objects.filter(pk=expired).update(reserved_until=timezone.now() - timedelta(seconds=1))
+
+        call_command("release_expired_reservations", stdout=StringIO())
+        self.assertEqual(Product.objects.get(pk=self.a.pk).quantity, 3)
+        self.assertEqual(
+            dict(Order.objects.values_list("id", "status")), {kept: Order.CONFIRMED, expired: Order.EXPIRED},
+        )
+        self.assertEqual(ProductRanking.objects.get(product=self.a).sales, 2)
+        self.assertEqual(self.client.post(f"/api/orders/{expired}/confirm/").status_code, 409)
+
+        # qayta ishga tushirish hech narsani ikki marta qaytarmaydi
+        call_command("release_expired_reservations", stdout=StringIO())
+        Order.objects.filter(pk=expired).delete()
+        self.assertEqual(Product.objects.get(pk=self.a.pk).quantity, 3)
+        self.assertEqual(ProductRanking.objects.get(product=self.a).sales, 2)
+
+    def test_stock_changes_invalidate_cached_products_and_sync(self):
+        detail, listing = f"/api/products/{self.a.id}/", "/api/products/?fields=id,quantity"
+
+        def quantities():
+            return (self.client.get(detail).json()["quantity"],
+                    {row["id"]: row["quantity"] for row in self.client.get(listing).json()["results"]}[self.a.id])
+
+        self.assertEqual(quantities(), (5, 5))
+        touched = Product.objects.get(pk=self.a.pk).updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            order_id = self.client.post("/api/checkout/", {
+                "user_id": self.user.id, "items": [{"product_id": self.a.id, "quantity": 5}],
+            }, content_type="application/json").json()["id"]
+        self.assertEqual(quantities(), (0, 0))
+        # delta-sync ham ombor o‘zgarishini ko‘radi
+        self.assertGreater(Product.objects.get(pk=self.a.pk).updated_at, touched)
+
+        Order.objects.filter(pk=order_id).update(reserved_until=timezone.now() - timedelta(seconds=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("release_expired_reservations", stdout=StringIO())
+        self.assertEqual(quantities(), (5, 5))
+
+    def test_unknown_product_rejects_whole_cart(self):
+        payload = {"user_id": self.user.id, "items": [
+            {"product_id": self.a.id, "quantity": 1},
+            {"product_id": 9999, "quantity": 1},
+        ]}
+        response = self.client.post("/api/checkout/", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+
+    def test_price_snapshot_keeps_historic_totals(self):
+        order = Order.objects.create(user=self.user, tracking_code="T1")
+        item = OrderItem.objects.create(order=order, product=self.a, quantity=2)
+        order.refresh_from_db()
+        self.assertEqual(str(order.final_price), "21.00")
+
+        Product.objects.filter(pk=self.a.pk).update(price="99.00")
+        data = self.client.get(f"/api/orders/{order.id}/").json()
+        self.assertEqual(data["final_price"], "21.00")
+        self.assertEqual(data["items"][0]["price"], "10.50")
+
+        item.delete()
+        order.refresh_from_db()
+        self.assertEqual(str(order.final_price), "0.00")
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(sub_name="Kulol")
+        user = User.objects.create(number="998901234567", name="Ali")
+        for n in range(3):
+            order = Order.objects.create(user=user, tracking_code=f"T{n}")
+            for i in range(3):
+                product = Product.objects.create(name=f"P{n}{i}", price=i + 1, category=category)
+                OrderItem.objects.create(order=order, product=product, quantity=1)
+
+    def test_orders_use_compact_product_by_default(self):
+        with self.assertNumQueries(4):  # orders + user join, items, products, main images
+            body = self.client.get("/api/orders/").json()
+        product = body["results"][0]["items"][0]["product"]
+        self.assertEqual(set(product), {"id", "name", "price", "main_image"})
+
+    def test_fields_skip_serialization_and_prefetch(self):
+        with self.assertNumQueries(2):  # orders, items
+            body = self.client.get("/api/orders/?fields=id,items.quantity").json()
+        self.assertEqual(body["results"][0], {"id": body["results"][0]["id"], "items": [{"quantity": 1}] * 3})
+
+    def test_expand_gives_full_product(self):
+        body = self.client.get("/api/orders/?expand=items.product&fields=items.product.rating_count").json()
+        self.assertEqual(body["results"][0]["items"][0], {"product": {"rating_count": 0}})
+
+
+class LikeToggleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(number="998901234567", name="Ali")
+        self.product = Product.objects.create(name="Tovoq", price=1, category=Category.objects.create(sub_name="K"))
+
+    def toggle(self, product_id=None):
+        return self.client.post("/api/likes/toggle_like/", {
+            "user_number": self.user.number, "product": product_id or self.product.id,
+        }, content_type="application/json")
+
+    def test_toggle_maintains_likes_count_without_counting(self):
+        # user, savepoint, delete (SELECT), get_or_create (SELECT, savepoint, insert, release),
+        # F() update, ranking, count, release
+        with self.assertNumQueries(11):
+            body = self.toggle().json()
+        self.assertEqual((body["status"], body["likes_count"]), ("liked", 1))
+
+        with self.assertNumQueries(8):  # user, savepoint, SELECT, DELETE, F() update, ranking, count, release
+            body = self.toggle().json()
+        self.assertEqual((body["status"], body["likes_count"]), ("unliked", 0))
+        self.assertFalse(LikeProduct.objects.exists())
+
+    def test_unknown_product_is_rolled_back(self):
+        response = self.toggle(product_id=9999)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(LikeProduct.objects.exists())
+
+    def test_cascade_delete_keeps_count_in_sync(self):
+        self.toggle()
+        self.user.delete()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.likes_count, 0)
+
+    def test_liked_returns_id_set_with_version(self):
+        other = Product.objects.create(name="Ko‘za", price=1, category=self.product.category)
+        with self.captureOnCommitCallbacks(execute=True):  # raqam → id keshga tushadi (app.users)
+            self.toggle()
+        self.toggle(other.id)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/api/likes/liked/?user_number={self.user.number}")
+        body = response.json()
+        self.assertEqual(body["product_ids"], sorted([self.product.id, other.id]))
+
+        unchanged = self.client.get(f"/api/likes/liked/?user_number={self.user.number}",
+                                    HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(unchanged.status_code, 304)
+
+        self.toggle(other.id)
+        body = self.client.get(f"/api/likes/liked/?user_number={self.user.number}&products={other.id}").json()
+        self.assertEqual(body["product_ids"], [])
+        self.assertNotEqual(body["version"], response.json()["version"])
+
+
+class ProductFacetsTests(TestCase):
+    def setUp(self):
+        self.cups = Category.objects.create(sub_name="Piyola")
+        self.plates = Category.objects.create(sub_name="Tovoq")
+        for price in (10, 20, 30):
+            Product.objects.create(name=f"Piyola {price}", price=price, category=self.cups)
+        Product.objects.create(name="Tovoq", price=100, category=self.plates)
+
+    def test_counts_and_histogram_follow_filters(self):
+        body = self.client.get("/api/products/facets/?max_price=50&buckets=2").json()
+        self.assertEqual(body["count"], 3)
+        self.assertEqual(body["categories"], [{"id": self.cups.id, "sub_name": "Piyola", "count": 3}])
+        self.assertEqual([b["count"] for b in body["price"]["buckets"]], [1, 2])
+
+    def test_cached_until_products_change(self):
+        self.client.get("/api/products/facets/")
+        with self.assertNumQueries(0):
+            body = self.client.get("/api/products/facets/").json()
+        self.assertEqual(body["count"], 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Ko‘za", price=5, category=self.plates)
+        self.assertEqual(self.client.get("/api/products/facets/").json()["count"], 5)
+
+
+class TrackingCodeAllocatorTests(TransactionTestCase):
+    def test_blocks_are_disjoint_and_codes_unique(self):
+        a = BlockAllocator("test_seq", block_size=5)
+        b = BlockAllocator("test_seq", block_size=5)
+        values = [a.allocate() for _ in range(7)] + [b.allocate() for _ in range(7)]
+        self.assertEqual(len(set(values)), 14)
+        self.assertEqual(Sequence.objects.get(name="test_seq").value, 20)
+
+    def test_rolled_back_block_is_not_reused(self):
+        a = BlockAllocator("test_seq", block_size=5)
+        try:
+            with transaction.atomic():
+                a.allocate()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(a.allocate(), 1)
+        self.assertEqual(a.allocate(), 2)
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.product = Product.objects.create(
+            name="Tovoq", price=1, category=Category.objects.create(sub_name="Kulol")
+        )
+
+    def upload(self):
+        buffer = BytesIO()
+        Image.new("RGB", (1200, 800), "brown").save(buffer, "JPEG")
+        return SimpleUploadedFile("tovoq.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+    def test_upload_generates_variants_after_commit(self):
+        with override_settings(MEDIA_ROOT=self.media, IMAGE_VARIANTS_ASYNC=False):
+            with self.captureOnCommitCallbacks(execute=True):
+                image = ProductImage.objects.create(product=self.product, image=self.upload(), is_main=True)
+            data = self.client.get(f"/api/images/{image.id}/").json()
+
+        self.assertEqual(data["variants"]["thumb"]["webp"]["width"], 200)
+        self.assertEqual(data["variants"]["card"]["jpeg"]["height"], 400)
+        self.assertEqual(data["variants"]["full"]["webp"]["width"], 1200)  # kattalashtirilmaydi
+
+    def test_backfill_command_touches_product(self):
+        with override_settings(MEDIA_ROOT=self.media):
+            image = ProductImage.objects.create(product=self.product, image=self.upload())  # on_commit ishlamaydi
+            Product.objects.filter(pk=self.product.pk).update(updated_at=timezone.now() - timedelta(days=1))
+            generation = get_generation(product_generation(self.product.id))
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("generate_image_variants", "--workers", "1", stdout=StringIO(), stderr=StringIO())
+
+        image.refresh_from_db()
+        self.assertEqual(image.variants["source"], image.image.name)
+        self.assertGreater(Product.objects.get(pk=self.product.pk).updated_at, timezone.now() - timedelta(minutes=1))
+        self.assertNotEqual(get_generation(product_generation(self.product.id)), generation)
+
+    def test_background_failure_is_logged(self):
+        from .images import _run_in_worker, get_executor
+
+        with override_settings(MEDIA_ROOT=self.media), self.assertLogs("app.images", "ERROR") as logs:
+            get_executor().submit(_run_in_worker, "app.ProductImage", 1, "products/yoq.jpg").result()
+
+        self.assertIn("app.ProductImage #1 (products/yoq.jpg)", logs.output[0])
+        self.assertIn("Traceback", logs.output[0])
+
+
+class ReadReplicaRouterTests(TestCase):
+    def route(self, method, cookies=None, view_class=None, write=False):
+        from .db import ReadReplicaRouter, ReplicaRoutingMiddleware
+
+        router, seen = ReadReplicaRouter(), {}
+
+        def view(request):
+            if write:
+                router.db_for_write(Product)
+            seen["db"] = router.db_for_read(Product)
+            return HttpResponse()
+
+        view.cls = view_class
+        request = getattr(RequestFactory(), method.lower())("/api/products/")
+        request.COOKIES.update(cookies or {})
+        middleware = ReplicaRoutingMiddleware(lambda req: middleware.process_view(req, view, (), {}) or view(req))
+        response = middleware(request)
+        return seen["db"], response
+
+    @override_settings(DATABASE_REPLICAS=["replica1"])
+    def test_catalog_reads_go_to_replica_and_writes_pin_primary(self):
+        catalog = type("Catalog", (), {"read_replica": True})
+        self.assertEqual(self.route("GET", view_class=catalog)[0], "replica1")
+        self.assertEqual(self.route("GET", view_class=None)[0], "default")
+        self.assertEqual(self.route("GET", view_class=catalog, cookies={"db_pin": "1"})[0], "default")
+
+        db, response = self.route("POST", view_class=catalog, write=True)
+        self.assertEqual(db, "default")
+        self.assertIn("db_pin", response.cookies)
+
+
+HAS_TEST_REPLICA = "test_replica" in connections
+
+
+@skipUnless(HAS_TEST_REPLICA, "myproject.settings_test bilan ishga tushiring")
+@override_settings(DATABASE_REPLICAS=["test_replica"], RESPONSE_CACHE_ENABLED=False)
+class ReplicaDatabaseTests(TestCase):
+    """Haqiqiy ikkinchi SQLite fayl (``test_replica``, myproject.settings_test) — primary'dan farqli ma'lumot bilan.
+
+    Katalog GET'lari replica'dan o‘qiydi; yozuv primary'ga ketadi va pin
+    cookie bilan keyingi o‘qishlar ham primary'dan.
+    """
+
+    # o‘tkazib yuborilganda ham runner yo‘q alias'ni yaratishga urinmasin
+    databases = {"default", "test_replica"} if HAS_TEST_REPLICA else {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(sub_name="Primary")
+        Product.objects.create(name="Primary kosa", price=1, category=category)
+        category = Category.objects.using("test_replica").create(sub_name="Replica")
+        Product.objects.using("test_replica").create(name="Replica kosa", price=1, category=category)
+
+    def get(self, path):
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections["test_replica"]) as replica:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(primary), len(replica)
+
+    def test_reads_hit_replica_and_writes_pin_primary(self):
+        body, primary, replica = self.get("/api/products/")
+        self.assertEqual([p["name"] for p in body["results"]], ["Replica kosa"])
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+        # read_replica belgilanmagan view — primary
+        _, primary, replica = self.get("/api/orders/")
+        self.assertEqual((primary > 0, replica), (True, 0))
+
+        with CaptureQueriesContext(connections["test_replica"]) as replica_queries:
+            response = self.client.post("/api/categories/", {"sub_name": "Yangi"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(replica_queries), 0)
+        self.assertTrue(Category.objects.using("default").filter(sub_name="Yangi").exists())
+        self.assertFalse(Category.objects.using("test_replica").filter(sub_name="Yangi").exists())
+
+        # pin cookie — o‘zi yozganini ko‘rishi uchun keyingi o‘qishlar primary'dan
+        body, primary, replica = self.get("/api/categories/")
+        self.assertIn("Yangi", [c["sub_name"] for c in body])
+        self.assertEqual((primary > 0, replica), (True, 0))
+
+        self.client.cookies.pop("db_pin")
+        body, primary, replica = self.get("/api/categories/")
+        self.assertEqual(([c["sub_name"] for c in body], primary), (["Replica"], 0))
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(sub_name="Kulol")
+        user = User.objects.create(number="998901234567", name="Ali")
+        self.products = [Product.objects.create(name=f"P{i}", price=i, category=category) for i in range(5)]
+        self.order = Order.objects.create(user=user, tracking_code="T1")
+        OrderItem.objects.create(order=self.order, product=self.products[0], quantity=2)
+
+    async def test_async_endpoints_match_sync_ones(self):
+        for path in ("products/?ordering=price&page_size=2", "products/?search=p1&category=" + str(self.products[0].category_id),
+                     f"products/{self.products[1].id}/",
+                     "categories/", "category-scrolls/", f"orders/{self.order.id}/"):
+            sync_body = (await self.async_client.get(f"/api/{path}")).json()
+            async_response = await self.async_client.get(f"/api/async/{path}")
+            self.assertEqual(async_response.status_code, 200, path)
+            body = async_response.json()
+            if "next" in sync_body:
+                # next/previous havolalari prefiks bilan farq qiladi
+                self.assertEqual(body["results"], sync_body["results"])
+            else:
+                self.assertEqual(body, sync_body, path)
+
+    async def test_async_detail_404(self):
+        response = await self.async_client.get("/api/async/products/9999/")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_invalid_filters_return_400_like_sync(self):
+        for query in ("category=abc", "min_price=x", "max_price=1e", "quantity=ko‘p", "category=9999"):
+            sync_response = await self.async_client.get(f"/api/products/?{query}")
+            async_response = await self.async_client.get(f"/api/async/products/?{query}")
+            self.assertEqual((sync_response.status_code, async_response.status_code), (400, 400), query)
+            self.assertEqual(async_response.json().keys(), sync_response.json().keys(), query)
+
+        body = (await self.async_client.get("/api/async/products/?min_price=2&max_price=3&ordering=price")).json()
+        self.assertEqual([p["id"] for p in body["results"]], [self.products[2].id, self.products[3].id])
+
+    async def test_bad_cursor_is_client_error_like_sync(self):
+        crafted = urlsafe_b64encode(b'{"v":"abc","id":1}').decode()
+        for query in ("cursor=zzz", f"ordering=price&cursor={crafted}"):
+            sync_response = await self.async_client.get(f"/api/products/?{query}")
+            async_response = await self.async_client.get(f"/api/async/products/?{query}")
+            self.assertEqual((sync_response.status_code, async_response.status_code), (404, 404), query)
+            self.assertEqual(async_response.json(), sync_response.json(), query)
+
+
+@override_settings(QUERY_PROFILER_ENABLED=True, QUERY_PROFILER_SAMPLE_RATE=1.0)
+class QueryProfilerTests(TestCase):
+    def setUp(self):
+        product = Product.objects.create(name="Tovoq", price=1, category=Category.objects.create(sub_name="Kulol"))
+        for i in range(4):
+            user = User.objects.create(number=f"99890123456{i}", name=f"U{i}")
+            LikeProduct.objects.create(user=user, product=product)
+
+    def test_server_timing_and_n_plus_one_origin(self):
+        from .profiling import QueryProfilerMiddleware
+        from .serializers import LikeProductSerializer
+
+        def naive_view(request):
+            likes = LikeProduct.objects.all()  # ataylab select_related'siz — har bir user alohida query
+            return HttpResponse(json.dumps(LikeProductSerializer(likes, many=True).data))
+
+        with self.assertLogs("app.profiling", level="INFO") as logs:
+            response = QueryProfilerMiddleware(naive_view)(RequestFactory().get("/naive-likes/"))
+
+        self.assertIn('db;dur=', response["Server-Timing"])
+        self.assertEqual(response["X-N-Plus-One"], "1")
+        warning = next(line for line in logs.output if line.startswith("WARNING"))
+        self.assertIn("LikeProductSerializer.user_display", warning)
+        sample = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((sample["path"], sample["queries"]), ("/naive-likes/", 5))
+
+    def test_likes_endpoint_has_no_n_plus_one(self):
+        with self.assertLogs("app.profiling", level="INFO") as logs, self.assertNumQueries(1):
+            response = self.client.get("/api/likes/")
+        self.assertEqual(len(response.json()["results"]), 4)
+        self.assertNotIn("X-N-Plus-One", response)
+        self.assertFalse(any(line.startswith("WARNING") for line in logs.output))
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_seed_and_benchmark_round_trip(self):
+        call_command(
+            "seed_benchmark_data", products=30, users=10, ratings=40, likes=20, orders=15,
+            categories=3, scrolls=2, batch_size=7, stdout=StringIO(),
+        )
+        product = Product.objects.filter(rating_count__gt=0).first()
+        self.assertEqual(product.rating_count, product.ratings.count())
+        self.assertEqual(sum(Product.objects.values_list("likes_count", flat=True)), LikeProduct.objects.count())
+        ratings, orders = ProductRate.objects.count(), Order.objects.count()
+
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        output = f"{tmp}/baseline.json"
+        call_command("benchmark_api", iterations=4, warmup=2, output=output, response_cache=False,
+                     only=["product_list", "toggle_like", "rating_create", "checkout"], stdout=StringIO())
+        call_command("benchmark_api", iterations=2, warmup=0, output=f"{tmp}/next.json", compare=output,
+                     only=["product_list"], stdout=StringIO())
+
+        with open(output, encoding="utf-8") as fh:
+            report = json.load(fh)
+        row = report["results"]["product_list"]
+        self.assertEqual(row["statuses"], {"200": 4})
+        self.assertGreater(row["queries"], 0)
+        self.assertLessEqual(row["p50_ms"], row["p99_ms"])
+        self.assertGreaterEqual(row["raw_bytes"], row["bytes"])  # sukut bo‘yicha gzip
+        self.assertIn("render_ms", row)
+        self.assertEqual(report["results"]["checkout"]["statuses"], {"201": 4})
+        # benchmark yozuvlari tozalanadi
+        self.assertEqual((ProductRate.objects.count(), Order.objects.count()), (ratings, orders))
+
+
+class CatalogImportExportTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        Category.objects.create(sub_name="Kosalar")
+
+    def write(self, name, text):
+        path = f"{self.tmp}/{name}"
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        return path
+
+    def test_import_upserts_by_sku_and_resolves_names(self):
+        path = self.write("catalog.csv", (
+            "sku,name,desc,price,quantity,category,category_scroll\n"
+            "K-1,Rishton kosa,Ko‘k naqsh,12.5,10,kosalar,Yangi\n"
+            "K-2,Choynak,,30,5,Choynaklar,\n"
+            "K-3,Buzuq,,abc,1,Kosalar,\n"
+            ",Tovoq,,8,2,Kosalar,Yangi\n"
+        ))
+        err = StringIO()
+        call_command("import_catalog", path, batch_size=2, stdout=StringIO(), stderr=err)
+
+        self.assertIn("4-qator", err.getvalue())
+        self.assertEqual(Product.objects.count(), 3)
+        self.assertEqual(Category.objects.count(), 2)  # "kosalar" mavjudiga tushdi
+        kosa = Product.objects.get(sku="K-1")
+        self.assertEqual(kosa.category.sub_name, "Kosalar")
+        self.assertEqual(kosa.category_scroll.name, "Yangi")
+        self.assertEqual(Product.objects.get(name="Tovoq").category_scroll_id, kosa.category_scroll_id)
+
+        # qayta import — yangilanadi, takrorlanmaydi; qidiruv indeksi ham yangilanadi
+        path = self.write("update.csv", "sku,name,price,quantity,category\nK-1,Rishton lagan,15,7,Kosalar\n")
+        call_command("import_catalog", path, stdout=StringIO())
+        kosa.refresh_from_db()
+        self.assertEqual((kosa.name, kosa.price, kosa.quantity), ("Rishton lagan", 15, 7))
+        self.assertEqual(Product.objects.count(), 3)
+        response = self.client.get("/api/products/search/?q=lagan")
+        self.assertEqual([row["id"] for row in response.json()], [kosa.id])
+
+    def test_non_finite_numbers_are_row_errors(self):
+        path = self.write("nan.csv", (
+            "sku,name,price,quantity,category\n"
+            "N-1,Kosa,NaN,1,Kosalar\n"
+            "N-2,Lagan,Infinity,1,Kosalar\n"
+            "N-3,Tovoq,5,inf,Kosalar\n"
+            "N-4,Ko‘za,5,1e20,Kosalar\n"
+            "N-5,Choynak,7,2,Kosalar\n"
+        ))
+        err = StringIO()
+        call_command("import_catalog", path, stdout=StringIO(), stderr=err)
+
+        for line in ("2-qator", "3-qator", "4-qator", "5-qator"):
+            self.assertIn(line, err.getvalue())
+        self.assertEqual(list(Product.objects.values_list("sku", flat=True)), ["N-5"])
+
+    def test_strict_import_aborts(self):
+        path = self.write("bad.csv", "sku,name,price,category\nK-1,Kosa,-1,Kosalar\n")
+        with self.assertRaisesMessage(CommandError, "2-qator"):
+            call_command("import_catalog", path, strict=True, stdout=StringIO())
+
+    def test_export_round_trip(self):
+        category = Category.objects.get()
+        Product.objects.create(sku="K-9", name="Xum", desc="Katta", price="99.90", quantity=3, category=category)
+        output = f"{self.tmp}/out.jsonl"
+        call_command("export_catalog", output=output, format="jsonl", chunk_size=1, stderr=StringIO())
+        with open(output, encoding="utf-8") as fh:
+            rows = [json.loads(line) for line in fh]
+        self.assertEqual(rows, [{
+            "sku": "K-9", "name": "Xum", "desc": "Katta", "price": "99.90",
+            "quantity": 3, "category": "Kosalar", "category_scroll": None,
+        }])
+
+        csv_path = f"{self.tmp}/out.csv"
+        call_command("export_catalog", output=csv_path, stderr=StringIO())
+        Product.objects.all().delete()
+        call_command("import_catalog", csv_path, stdout=StringIO())
+        self.assertEqual(Product.objects.get(sku="K-9").desc, "Katta")
+
+
+@override_settings(SYNC_WATERMARK_LAG_SECONDS=0)
+class DeltaSyncTests(TestCase):
+    def sync(self, since=None):
+        response = self.client.get("/api/sync/", {"since": since} if since else {})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+    def test_full_then_delta_with_tombstones(self):
+        category = Category.objects.create(sub_name="Kosalar")
+        keep = Product.objects.create(name="Kosa", price=5, category=category)
+        gone = Product.objects.create(name="Lagan", price=7, category=category)
+
+        rows = self.sync()
+        self.assertEqual(rows[0], {"type": "reset"})
+        self.assertEqual([(r["type"], r["data"]["id"]) for r in rows[1:-1]],
+                         [("category", category.id), ("product", keep.id), ("product", gone.id)])
+        watermark = rows[-1]["value"]
+        self.assertTrue(watermark.endswith("Z"))
+
+        # hech narsa o‘zgarmadi — faqat watermark
+        self.assertEqual([r["type"] for r in self.sync(watermark)], ["watermark"])
+
+        ProductImage.objects.create(product=keep, image="products/x.jpg", variants={"source": "products/x.jpg"})
+        gone_id = gone.id
+        gone.delete()
+        rows = self.sync(watermark)
+        self.assertEqual(rows[0]["type"], "product")
+        self.assertEqual(rows[0]["data"]["id"], keep.id)
+        self.assertEqual(len(rows[0]["data"]["images"]), 1)
+        self.assertEqual(rows[1], {"type": "tombstone", "model": "product", "id": gone_id})
+
+    def test_bad_watermark(self):
+        self.assertEqual(self.client.get("/api/sync/", {"since": "kecha"}).status_code, 400)
+
+
+class QueryPlanTests(TestCase):
+    """Har bir route SQL'i uchun EXPLAIN QUERY PLAN — katta jadvalda to‘liq skan bo‘lmasin.
+
+    Indekssiz SCAN faqat LIMIT bilan va vaqtinchalik saralashsiz (ya'ni PK tartibida
+    erta to‘xtaydigan) bo‘lsa ruxsat etiladi.
+    """
+
+    LARGE_TABLES = {
+        "app_product", "app_productrate", "app_likeproduct", "app_order", "app_orderitem", "app_user",
+        "app_productranking",
+    }
+    _SCAN_RE = re.compile(r"^SCAN (\w+)(.*)$")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(sub_name="Kosalar")
+        cls.user = User.objects.create(number="998901234567", name="Ali")
+        cls.other_user = User.objects.create(number="998907654321", name="Vali")
+        cls.products = [
+            Product.objects.create(name=f"Rishton kosa {i}", price=10 + i, quantity=i, category=cls.category)
+            for i in range(3)
+        ]
+        LikeProduct.objects.create(user=cls.user, product=cls.products[0])
+        ProductRate.objects.create(user=cls.user, product=cls.products[0], rate=5)
+        cls.order = Order.objects.create(user=cls.user, tracking_code="T-1")
+        OrderItem.objects.create(order=cls.order, product=cls.products[1], quantity=2)
+
+    def full_scans(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            details = [row[-1] for row in cursor.fetchall()]
+        sorts = any("USE TEMP B-TREE" in detail for detail in details)
+        bad = []
+        for detail in details:
+            match = self._SCAN_RE.match(detail)
+            if not match or match.group(1) not in self.LARGE_TABLES or "USING" in match.group(2):
+                continue
+            if " LIMIT " in sql and not sorts:
+                continue  # PK tartibida, LIMIT'da to‘xtaydi
+            bad.append(detail)
+        return bad
+
+    def assert_no_full_scans(self, method, path, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            if method == "get":
+                response = self.client.get(path)
+            else:
+                response = self.client.post(path, data, content_type="application/json")
+        self.assertLess(response.status_code, 400, path)
+        for query in ctx.captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            self.assertEqual(self.full_scans(sql), [], f"{method.upper()} {path}\n{sql}")
+
+    def test_read_routes_use_indexes(self):
+        product = self.products[0]
+        for path in (
+            "/api/products/",
+            "/api/products/?ordering=price",
+            "/api/products/?ordering=-quantity",
+            f"/api/products/?category={self.category.id}",
+            f"/api/products/?category={self.category.id}&ordering=-created_at",
+            "/api/products/?min_price=10&max_price=11",
+            "/api/products/?quantity=2",
+            "/api/products/?search=kosa",
+            f"/api/products/{product.id}/",
+            "/api/products/search/?q=kosa",
+            "/api/products/autocomplete/?q=ris",
+            "/api/orders/",
+            f"/api/orders/{self.order.id}/?expand=items.product",
+            f"/api/orders/history/?user_number={self.user.number}",
+            f"/api/likes/?user__number={self.user.number}",
+            f"/api/likes/?product={product.id}",
+            f"/api/likes/liked/?user_number={self.user.number}&products=all",
+            "/api/sync/?since=2026-01-01T00:00:00Z",
+            "/api/products/rankings/?metric=rating",
+            f"/api/products/rankings/?metric=likes&category={self.category.id}",
+            "/api/products/rankings/?metric=sales&category_scroll=1",
+        ):
+            with self.subTest(path=path):
+                self.assert_no_full_scans("get", path)
+
+    def test_write_routes_use_indexes(self):
+        product = self.products[2]
+        self.assert_no_full_scans("post", "/api/likes/toggle_like/", {"user_number": self.user.number, "product": product.id})
+        self.assert_no_full_scans("post", "/api/ratings/", {"user_number": self.other_user.number, "product": product.id, "rate": 4})
+        self.assert_no_full_scans("post", "/api/checkout/", {
+            "user_id": self.user.id, "items": [{"product_id": product.id, "quantity": 1}],
+        })
+
+
+class FastAdminChangelistTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User as AuthUser
+
+        admin_user = AuthUser.objects.create_superuser("admin", "a@example.com", "pass")
+        self.client.force_login(admin_user)
+        category = Category.objects.create(sub_name="Kosalar")
+        self.product = Product.objects.create(sku="RK-1", name="Rishton kosa", price=10, category=category)
+        self.user = User.objects.create(number="998901112233", name="Ali")
+
+    def add_orders(self, count):
+        for i in range(count):
+            order = Order.objects.create(user=self.user, tracking_code=f"TRK-{Order.objects.count():04d}")
+            OrderItem.objects.create(order=order, product=self.product, quantity=1)
+
+    def changelist_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_query_count_is_constant(self):
+        self.add_orders(2)
+        few, _ = self.changelist_queries("/admin/app/orderitem/")
+        self.add_orders(8)
+        many, response = self.changelist_queries("/admin/app/orderitem/")
+        self.assertEqual(few, many)
+        self.assertContains(response, "Order #10 - Ali")
+
+    def test_prefix_and_fts_search(self):
+        self.add_orders(3)
+        _, response = self.changelist_queries("/admin/app/order/?q=TRK-0001")
+        self.assertEqual([o.tracking_code for o in response.context["cl"].result_list], ["TRK-0001"])
+        _, response = self.changelist_queries("/admin/app/order/?q=99890111")
+        self.assertEqual(len(response.context["cl"].result_list), 3)
+        _, response = self.changelist_queries("/admin/app/product/?q=risht")
+        self.assertEqual(list(response.context["cl"].result_list), [self.product])
+        _, response = self.changelist_queries("/admin/app/product/?q=RK-")
+        self.assertEqual(list(response.context["cl"].result_list), [self.product])
+
+    @override_settings(ADMIN_COUNT_THRESHOLD=3)
+    def test_estimated_count_and_seek_paging(self):
+        from django.contrib import admin
+
+        order_admin = admin.site._registry[Order]
+        self.addCleanup(setattr, order_admin, "list_per_page", order_admin.list_per_page)
+        order_admin.list_per_page = 2
+        self.add_orders(7)
+        Order.objects.filter(tracking_code="TRK-0000").delete()  # MAX(id) taxmin — 7
+        expected = list(Order.objects.order_by("-created_at", "-pk").values_list("tracking_code", flat=True))
+
+        def page(number):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(f"/admin/app/order/?p={number}")
+            cl = response.context["cl"]
+            self.assertEqual(cl.result_count, 7)
+            sql = " ".join(q["sql"] for q in ctx.captured_queries)
+            self.assertNotIn("COUNT(", sql)
+            return [o.tracking_code for o in cl.result_list], sql
+
+        # ketma-ket sahifalar oldingi sahifa bookmark'idan — OFFSET'siz
+        for number in (1, 2, 3):
+            codes, sql = page(number)
+            self.assertEqual(codes, expected[(number - 1) * 2:number * 2])
+            self.assertNotIn("OFFSET", sql)
+
+        # bookmark'siz uzoq sahifa — OFFSET fallback, natija bir xil
+        cache.clear()
+        codes, sql = page(3)
+        self.assertEqual(codes, expected[4:6])
+        self.assertIn("OFFSET", sql)
+
+        _, response = self.changelist_queries("/admin/app/order/?q=TRK")
+        self.assertEqual(response.context["cl"].result_count, 4)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(sub_name="Kosalar")
+        self.product = Product.objects.create(name="Kosa", price=5, category=self.category)
+        self.other = Product.objects.create(name="Lagan", price=7, category=self.category)
+        self.user = User.objects.create(number="998901234567", name="Ali")
+
+    def test_hit_and_conditional_requests_skip_the_database(self):
+        first = self.client.get("/api/products/?ordering=price&fields=id,name")
+        self.assertTrue(first["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", first)
+
+        with self.assertNumQueries(0):
+            # parametrlar tartibi kalitga ta'sir qilmaydi
+            again = self.client.get("/api/products/?fields=id,name&ordering=price")
+            not_modified = self.client.get("/api/products/?ordering=price&fields=id,name", HTTP_IF_NONE_MATCH=first["ETag"])
+            since = self.client.get("/api/products/?ordering=price&fields=id,name", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(again.content, first.content)
+        self.assertEqual((not_modified.status_code, not_modified.content), (304, b""))
+        self.assertEqual(since.status_code, 304)
+
+    def test_signals_invalidate_precisely(self):
+        detail = f"/api/products/{self.product.id}/"
+        other_detail = f"/api/products/{self.other.id}/"
+        for path in (detail, other_detail, "/api/products/", "/api/categories/"):
+            self.client.get(path)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductRate.objects.create(user=self.user, product=self.product, rate=4)
+        self.assertEqual(self.client.get(detail).json()["rating_count"], 1)
+        self.assertEqual(self.client.get("/api/products/").json()["results"][-1]["rating_count"], 1)
+        with self.assertNumQueries(0):
+            self.client.get(other_detail)
+            self.client.get("/api/categories/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/likes/toggle_like/", {"user_number": self.user.number, "product": self.product.id})
+        self.assertEqual(self.client.get(detail).json()["likes_count"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImage.objects.create(product=self.other, image="products/x.jpg", variants={"source": "products/x.jpg"})
+        self.assertEqual(len(self.client.get(other_detail).json()["images"]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.sub_name = "Idishlar"
+            self.category.save()
+        self.assertEqual(self.client.get("/api/categories/").json()[0]["sub_name"], "Idishlar")
+
+    def test_like_changes_validators_of_detail_and_list(self):
+        Product.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        detail = self.client.get(f"/api/products/{self.product.id}/")
+        listing = self.client.get("/api/products/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/likes/toggle_like/", {"user_number": self.user.number, "product": self.product.id})
+
+        response = self.client.get(f"/api/products/{self.product.id}/", HTTP_IF_MODIFIED_SINCE=detail["Last-Modified"])
+        self.assertEqual((response.status_code, response.json()["likes_count"]), (200, 1))
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=listing["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({p["id"]: p["likes_count"] for p in response.json()["results"]}[self.product.id], 1)
+
+    def test_generations_bump_only_after_commit(self):
+        generation = get_generation(product_generation(self.product.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductRate.objects.create(user=self.user, product=self.product, rate=4)
+            # commit'gacha oraliqdagi GET eski ma'lumotni yangi avlod ostida keshlamasin
+            self.assertEqual(get_generation(product_generation(self.product.id)), generation)
+        self.assertNotEqual(get_generation(product_generation(self.product.id)), generation)
+
+    def test_delete_moves_last_modified_forward(self):
+        first = self.client.get("/api/products/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.delete()
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 1)
+        self.assertGreaterEqual(parse_http_date(response["Last-Modified"]), parse_http_date(first["Last-Modified"]))
+
+    def test_generation_bump_in_another_worker_reaches_this_one(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        local = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "worker-a"}
+        shared = {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": tmp}
+        detail = f"/api/products/{self.product.id}/"
+        with override_settings(CACHES={"default": local, "responses": shared}):
+            self.assertEqual(self.client.get(detail).json()["name"], "Kosa")
+            Product.objects.filter(pk=self.product.pk).update(name="Kosa 2")
+            # boshqa worker (o‘z LocMem'i bilan) productni saqlab avlodni oshirdi
+            FileBasedCache(tmp, {}).incr(f"gen:product:{self.product.id}")
+            self.assertEqual(self.client.get(detail).json()["name"], "Kosa 2")
+
+
+class RendererCompressionTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(sub_name="Kosalar")
+        for i in range(15):
+            Product.objects.create(name=f"Rishton kosa {i}", desc="Ko‘k naqsh " * 10, price="12.50", category=category)
+
+    def test_fast_json_matches_drf_json(self):
+        from rest_framework.renderers import JSONRenderer
+
+        from .renderers import FastJSONRenderer
+        from .serializers import ProductSerializer
+
+        data = ProductSerializer(Product.objects.all(), many=True).data
+        fast = FastJSONRenderer().render(data)
+        self.assertEqual(fast, JSONRenderer().render(data))
+
+    def test_gzip_above_threshold_only(self):
+        response = self.client.get("/api/products/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertTrue(response["ETag"].startswith("W/"))
+        # zaif ETag ham 304 beradi
+        again = self.client.get("/api/products/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        small = self.client.get("/api/categories/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(small.has_header("Content-Encoding"))
+
+    def test_msgpack_by_accept(self):
+        try:
+            import msgpack
+        except ImportError:
+            self.skipTest("msgpack o‘rnatilmagan")
+        response = self.client.get("/api/products/", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(len(msgpack.unpackb(response.content)["results"]), 15)
+
+
+class ProductRankingTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(sub_name="Kosalar")
+        self.other_category = Category.objects.create(sub_name="Choynaklar")
+        self.scroll = CategoryScroll.objects.create(name="Yangi")
+        self.user = User.objects.create(number="998901234567", name="Ali")
+        self.kosa = Product.objects.create(
+            name="Kosa", price="10.00", quantity=10, category=self.category, category_scroll=self.scroll,
+        )
+        self.tovoq = Product.objects.create(name="Tovoq", price="12.00", quantity=10, category=self.category)
+        self.choynak = Product.objects.create(name="Choynak", price="30.00", category=self.other_category)
+
+    def ranking(self, product):
+        return ProductRanking.objects.get(product=product)
+
+    def get(self, query):
+        response = self.client.get(f"/api/products/rankings/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return [(item["id"], item["score"]) for item in response.json()]
+
+    def test_bayesian_average_damps_few_ratings(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductRate.objects.create(user=self.user, product=self.kosa, rate=5)
+            for i, rate in enumerate([5, 5, 5, 5, 4, 5, 5, 5]):
+                user = User.objects.create(number=f"99891000000{i}", name=f"U{i}")
+                ProductRate.objects.create(user=user, product=self.tovoq, rate=rate)
+
+        # bitta 5 baho: (5*3 + 5) / 6 = 3.33; sakkizta ~4.9: (15 + 39) / 13 = 4.15
+        self.assertAlmostEqual(self.ranking(self.kosa).rating_score, 20 / 6)
+        self.assertEqual([pk for pk, _ in self.get("metric=rating")], [self.tovoq.id, self.kosa.id])
+
+        rate = ProductRate.objects.get(product=self.kosa)
+        rate.rate = 1
+        rate.save()
+        self.assertAlmostEqual(self.ranking(self.kosa).rating_score, 16 / 6)
+        with self.captureOnCommitCallbacks(execute=True):
+            rate.delete()
+        self.assertEqual(self.get("metric=rating"), [(self.tovoq.id, 54 / 13)])
+
+        with override_settings(RANKINGS_BAYESIAN=False):
+            call_command("rebuild_rankings", stdout=StringIO())
+            self.assertAlmostEqual(self.ranking(self.tovoq).rating_score, 39 / 8)
+
+    def test_likes_and_sales_are_incremental_and_partitioned(self):
+        LikeProduct.objects.create(user=self.user, product=self.choynak)
+        like = LikeProduct.objects.create(user=self.user, product=self.kosa)
+        other = User.objects.create(number="998907654321", name="Vali")
+        LikeProduct.objects.create(user=other, product=self.kosa)
+        self.assertEqual(self.get("metric=likes"), [(self.kosa.id, 2), (self.choynak.id, 1)])
+        self.assertEqual(self.get(f"metric=likes&category={self.other_category.id}"), [(self.choynak.id, 1)])
+        self.assertEqual(self.get(f"metric=likes&category_scroll={self.scroll.id}"), [(self.kosa.id, 2)])
+        like.delete()
+        self.assertEqual(self.ranking(self.kosa).likes, 1)
+
+        response = self.client.post("/api/checkout/", {
+            "user_id": self.user.id, "items": [{"product_id": self.tovoq.id, "quantity": 3}, {"product_id": self.kosa.id, "quantity": 1}],
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        item = OrderItem.objects.create(order_id=response.json()["id"], product=self.choynak, quantity=2)
+        self.assertEqual(self.get("metric=sales&limit=2"), [(self.tovoq.id, 3), (self.choynak.id, 2)])
+
+        item = OrderItem.objects.get(pk=item.pk)
+        item.product, item.quantity = self.kosa, 5
+        item.save()
+        self.assertEqual((self.ranking(self.choynak).sales, self.ranking(self.kosa).sales), (0, 6))
+        Order.objects.all().delete()
+        self.assertEqual(self.get("metric=sales"), [])
+
+    def test_category_move_and_rebuild(self):
+        self.kosa.category = self.other_category
+        self.kosa.save()
+        self.assertEqual(self.ranking(self.kosa).category_id, self.other_category.id)
+
+        LikeProduct.objects.create(user=self.user, product=self.kosa)
+        ProductRanking.objects.update(likes=0, category=self.category)
+        call_command("rebuild_rankings", stdout=StringIO())
+        self.assertEqual((self.ranking(self.kosa).likes, self.ranking(self.kosa).category_id), (1, self.other_category.id))
+
+    def test_rejects_unknown_metric(self):
+        self.assertEqual(self.client.get("/api/products/rankings/?metric=views").status_code, 400)
+        self.assertEqual(self.client.get("/api/products/rankings/?limit=x").status_code, 400)
+
+    def test_rating_top_reads_only_rated_index_rows(self):
+        for i in range(20):
+            Product.objects.create(name=f"Bahosiz {i}", price=1, category=self.category)
+        ProductRate.objects.create(user=self.user, product=self.kosa, rate=1)  # bali prior'dan past
+
+        for kwargs, index in (({}, "ranking_rating_idx"), ({"category": self.category.id}, "ranking_cat_rating_idx")):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual([pk for pk, _ in rankings.top("rating", limit=5, **kwargs)], [self.kosa.id])
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + ctx.captured_queries[0]["sql"])
+                plan = " ".join(row[-1] for row in cursor.fetchall())
+                cursor.execute("SELECT sql FROM sqlite_master WHERE name = %s", [index])
+                definition = cursor.fetchone()[0]
+            # qisman indeks: bahosiz qatorlar indeksda yo‘q — LIMIT'gacha faqat baholanganlar o‘qiladi
+            self.assertIn(index, plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+            self.assertIn('WHERE "rating_count" > 0', definition)
+
+
+class UserResolutionTests(TestCase):
+    def setUp(self):
+        user_ids.clear()
+        self.addCleanup(user_ids.clear)
+        self.category = Category.objects.create(sub_name="Kosalar")
+        self.product = Product.objects.create(name="Kosa", price=5, category=self.category)
+        self.user = User.objects.create(number="+998 (90) 123-45-67", name="Ali")
+
+    def test_normalization(self):
+        self.assertEqual(self.user.number, "+998901234567")
+        for value in ("998901234567", "901234567", "90 123 45 67", "00998901234567", "8 90 123 45 67", "+998.90.123.45.67"):
+            self.assertEqual(normalize_number(value), "+998901234567", value)
+        self.assertEqual(normalize_number("+1 (202) 555-0143"), "+12025550143")
+        for value in ("", "12345", "+0123456789", "99890abc4567", "+1234567890123456"):
+            with self.assertRaises(ValueError):
+                normalize_number(value)
+
+    def test_unparsable_legacy_number_still_saves_when_untouched(self):
+        User.objects.filter(pk=self.user.pk).update(number="eski-raqam")  # migratsiya tuzata olmagan qiymat
+        user = User.objects.get(pk=self.user.pk)
+        user.name = "Ali aka"
+        user.save()
+        user.full_clean()
+        self.assertEqual(User.objects.get(pk=user.pk).number, "eski-raqam")
+
+        user.number = "yangi-xato"
+        with self.assertRaises(ValidationError):
+            user.full_clean()
+        with self.assertRaises(ValueError):
+            user.save()
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = UserIdCache(2)
+        cache.set("+1", 1)
+        cache.set("+2", 2)
+        cache.get("+1")
+        cache.set("+3", 3)
+        self.assertEqual((cache.get("+1"), cache.get("+2"), cache.get("+3"), len(cache)), (1, None, 3, 2))
+
+    def test_cache_hit_and_invalidation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(resolve("901234567"), self.user.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve("+998 90 123 45 67"), self.user.id)
+
+        self.user.number = "998907654321"
+        self.user.save()
+        self.assertIsNone(resolve("998901234567"))
+        self.assertEqual(resolve("907654321"), self.user.id)
+        self.user.delete()
+        self.assertIsNone(resolve("907654321"))
+
+    def test_rolled_back_user_is_not_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                user = User.objects.create(number="998911111111", name="Vali")
+                self.assertEqual(resolve("998911111111"), user.id)
+                transaction.set_rollback(True)
+        self.assertEqual(len(user_ids), 0)
+        self.assertIsNone(resolve("998911111111"))
+
+    def test_resolve_many_is_one_query(self):
+        other = User.objects.create(number="998911111111", name="Vali")
+        with self.assertNumQueries(1):
+            found = resolve_many(["90 123 45 67", "+998911111111", "xato", "998999999999"])
+        self.assertEqual(found, {"+998901234567": self.user.id, "+998911111111": other.id})
+
+    def test_numbers_filter_resolves_in_bulk(self):
+        other = User.objects.create(number="998911111111", name="Vali")
+        User.objects.create(number="998922222222", name="Sardor")
+        query = {"numbers": "90 123 45 67,+998911111111,xato,998999999999"}
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(2):  # IN bo‘yicha id'lar, ro‘yxat
+            body = self.client.get("/api/users/", query).json()
+        self.assertEqual(sorted(u["id"] for u in body), [self.user.id, other.id])
+
+        with self.assertNumQueries(1):  # topilgan raqamlar id'lari LRU'dan
+            self.assertEqual(len(self.client.get("/api/users/", {"numbers": "+998901234567,998911111111"}).json()), 2)
+
+    def test_api_treats_spellings_as_one_user(self):
+        response = self.client.post("/api/users/", {"number": "90 123 45 67", "name": "Dublikat"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("number", response.json())
+        self.assertEqual(self.client.post("/api/users/", {"number": "123", "name": "X"}).status_code, 400)
+        self.assertEqual(len(self.client.get("/api/users/?number=901234567").json()), 1)
+
+        response = self.client.post("/api/likes/toggle_like/", {"user_number": "998901234567", "product": self.product.id})
+        self.assertEqual(response.json()["like"]["user_display"], "+998901234567")
+        body = self.client.get("/api/likes/liked/", {"user_number": "+998 (90) 123-45-67"}).json()
+        self.assertEqual((body["user_number"], body["product_ids"]), ("+998901234567", [self.product.id]))
+        self.assertEqual(len(self.client.get("/api/likes/", {"user__number": "90-123-45-67"}).json()["results"]), 1)
+        response = self.client.post("/api/likes/toggle_like/", {"user_number": "12", "product": self.product.id})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post("/api/ratings/", {"user_number": "8 90 123 45 67", "product": self.product.id, "rate": 5})
+        self.assertEqual((response.status_code, response.json()["user_number"]), (201, "+998901234567"))
+        self.assertEqual(ProductRate.objects.get().user, self.user)
+        response = self.client.post("/api/ratings/", {"user_number": "901234567", "product": self.product.id, "rate": 4})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/api/ratings/", {"user_number": "998999999999", "product": self.product.id, "rate": 4})
+        self.assertEqual(response.json(), {"user_number": ["Bunday foydalanuvchi topilmadi!"]})
+
+
+class OrderHistoryTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(sub_name="Kosalar")
+        self.kosa = Product.objects.create(name="Kosa", price="10.50", category=category)
+        self.tovoq = Product.objects.create(name="Tovoq", price="4.00", category=category)
+        self.user = User.objects.create(number="998901234567", name="Ali")
+        other = User.objects.create(number="998907654321", name="Vali")
+        OrderItem.objects.create(order=Order.objects.create(user=other, tracking_code="V-1"), product=self.kosa, quantity=9)
+
+        self.orders = []
+        for n, lines in enumerate([[(self.kosa, 2)], [(self.kosa, 1), (self.tovoq, 3)], [(self.tovoq, 5)]]):
+            order = Order.objects.create(user=self.user, tracking_code=f"A-{n}")
+            for product, quantity in lines:
+                OrderItem.objects.create(order=order, product=product, quantity=quantity)
+            self.orders.append(order)
+        # narx o‘zgarsa tarix summasi o‘zgarmaydi (price snapshot)
+        Product.objects.filter(pk=self.kosa.pk).update(price="99.00")
+
+    def test_history_pages_with_sql_totals_and_summary(self):
+        with self.assertNumQueries(3):  # user id, sahifa (subquery'lar bilan), summary
+            body = self.client.get("/api/orders/history/", {"user_number": "90 123 45 67", "page_size": 2}).json()
+        self.assertEqual(body["user_number"], "+998901234567")
+        self.assertEqual(
+            [(o["tracking_code"], o["total"], o["item_count"], o["quantity"]) for o in body["results"]],
+            [("A-2", "20.00", 1, 5), ("A-1", "22.50", 2, 4)],
+        )
+        self.assertEqual(body["summary"]["orders"], 3)
+        self.assertEqual(body["summary"]["total_spent"], "63.50")
+        self.assertIsNotNone(body["summary"]["last_order_at"])
+
+        body = self.client.get(body["next"]).json()
+        self.assertEqual([(o["tracking_code"], o["total"]) for o in body["results"]], [("A-0", "21.00")])
+        self.assertIsNone(body["next"])
+
+    def test_expired_reservations_skipped_in_list_and_summary(self):
+        Order.objects.filter(pk=self.orders[2].pk).update(status=Order.EXPIRED)
+        body = self.client.get("/api/orders/history/", {"user_number": "998901234567"}).json()
+        self.assertEqual([o["tracking_code"] for o in body["results"]], ["A-1", "A-0"])
+        self.assertEqual((body["summary"]["orders"], body["summary"]["total_spent"]), (2, "43.50"))
+        # ro‘yxat va summary bir xil order'larni sanaydi
+        self.assertEqual(len(body["results"]), body["summary"]["orders"])
+        self.assertEqual(sum(Decimal(o["total"]) for o in body["results"]), Decimal(body["summary"]["total_spent"]))
+
+        empty = User.objects.create(number="998911111111", name="Yangi")
+        body = self.client.get("/api/orders/history/", {"user_number": empty.number}).json()
+        self.assertEqual(body["results"], [])
+        self.assertEqual(body["summary"], {"orders": 0, "total_spent": "0.00", "last_order_at": None})
+
+    def test_rejects_bad_numbers(self):
+        self.assertEqual(self.client.get("/api/orders/history/").status_code, 400)
+        self.assertEqual(self.client.get("/api/orders/history/", {"user_number": "12"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/orders/history/", {"user_number": "998999999999"}).status_code, 404)
+
+
+class StockConcurrencyTests(SimpleTestCase):
+    """Yuzlab parallel checkout bitta productga — alohida jarayonda, fayldagi SQLite bazada.
+
+    Test bazasi in-memory shared-cache: u yerda qulf kutilmaydi, darhol
+    "database table is locked" qaytadi; production esa WAL + busy_timeout.
+    """
+
+    def test_parallel_checkouts_never_oversell(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        env = {**os.environ, "DB_PATH": f"{tmp}/stress.sqlite3", "QUERY_PROFILER": ""}
+
+        def manage(*args):
+            return subprocess.run(
+                [sys.executable, "manage.py", *args], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+
+        self.assertEqual(manage("migrate", "-v0").returncode, 0)
+        result = manage("stress_checkout", "--requests", "200", "--workers", "24", "--stock", "80")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("'201': 80", result.stdout)
+        self.assertIn("'409': 120", result.stdout)
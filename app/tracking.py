@@ -0,0 +1,70 @@
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+
+from .models import Sequence
+
+TRACKING_SEQUENCE = "order_tracking_code"
+
+
+def reserve_block(name, size, using="default"):
+    """Hisoblagichni bitta UPDATE bilan ``size`` ga oshiradi va [start, end] qaytaradi.
+
+    UPDATE yozish qulfini oladi, shuning uchun parallel yozuvchilar
+    kesishmaydigan bloklar oladi. Jadval o‘smaydi — doimo O(1).
+    """
+    with transaction.atomic(using=using):
+        updated = Sequence.objects.using(using).filter(name=name).update(value=F("value") + size)
+        if not updated:
+            Sequence.objects.using(using).get_or_create(name=name)
+            Sequence.objects.using(using).filter(name=name).update(value=F("value") + size)
+        end = Sequence.objects.using(using).filter(name=name).values_list("value", flat=True).get()
+    return end - size + 1, end
+
+
+class BlockAllocator:
+    """Hisoblagichdan bloklab oldindan ajratib, jarayon ichida tarqatadi.
+
+    Blokdan qolgan qiymatlar faqat tranzaksiya commit bo‘lgandan keyin
+    keshga qo‘shiladi: rollback bo‘lsa DB hisoblagichi ham orqaga qaytadi,
+    keshda esa qayta beriladigan qiymat qolmaydi.
+    """
+
+    def __init__(self, name, block_size=1):
+        self.name = name
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._free = []
+
+    def allocate(self, using="default"):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+
+        start, end = reserve_block(self.name, self.block_size, using=using)
+        rest = list(range(end, start, -1))
+        if rest:
+            if connections[using].in_atomic_block:
+                transaction.on_commit(lambda: self._release(rest), using=using)
+            else:
+                self._release(rest)
+        return start
+
+    def _release(self, values):
+        with self._lock:
+            self._free.extend(values)
+
+    def reset(self):
+        with self._lock:
+            self._free.clear()
+
+
+tracking_allocator = BlockAllocator(
+    TRACKING_SEQUENCE, block_size=getattr(settings, "TRACKING_CODE_BLOCK_SIZE", 20)
+)
+
+
+def allocate_tracking_code(using="default"):
+    return f"TRK-{tracking_allocator.allocate(using=using):08d}"
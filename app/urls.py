@@ -9,7 +9,9 @@ from .views import (
     OrderViewSet,
     OrderItemViewSet,
     LikeProductViewSet,
-    ProductRateCreateView, OrderCreateView, OrderItemCreateView, CategoryScrollViewSet
+    ProductRateCreateView, OrderCreateView, OrderItemCreateView, CategoryScrollViewSet,
+    ProductSearchView, ProductAutocompleteView, CheckoutView, ProductFacetsView, SyncView,
+    ProductRankingsView,
 )
 
 router = DefaultRouter()
@@ -26,8 +28,14 @@ urlpatterns = [
     path("", include(router.urls)),
     path('create-order/', OrderCreateView.as_view(), name='create-order'),
     path('create-order_item/', OrderItemCreateView.as_view(), name='create-order_item'),
+    path('checkout/', CheckoutView.as_view(), name='checkout'),
     path("products/", ProductListCreateView.as_view(), name="product-list-create"),
     path("products/<int:pk>/", ProductDetailView.as_view(), name="product-detail"),
+    path("products/facets/", ProductFacetsView.as_view(), name="product-facets"),
+    path("products/rankings/", ProductRankingsView.as_view(), name="product-rankings"),
+    path("products/search/", ProductSearchView.as_view(), name="product-search"),
+    path("products/autocomplete/", ProductAutocompleteView.as_view(), name="product-autocomplete"),
     path("ratings/", ProductRateCreateView.as_view(), name="rating-create"),
+    path("sync/", SyncView.as_view(), name="sync"),
 ]
 
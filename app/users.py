@@ -0,0 +1,129 @@
+"""Telefon raqami → foydalanuvchi.
+
+``User.number`` hamma joyda identifikator, shuning uchun raqam avval E.164
+ko‘rinishiga keltiriladi ("+998 (90) 123-45-67", "998901234567",
+"901234567" → "+998901234567") va shu ko‘rinishda saqlanadi/qidiriladi.
+
+``resolve`` natijasi jarayon ichidagi cheklangan LRU'da (raqam → user id)
+saqlanadi; User saqlansa yoki o‘chirilsa tegishli kalitlar tashlanadi
+(app.signals). Keshga faqat commit bo‘lgan ma'lumot yoziladi (``on_commit``),
+rollback bo‘lgan tranzaksiyadagi user "tirilmaydi". Topilmagan raqamlar
+keshlanmaydi — boshqa worker'da yaratilgan foydalanuvchi darhol topiladi. Raqamni boshqa worker'da
+o‘zgartirish esa bu jarayonda LRU'dan chiqib ketguncha eski id'ni
+qaytarishi mumkin (raqamlar deyarli o‘zgarmaydi).
+"""
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import User
+
+_SEPARATORS_RE = re.compile(r"[\s\-().]")
+
+
+def normalize_number(value):
+    """E.164 (``+<kod><raqam>``); noto‘g‘ri raqam uchun ValueError."""
+    raw = _SEPARATORS_RE.sub("", str(value or ""))
+    if raw.startswith("+"):
+        digits = raw[1:]
+    elif raw.startswith("00"):
+        digits = raw[2:]  # xalqaro prefiks
+    else:
+        digits = raw
+        country = str(getattr(settings, "PHONE_DEFAULT_COUNTRY_CODE", "998"))
+        local_length = getattr(settings, "PHONE_LOCAL_LENGTH", 9)
+        if len(digits) == local_length + 1 and digits.startswith("8"):
+            digits = digits[1:]  # eski ichki "8" prefiksi
+        if len(digits) == local_length:
+            digits = country + digits
+    if not digits.isdigit() or not 8 <= len(digits) <= 15 or digits.startswith("0"):
+        raise ValueError(f"Telefon raqami noto‘g‘ri: {value!r}")
+    return "+" + digits
+
+
+class UserIdCache:
+    """Thread-safe LRU: normallashgan raqam → user id."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, number):
+        with self._lock:
+            user_id = self._data.get(number)
+            if user_id is not None:
+                self._data.move_to_end(number)
+            return user_id
+
+    def set(self, number, user_id):
+        with self._lock:
+            self._data[number] = user_id
+            self._data.move_to_end(number)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, *numbers):
+        with self._lock:
+            for number in numbers:
+                self._data.pop(number, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+user_ids = UserIdCache(getattr(settings, "USER_RESOLVE_CACHE_SIZE", 10_000))
+
+
+def resolve(number, using=None):
+    """Raqam egasining id'si yoki None. Noto‘g‘ri raqam — ValueError."""
+    number = normalize_number(number)
+    user_id = user_ids.get(number)
+    if user_id is None:
+        user_id = User.objects.using(using).filter(number=number).values_list("id", flat=True).first()
+        if user_id is not None:
+            _remember({number: user_id}, using)
+    return user_id
+
+
+def resolve_many(numbers, using=None):
+    """``{normallashgan raqam: user id}`` — keshda yo‘qlari bitta ``IN`` query bilan.
+
+    Noto‘g‘ri va topilmagan raqamlar natijada bo‘lmaydi.
+    """
+    result, missing = {}, set()
+    for value in numbers:
+        try:
+            number = normalize_number(value)
+        except ValueError:
+            continue
+        user_id = user_ids.get(number)
+        if user_id is None:
+            missing.add(number)
+        else:
+            result[number] = user_id
+    if missing:
+        found = dict(User.objects.using(using).filter(number__in=missing).values_list("number", "id"))
+        _remember(found, using)
+        result.update(found)
+    return result
+
+
+def _remember(found, using):
+    def store():
+        for number, user_id in found.items():
+            user_ids.set(number, user_id)
+
+    transaction.on_commit(store, using=using)
+
+
+def forget(user):
+    """User saqlangan/o‘chirilganda — eski va yangi raqam keshdan tashlanadi."""
+    user_ids.discard(user.number, getattr(user, "_loaded_number", None))
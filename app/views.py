@@ -4,7 +4,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import F, ExpressionWrapper, DecimalField
+from django.conf import settings
+from django.db import router, transaction
+from django.http import StreamingHttpResponse
 
 from .models import (
     User, Category, CategoryScroll, Product, ProductImage,
@@ -13,10 +15,19 @@ from .models import (
 from .serializers import (
     UserSerializer, CategorySerializer, CategoryScrollSerializer,
     ProductSerializer, ProductImageSerializer,
-    OrderSerializer, OrderItemSerializer,
+    OrderSerializer, OrderItemSerializer, OrderHistorySerializer, OrderSummarySerializer,
     LikeProductSerializer, ProductRateSerializer,
-    OrderCreateSerializer, OrderItemCreateSerializer
+    OrderCreateSerializer, OrderItemCreateSerializer, CheckoutSerializer,
+    SparseFields, main_image_prefetch,
 )
+from .cache import (
+    CATEGORIES_GENERATION, CATEGORY_SCROLLS_GENERATION, PRODUCTS_GENERATION, ResponseCacheMixin,
+)
+from .facets import cached_facets
+from .orders import order_history, order_summary
+from .filters import FTSSearchFilter, LikeProductFilter, ProductFilter, UserFilter
+from .pagination import KeysetPagination
+from . import rankings, search, stock, sync, users
 
 
 # 🔹 USER
@@ -24,64 +35,182 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = {
-        'number': ['exact'],
-    }
+    filterset_class = UserFilter  # raqam E.164 ga keltirib solishtiriladi; ?numbers=a,b — bulk (app.users)
 
 
 # 🔹 CATEGORY
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ResponseCacheMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    read_replica = True  # xavfsiz GET'lar replica'dan (app.db)
+    response_cache_generations = (CATEGORIES_GENERATION,)  # GET javoblari keshda (app.cache)
 
 
 # 🔹 CATEGORY SCROLL
-class CategoryScrollViewSet(viewsets.ModelViewSet):
+class CategoryScrollViewSet(ResponseCacheMixin, viewsets.ModelViewSet):
     queryset = CategoryScroll.objects.all()
     serializer_class = CategoryScrollSerializer
+    read_replica = True
+    response_cache_generations = (CATEGORY_SCROLLS_GENERATION,)
 
 
 # 🔹 PRODUCT LIST / CREATE
-class ProductListCreateView(generics.ListCreateAPIView):
+class ProductListCreateView(ResponseCacheMixin, generics.ListCreateAPIView):
     serializer_class = ProductSerializer
-    queryset = Product.objects.all().select_related("category").prefetch_related("images")
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
+    queryset = Product.objects.all()
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FTSSearchFilter]
 
-    # Filtering fields
-    filterset_fields = ['category', 'price', 'quantity']
+    # Filtering: category, category_scroll, price, quantity, min_price, max_price
+    filterset_class = ProductFilter
 
-    # Searching
+    # Searching (SQLite'da FTS5 indeksi orqali)
     search_fields = ['name', 'desc']
 
     # Ordering
-    ordering_fields = ['price', 'quantity', 'created_at']
+    ordering_fields = ['price', 'quantity', 'created_at', 'average_rating', 'rating_count', 'likes_count']
+
+    # Pagination — (created_at, id) / (price, id) keyset, qolganlari OFFSET
+    pagination_class = KeysetPagination
+    keyset_ordering_fields = ('created_at', 'price')
+    keyset_default_ordering = '-created_at'
+
+    read_replica = True
+    response_cache_generations = (PRODUCTS_GENERATION,)
 
     def get_queryset(self):
         queryset = super().get_queryset()
 
-        # annotate final_price (agar kelajakda chegirma yoki boshqa formula bo‘lsa)
-        queryset = queryset.annotate(
-            final_price_expr=ExpressionWrapper(
-                F("price"), output_field=DecimalField()
-            )
-        )
+        # ?fields= da images so‘ralmasa prefetch ham qilinmaydi
+        if SparseFields.from_request(self.request).wants("images"):
+            queryset = queryset.prefetch_related("images")
+        return queryset
 
-        # Query params
-        min_price = self.request.query_params.get('min_price')
-        max_price = self.request.query_params.get('max_price')
 
-        if min_price:
-            queryset = queryset.filter(final_price_expr__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(final_price_expr__lte=max_price)
+# 🔹 PRODUCT FACETS — filter ekrani uchun hisoblar
+class ProductFacetsView(ProductListCreateView):
+    """ProductListCreateView bilan bir xil filter/search/min_price/max_price,
+    lekin ro‘yxat o‘rniga kategoriya, scroll va narx hisoblarini qaytaradi."""
+    http_method_names = ["get", "head", "options"]
+    pagination_class = None
+    response_cache_generations = ()  # cached_facets o‘z keshiga ega
 
-        return queryset
+    def list(self, request, *args, **kwargs):
+        try:
+            bucket_count = max(1, min(int(request.query_params.get("buckets", 5)), 20))
+        except ValueError:
+            bucket_count = 5
+
+        params = request.query_params.copy()
+        for ignored in ("ordering", "buckets", "fields", "expand"):
+            params.pop(ignored, None)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(cached_facets(queryset, params, bucket_count))
 
 
 # 🔹 PRODUCT DETAIL
-class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProductDetailView(ResponseCacheMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Product.objects.all()
+    serializer_class = ProductSerializer
+    read_replica = True
+    response_cache_generations = ("product:{pk}",)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if SparseFields.from_request(self.request).wants("images"):
+            queryset = queryset.prefetch_related("images")
+        return queryset
+
+
+# 🔹 PRODUCT RANKINGS — bosh sahifa "top" ro‘yxatlari (app.rankings)
+class ProductRankingsView(ResponseCacheMixin, generics.ListAPIView):
+    """``?metric=rating|likes|sales&category=&category_scroll=&limit=`` — ball bilan top-N."""
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    read_replica = True
+    response_cache_generations = (PRODUCTS_GENERATION, rankings.RANKINGS_GENERATION)
+
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        metric = params.get("metric", "rating")
+        if metric not in rankings.METRICS:
+            return Response({"metric": f"Quyidagilardan biri: {', '.join(rankings.METRICS)}"}, status=400)
+        try:
+            limit = max(1, min(int(params.get("limit", 10)), settings.API_MAX_PAGE_SIZE))
+            category = int(params["category"]) if params.get("category") else None
+            category_scroll = int(params["category_scroll"]) if params.get("category_scroll") else None
+        except ValueError:
+            return Response({"error": "limit, category va category_scroll butun son bo‘lishi kerak"}, status=400)
+
+        ranked = rankings.top(metric, limit=limit, category=category, category_scroll=category_scroll)
+        if not ranked:
+            return Response([])
+        scores = dict(ranked)
+        queryset = super().get_queryset().filter(pk__in=scores).order_by(search.preserve_order(list(scores)))
+        if SparseFields.from_request(request).wants("images"):
+            queryset = queryset.prefetch_related("images")
+
+        products = list(queryset)
+        data = self.get_serializer(products, many=True).data
+        for product, item in zip(products, data):
+            item["score"] = scores[product.pk]
+        return Response(data)
+
+
+# 🔹 PRODUCT SEARCH (FTS5 + BM25)
+class ProductSearchView(generics.ListAPIView):
+    serializer_class = ProductSerializer
+    read_replica = True
+
+    def list(self, request, *args, **kwargs):
+        q = request.query_params.get("q", "")
+        try:
+            # manfiy limit SQLite'da LIMIT -1 (cheksiz) bo‘lib qoladi
+            limit = max(1, min(int(request.query_params.get("limit", 20)), settings.API_MAX_PAGE_SIZE))
+            offset = max(int(request.query_params.get("offset", 0)), 0)
+        except ValueError:
+            return Response({"error": "limit va offset butun son bo‘lishi kerak"}, status=400)
+
+        queryset = Product.objects.select_related("category").prefetch_related("images")
+        if search.fts_enabled(queryset.db):
+            ids = search.ranked_ids(q, limit=limit, offset=offset, using=queryset.db)
+            queryset = queryset.filter(pk__in=ids).order_by(search.preserve_order(ids)) if ids else queryset.none()
+        else:
+            queryset = queryset.filter(name__icontains=q).order_by("name")[offset:offset + limit]
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+# 🔹 PRODUCT AUTOCOMPLETE
+class ProductAutocompleteView(APIView):
+    read_replica = True
+
+    def get(self, request, *args, **kwargs):
+        q = request.query_params.get("q", "")
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 10)), 50))
+        except ValueError:
+            limit = 10
+
+        using = router.db_for_read(Product)
+        if search.fts_enabled(using):
+            return Response(search.autocomplete(q, limit=limit, using=using))
+        return Response(list(
+            Product.objects.filter(name__istartswith=q).order_by("name").values("id", "name")[:limit]
+        ))
+
+
+# 🔹 DELTA-SYNC — ?since=<watermark> dan keyingi o‘zgarishlar (NDJSON oqimi)
+class SyncView(APIView):
+    def get(self, request, *args, **kwargs):
+        try:
+            since = sync.parse_watermark(request.query_params.get("since"))
+        except ValueError as exc:
+            return Response({"since": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = sync.changes(since, request=request)
+        return StreamingHttpResponse(sync.ndjson(rows), content_type="application/x-ndjson")
 
 
 # 🔹 PRODUCT RATE
@@ -98,8 +227,55 @@ class ProductImageViewSet(viewsets.ModelViewSet):
 
 # 🔹 ORDER
 class OrderViewSet(viewsets.ModelViewSet):
-    queryset = Order.objects.all().prefetch_related("items__product")
+    queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering_fields = ('created_at',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        sparse = SparseFields.from_request(self.request)
+
+        if sparse.wants("user_number"):
+            queryset = queryset.select_related("user")
+        if sparse.wants("items"):
+            queryset = queryset.prefetch_related(*order_item_prefetches(sparse, "items."))
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def confirm(self, request, pk=None):
+        """Checkout zaxirasini doimiy qiladi (to‘lovdan keyin); muddati o‘tgan bo‘lsa 409."""
+        if not stock.confirm_order(pk):
+            return Response({"error": "Order kutilayotgan holatda emas yoki zaxira muddati o‘tgan"},
+                            status=status.HTTP_409_CONFLICT)
+        return Response({"id": int(pk), "status": Order.CONFIRMED})
+
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """Foydalanuvchining order'lari (``?user_number=``) — yangilari birinchi, keyset sahifalar.
+
+        Har bir order'ning ``total``/``item_count``/``quantity`` qiymatlari va
+        ``summary`` (butun tarix) SQL aggregate'lar bilan hisoblanadi. Muddati
+        o‘tgan zaxiralar ro‘yxatda ham, summary'da ham ko‘rsatilmaydi.
+        """
+        user_number = request.query_params.get("user_number")
+        if not user_number:
+            return Response({"error": "user_number majburiy!"}, status=400)
+        try:
+            user_id = users.resolve(user_number)
+        except ValueError:
+            return Response({"error": "Telefon raqami noto‘g‘ri!"}, status=400)
+        if user_id is None:
+            return Response({"error": "User topilmadi!"}, status=404)
+
+        page = self.paginate_queryset(order_history(user_id))
+        response = self.get_paginated_response(OrderHistorySerializer(page, many=True).data)
+        response.data = {
+            "user_number": users.normalize_number(user_number),
+            "summary": OrderSummarySerializer(order_summary(user_id)).data,
+            **response.data,
+        }
+        return response
 
 
 # 🔹 ORDER ITEM
@@ -107,16 +283,75 @@ class OrderItemViewSet(viewsets.ModelViewSet):
     queryset = OrderItem.objects.all()
     serializer_class = OrderItemSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return queryset.prefetch_related(*order_item_prefetches(SparseFields.from_request(self.request)))
+
+
+def order_item_prefetches(sparse, path=""):
+    """OrderItem (yoki Order.items) uchun faqat so‘ralgan maydonlarga kerakli prefetch'lar."""
+    lookup = path.replace(".", "__")
+    prefetches = [lookup.rstrip("_")] if lookup else []
+
+    if sparse.expands(f"{path}product"):
+        prefetches.append(f"{lookup}product")
+        if sparse.wants(f"{path}product.images"):
+            prefetches.append(f"{lookup}product__images")
+    elif sparse.wants(f"{path}product"):
+        prefetches.append(f"{lookup}product")
+        if sparse.wants(f"{path}product.main_image"):
+            prefetches.append(main_image_prefetch(f"{lookup}product__"))
+    return prefetches
+
 
 # 🔹 LIKE PRODUCT
 class LikeProductViewSet(viewsets.ModelViewSet):
-    queryset = LikeProduct.objects.all()
+    queryset = LikeProduct.objects.select_related("user", "product")  # user_display — N+1 bo‘lmasin
     serializer_class = LikeProductSerializer
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = {
-        'user__number': ['exact'],
-        'product': ['exact'],
-    }
+    filterset_class = LikeProductFilter
+
+    @action(detail=False, methods=['get'], url_path='liked')
+    def liked(self, request):
+        """Foydalanuvchi like bosgan product id'lari — bitta indeksli query.
+
+        ``?user_number=...&products=1,2,3`` (yoki ``products=all``). ``version``
+        — like id'laridan hisoblanadi (id'lar qayta ishlatilmaydi), mos
+        ``If-None-Match`` kelsa 304 qaytadi.
+        """
+        user_number = request.query_params.get("user_number")
+        products = request.query_params.get("products", "all")
+        if not user_number:
+            return Response({"error": "user_number majburiy!"}, status=400)
+        try:
+            user_id = users.resolve(user_number)
+        except ValueError:
+            return Response({"error": "Telefon raqami noto‘g‘ri!"}, status=400)
+        user_number = users.normalize_number(user_number)
+
+        queryset = LikeProduct.objects.filter(user_id=user_id)
+        if products != "all":
+            try:
+                ids = {int(pk) for pk in products.split(",") if pk}
+            except ValueError:
+                return Response({"error": "products — vergul bilan ajratilgan id'lar yoki 'all'"}, status=400)
+            if len(ids) > settings.API_MAX_LIKED_IDS:
+                return Response({"error": f"Ko‘pi bilan {settings.API_MAX_LIKED_IDS} ta product"}, status=400)
+            queryset = queryset.filter(product_id__in=ids)
+
+        rows = list(queryset.order_by().values_list("id", "product_id")) if user_id is not None else []
+        version = f"{len(rows)}-{max((like_id for like_id, _ in rows), default=0)}"
+        etag = f'"{version}"'
+
+        if etag in request.headers.get("If-None-Match", "") or request.query_params.get("version") == version:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        return Response({
+            "user_number": user_number,
+            "product_ids": sorted(product_id for _, product_id in rows),
+            "version": version,
+        }, headers={"ETag": etag})
 
     @action(detail=False, methods=['post'])
     def toggle_like(self, request):
@@ -126,38 +361,42 @@ class LikeProductViewSet(viewsets.ModelViewSet):
         if not user_number or not product_id:
             return Response({"error": "user_number va product majburiy!"}, status=400)
 
-        # User tekshirish
         try:
-            user = User.objects.get(number=user_number)
-        except User.DoesNotExist:
+            user_id = users.resolve(user_number)
+        except ValueError:
+            return Response({"error": "Telefon raqami noto‘g‘ri!"}, status=400)
+        if user_id is None:
             return Response({"error": "User topilmadi!"}, status=404)
-
-        # Product tekshirish
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
-            return Response({"error": "Product topilmadi!"}, status=404)
-
-        # Like mavjudmi?
-        like = LikeProduct.objects.filter(user=user, product=product).first()
-
-        if like:
-            like.delete()
-            likes_count = LikeProduct.objects.filter(product=product).count()
+        # id keshdan — javobdagi raqam uchun qayta SELECT qilinmaydi
+        user = User(pk=user_id, number=users.normalize_number(user_number))
+
+        # insert yoki delete + likes_count F() yangilanishi (signal) — bitta tranzaksiyada.
+        # Avval o‘qib keyin yozish poyga beradi: DELETE natijasiga qarab tarmoqlanamiz
+        with transaction.atomic():
+            deleted, _ = LikeProduct.objects.filter(user_id=user_id, product_id=product_id).delete()
+            like = None
+            if not deleted:
+                # parallel so‘rov qo‘shib ulgurgan bo‘lsa — unique_together, mavjud like qaytadi
+                like, _ = LikeProduct.objects.get_or_create(user=user, product_id=product_id)
+
+            product = Product(pk=product_id)
+            try:
+                product.refresh_from_db(fields=["likes_count"])  # signal'dagi F() natijasi
+            except Product.DoesNotExist:
+                transaction.set_rollback(True)
+                return Response({"error": "Product topilmadi!"}, status=404)
+
+        if like is None:
             return Response({
                 "status": "unliked",
-                "product_id": product.id,
-                "likes_count": likes_count
-            })
-        else:
-            like = LikeProduct.objects.create(user=user, product=product)
-            serializer = self.get_serializer(like)
-            likes_count = LikeProduct.objects.filter(product=product).count()
-            return Response({
-                "status": "liked",
-                "like": serializer.data,
-                "likes_count": likes_count
+                "product_id": product.pk,
+                "likes_count": product.likes_count
             })
+        return Response({
+            "status": "liked",
+            "like": self.get_serializer(like).data,
+            "likes_count": product.likes_count
+        })
 
 
 # 🔹 ORDER ITEM CREATE
@@ -174,3 +413,22 @@ class OrderCreateView(APIView):
             order = serializer.save()
             return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+# 🔹 CHECKOUT — butun savatcha bitta so‘rovda
+class CheckoutView(APIView):
+    def post(self, request, *args, **kwargs):
+        serializer = CheckoutSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                order = serializer.save()
+            except stock.OutOfStock as exc:
+                # har bir yetmagan liniya: product_id, so‘ralgan va mavjud miqdor
+                return Response({"items": exc.lines}, status=status.HTTP_409_CONFLICT)
+            order = (
+                Order.objects.select_related("user")
+                .prefetch_related("items__product", main_image_prefetch("items__product__"))
+                .get(pk=order.pk)
+            )
+            return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from importlib.util import find_spec
 import os
 
 
@@ -46,10 +47,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app.profiling.QueryProfilerMiddleware',
+    'app.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'app.db.ReplicaRoutingMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -78,9 +82,78 @@ TEMPLATES = [
 WSGI_APPLICATION = 'myproject.wsgi.application'
 
 REST_FRAMEWORK = { 'DEFAULT_FILTER_BACKENDS':
-                       ['django_filters.rest_framework.DjangoFilterBackend']
+                       ['django_filters.rest_framework.DjangoFilterBackend'],
+                   'PAGE_SIZE': 20,
+                   # orjson; Accept: application/msgpack — msgpack o‘rnatilgan bo‘lsa
+                   'DEFAULT_RENDERER_CLASSES': [
+                       'app.renderers.FastJSONRenderer',
+                       *(['app.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+                       'rest_framework.renderers.BrowsableAPIRenderer',
+                   ],
                    }
 
+# shundan kichik javoblar siqilmaydi (baytlarda); brotli o‘rnatilgan bo‘lsa br afzal
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+
+# ?page_size= / ?limit= uchun yuqori chegara
+API_MAX_PAGE_SIZE = 100
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'kulol-default',
+    },
+    # tayyor GET javoblari (app.cache.ResponseCacheMixin); LocMem — LRU, fayl uchun FileBasedCache
+    'responses': {
+        'BACKEND': os.environ.get('RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('RESPONSE_CACHE_LOCATION', 'kulol-responses'),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# katalog GET javoblari keshi (signal'lar bilan aniq eskiradi)
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE', '1') == '1'
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = 300
+# avlod hisoblagichlari (app.cache) — barcha worker'lar uchun umumiy backend bo‘lishi shart
+CACHE_GENERATIONS_ALIAS = RESPONSE_CACHE_ALIAS
+
+# /api/products/facets/ natijasi (Product o‘zgarsa darhol eskiradi)
+FACETS_CACHE_TIMEOUT = 300
+
+# /api/likes/liked/?products= da bir so‘rovdagi id'lar soni
+API_MAX_LIKED_IDS = 1000
+
+# admin changelist: shundan katta jadvallarda COUNT(*) o‘rniga taxminiy son (app.admin)
+ADMIN_COUNT_THRESHOLD = 10_000
+
+# /api/products/rankings/: reyting bali bayes o‘rtacha — (C * m + sum) / (C + count)
+# (o‘zgartirilsa: manage.py rebuild_rankings)
+RANKINGS_BAYESIAN = True
+RANKINGS_BAYES_PRIOR = 3.0   # m — yangi product bahosi shunga yaqin boshlanadi
+RANKINGS_BAYES_WEIGHT = 5    # C — shuncha "xayoliy" baho
+
+# delta-sync (/api/sync/): watermark orqaga surilishi va tombstone'lar saqlanish muddati
+SYNC_WATERMARK_LAG_SECONDS = 5
+SYNC_TOMBSTONE_DAYS = 30
+
+# checkout zaxirasi shuncha daqiqadan keyin bo‘shatiladi (manage.py release_expired_reservations)
+ORDER_RESERVATION_MINUTES = 15
+
+# order tracking code'lari hisoblagichdan shuncha-shunchadan oldindan olinadi
+TRACKING_CODE_BLOCK_SIZE = 20
+
+# telefon raqamlari E.164 ga keltiriladi: "901234567" → "+998901234567" (app.users)
+PHONE_DEFAULT_COUNTRY_CODE = "998"
+PHONE_LOCAL_LENGTH = 9
+# raqam → user id LRU hajmi (har bir jarayonda alohida)
+USER_RESOLVE_CACHE_SIZE = 10_000
+
+# pagination_class view'larda alohida beriladi
+SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -88,10 +161,45 @@ REST_FRAMEWORK = { 'DEFAULT_FILTER_BACKENDS':
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DB_PATH', BASE_DIR / 'db.sqlite3'),
+        # persistent ulanishlar: DB_CONN_MAX_AGE=60 (sekund), None — cheksiz
+        'CONN_MAX_AGE': int(os.environ['DB_CONN_MAX_AGE']) if os.environ.get('DB_CONN_MAX_AGE') else 0,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            # yozuv tranzaksiyasi boshidanoq qulf oladi — "database is locked" kamayadi
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# Read replica'lar: DB_REPLICAS=/srv/kulol/replica1.sqlite3,/srv/kulol/replica2.sqlite3
+DATABASE_REPLICAS = []
+for i, path in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{i}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'PRAGMAS': {'query_only': 'ON'},
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['app.db.ReadReplicaRouter']
+
+# har bir yangi SQLite ulanishida (app.db.apply_sqlite_pragmas)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,  # 256 MB
+    'cache_size': -65536,  # 64 MB
+    'busy_timeout': 20000,
+    'temp_store': 'MEMORY',
 }
 
+# yozgan mijoz shuncha sekund primary'dan o‘qiydi
+REPLICA_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -138,3 +246,35 @@ MEDIA_ROOT = '/var/www/kulol/media'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Rasm variantlari (app.images) — yuklangandan keyin fon thread'larida yaratiladi
+IMAGE_WORKERS = 2
+IMAGE_VARIANTS_ASYNC = True
+
+
+# So‘rov profili (app.profiling): Server-Timing header, N+1 ogohlantirishlari, JSON log
+QUERY_PROFILER_ENABLED = os.environ.get('QUERY_PROFILER', '') == '1'
+QUERY_PROFILER_SAMPLE_RATE = float(os.environ.get('QUERY_PROFILER_SAMPLE_RATE', '0.1'))
+QUERY_PROFILER_N_PLUS_ONE = 3
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'raw': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'profiling': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'raw',
+        },
+    },
+    'loggers': {
+        'app.profiling': {
+            'handlers': ['profiling'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,17 @@
+"""Testlar uchun sozlamalar: ``python manage.py test --settings=myproject.settings_test``.
+
+Replica marshrutini haqiqiy ikkinchi SQLite faylda tekshirish uchun
+``test_replica`` alias'i qo‘shiladi (app.tests.ReplicaDatabaseTests;
+DATABASE_REPLICAS'ga faqat o‘sha test qo‘shadi). Oddiy sozlamalarda bu test
+o‘tkazib yuboriladi.
+"""
+import os
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DATABASES['test_replica'] = {
+    **DATABASES['default'],
+    'TEST': {'NAME': os.path.join(tempfile.gettempdir(), 'kulol_test_replica.sqlite3')},
+}
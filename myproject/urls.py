@@ -22,6 +22,7 @@ from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/async/', include('app.async_urls')),  # ASGI uchun async o‘qish endpoint'lari
     path('api/', include('app.urls')),  # 👈 include your app urls
 ]
 